@@ -0,0 +1,146 @@
+# Importaciones necesarias de librerías
+import cProfile
+import contextlib
+import json
+import os
+import platform
+import pstats
+import tempfile
+import time
+import paramiko
+from rich.console import Console
+from rich.table import Table
+# Importaciones necesarias de otras clases
+from Benchmarks.ThrottledSocket import ThrottledSocket
+from Connection.KnownHostsStore import KnownHostsPolicy, KnownHostsStore
+from Connection.SocketConnector import SocketConnector
+from Connection.SSHConnection import SSHConnection
+
+"""
+Clase con utilidades comunes a los benchmarks:
+- Crear conexiones SSHConnection contra el servidor local sin preguntar nada al usuario
+- Medir tiempos y capturar perfiles (cProfile o pyinstrument si está instalado)
+- Guardar los resultados en JSON (para comparar ejecuciones y detectar regresiones) y mostrarlos en una tabla
+"""
+
+
+class BenchmarkSupport:
+    # known_hosts temporal para que los benchmarks no escriban en el del usuario
+    _known_hosts = None
+
+    """
+    Método estático que crea una SSHConnection conectada al servidor local usando el camino real de conexión
+    (SocketConnector, perfil de transporte, verificación de clave de host y _connect_client).
+    :param server: Instancia de StandInServer en ejecución
+    :param profile: Nombre del perfil de transporte
+    :param latency_ms: Latencia simulada para lo que envía el cliente
+    :param bandwidth_mbps: Ancho de banda simulado para lo que envía el cliente
+    :param auth_kwargs: Parámetros de autenticación (por defecto, la contraseña del servidor)
+    """
+
+    @staticmethod
+    def connect(server, profile="default", latency_ms=0, bandwidth_mbps=None, auth_kwargs=None, quiet=True):
+        connection = SSHConnection(server.host, server.username, server.port, profile=profile)
+        if quiet:
+            connection.console = Console(quiet=True)
+
+        if BenchmarkSupport._known_hosts is None:
+            BenchmarkSupport._known_hosts = KnownHostsStore(os.path.join(tempfile.mkdtemp(), "known_hosts"))
+        connection.client.set_missing_host_key_policy(KnownHostsPolicy(BenchmarkSupport._known_hosts))
+
+        # El lado cliente del enlace simulado se aplica envolviendo el socket que abre SocketConnector
+        if latency_ms or bandwidth_mbps:
+            def open_socket():
+                sock = SocketConnector.connect(server.host, server.port)
+                return ThrottledSocket(sock, latency_ms, bandwidth_mbps)
+            connection.open_socket = open_socket
+
+        if auth_kwargs is None:
+            auth_kwargs = {"password": server.password, "look_for_keys": False, "allow_agent": False}
+        connection._connect_client(**auth_kwargs)
+        return connection
+
+    """
+    Método estático que ejecuta una función y devuelve (segundos, resultado).
+    """
+
+    @staticmethod
+    def timed(function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        return time.perf_counter() - start, result
+
+    """
+    Método estático (gestor de contexto) que captura un perfil del bloque de código.
+    :param mode: None (sin perfil), "cprofile" o "pyinstrument"
+    :param output: Ruta base donde guardar el perfil (.prof para cProfile, .html para pyinstrument)
+    """
+
+    @staticmethod
+    @contextlib.contextmanager
+    def profiled(mode, output):
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(output + ".prof")
+                pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+        elif mode == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise SystemExit("pyinstrument no está instalado (pip install pyinstrument)")
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                with open(output + ".html", "w") as f:
+                    f.write(profiler.output_html())
+                print(profiler.output_text(unicode=True, color=False))
+        else:
+            yield
+
+    """
+    Método estático que guarda los resultados en JSON junto con los datos del entorno de la ejecución.
+    """
+
+    @staticmethod
+    def write_results(path, benchmark, settings, results):
+        document = {
+            "benchmark": benchmark,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": {
+                "python": platform.python_version(),
+                "paramiko": paramiko.__version__,
+                "platform": platform.platform(),
+            },
+            "settings": settings,
+            "results": results,
+        }
+        with open(path, "w") as f:
+            json.dump(document, f, indent=2)
+        return path
+
+    """
+    Método estático que muestra los resultados en una tabla Rich con las columnas indicadas.
+    """
+
+    @staticmethod
+    def print_table(title, results, columns):
+        table = Table(title=title)
+        for column in columns:
+            table.add_column(column)
+        for result in results:
+            table.add_row(*[BenchmarkSupport._format(result.get(column)) for column in columns])
+        Console().print(table)
+
+    @staticmethod
+    def _format(value):
+        if isinstance(value, float):
+            return f"{value:.4f}"
+        return "" if value is None else str(value)
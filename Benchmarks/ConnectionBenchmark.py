@@ -0,0 +1,314 @@
+# Importaciones necesarias de librerías
+import argparse
+import contextlib
+import os
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import paramiko
+from rich.console import Console
+# Importaciones necesarias de otras clases
+from Benchmarks.BenchmarkSupport import BenchmarkSupport
+from Benchmarks.StandInServer import StandInServer
+from Commands.CommandsExecutorCommand import CommandsExecutorCommand
+from Connection.CertificateAuthority import CertificateAuthority
+from Connection.Tunnel import Tunnel
+
+"""
+Benchmark de los caminos críticos de SSHConnection contra un servidor SSH local (StandInServer):
+- Tiempo de handshake por método de autenticación (contraseña, clave, agente y certificado)
+- Latencia hasta el primer byte de exec_command
+- Latencia hasta el primer byte del bucle de lectura de la shell interactiva (CommandsExecutorCommand)
+- Tiempo de creación de un túnel local con Tunnel (hasta que el puerto reenvía datos y hasta que vuelve launch())
+Opcionalmente captura un perfil con cProfile o pyinstrument. Los resultados se guardan en JSON.
+
+Uso (desde la raíz del proyecto):
+  python3 -m Benchmarks.ConnectionBenchmark --iterations 20 --profile cprofile
+"""
+
+
+class ConnectionBenchmark:
+
+    def __init__(self, args):
+        self.args = args
+        self.console = Console()
+        self.work_dir = tempfile.mkdtemp(prefix="sshtool-bench-")
+        self.results = []
+        self._agent = None
+
+    """
+    Método principal que prepara claves, CA y agente, ejecuta las mediciones y guarda los resultados.
+    """
+
+    def run(self):
+        # Se usan claves RSA 2048 como las que genera KeyManagerCommand
+        self.key_path = os.path.join(self.work_dir, "bench_key")
+        subprocess.run(["ssh-keygen", "-q", "-t", "rsa", "-b", "2048", "-f", self.key_path, "-N", ""], check=True)
+        ca = CertificateAuthority.generate_ca_key(os.path.join(self.work_dir, "ca"))
+        self.cert_path, _ = ca.sign_key(self.key_path + ".pub", "bench", ["bench"], "+1h")
+
+        server = StandInServer(latency_ms=self.args.latency_ms)
+        server.authorize_key(self.key_path + ".pub")
+        server.trust_ca(ca.ca_key_path + ".pub")
+
+        try:
+            with server, BenchmarkSupport.profiled(self.args.profile, os.path.join(self.work_dir, "connection")):
+                for method in self.args.methods.split(","):
+                    self._bench_handshake(server, method)
+                self._bench_exec(server)
+                self._bench_shell(server)
+                if not self.args.skip_tunnel:
+                    self._bench_tunnel(server)
+        finally:
+            self._stop_agent()
+
+        settings = {key: value for key, value in vars(self.args).items() if key != "output"}
+        BenchmarkSupport.write_results(self.args.output, "connection", settings, self.results)
+        BenchmarkSupport.print_table(
+            "Conexión y ejecución", self.results,
+            ["operation", "method", "iterations", "min_ms", "median_ms", "p95_ms", "mean_ms"])
+        self.console.print(f"[green]✔ Resultados guardados en:[/green] {self.args.output}")
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    """
+    Método que mide conexiones completas (TCP + intercambio de claves + autenticación) con un método concreto.
+    La carga de la clave privada forma parte de la medición, igual que en SSHConnection.connect().
+    """
+
+    def _bench_handshake(self, server, method):
+        def auth_kwargs():
+            if method == "password":
+                return {"password": server.password, "look_for_keys": False, "allow_agent": False}
+            if method == "key":
+                pkey = paramiko.RSAKey.from_private_key_file(self.key_path)
+                return {"pkey": pkey, "look_for_keys": False, "allow_agent": False}
+            if method == "agent":
+                return {"pkey": paramiko.Agent().get_keys()[0], "look_for_keys": False, "allow_agent": True}
+            if method == "cert":
+                pkey = paramiko.RSAKey.from_private_key_file(self.key_path)
+                pkey.load_certificate(self.cert_path)
+                return {"pkey": pkey, "look_for_keys": False, "allow_agent": False}
+            raise ValueError(f"Método de autenticación desconocido: {method}")
+
+        if method == "agent" and not self._start_agent():
+            self.console.print("[yellow]⚠ ssh-agent no disponible: se omite el método 'agent'[/yellow]")
+            return
+
+        samples = []
+        for _ in range(self.args.iterations):
+            seconds, connection = BenchmarkSupport.timed(
+                lambda: BenchmarkSupport.connect(server, latency_ms=self.args.latency_ms, auth_kwargs=auth_kwargs()))
+            connection.client.close()
+            samples.append(seconds)
+        self._record("handshake", method, samples)
+
+    """
+    Método que mide exec_command: tiempo hasta el primer byte de salida y hasta el código de salida.
+    """
+
+    def _bench_exec(self, server):
+        connection = BenchmarkSupport.connect(server, latency_ms=self.args.latency_ms)
+        first_byte, completed = [], []
+        for _ in range(self.args.iterations):
+            start = time.perf_counter()
+            _, stdout, _ = connection.client.exec_command("echo ready")
+            stdout.channel.recv(1)
+            first_byte.append(time.perf_counter() - start)
+            stdout.channel.recv_exit_status()
+            completed.append(time.perf_counter() - start)
+        connection.client.close()
+        self._record("exec-first-byte", "exec_command", first_byte)
+        self._record("exec-exit-status", "exec_command", completed)
+
+    """
+    Método que mide el bucle de lectura de CommandsExecutorCommand: desde que se envía un comando a la shell
+    hasta que su salida se imprime. La salida estándar se redirige para detectar cuándo aparece.
+    """
+
+    def _bench_shell(self, server):
+        connection = BenchmarkSupport.connect(server, latency_ms=self.args.latency_ms)
+        executor = CommandsExecutorCommand(connection.client.invoke_shell())
+        recorder = _OutputRecorder()
+
+        samples = []
+        with contextlib.redirect_stdout(recorder):
+            reader = threading.Thread(target=executor.read_from_shell, daemon=True)
+            reader.start()
+            for i in range(self.args.iterations):
+                # printf hace que la salida esperada (M<i>K) no coincida con el eco del comando tecleado
+                token = f"M{i}K"
+                start = time.perf_counter()
+                executor.shell.send(f"printf 'M%sK\\n' {i}\n")
+                if recorder.wait_for(token, timeout=10):
+                    samples.append(recorder.seen_at(token) - start)
+            executor.keep_running = False
+            reader.join(timeout=1)
+        connection.client.close()
+        self._record("shell-first-output", "read_from_shell", samples)
+
+    """
+    Método que mide la creación de un túnel local con el cliente ssh del sistema a un servidor de eco local.
+    Se registran dos tiempos: hasta que el túnel reenvía datos y lo que tarda Tunnel.launch() en volver.
+    """
+
+    def _bench_tunnel(self, server):
+        if not shutil.which("ssh"):
+            self.console.print("[yellow]⚠ ssh no está instalado: se omite el túnel[/yellow]")
+            return
+
+        server.authorize_key(self.key_path + ".pub")
+        echo_port = _EchoServer().start()
+        options = ["-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=no",
+                   "-o", "UserKnownHostsFile=/dev/null", "-o", "LogLevel=ERROR"]
+
+        ready, launched = [], []
+        for _ in range(self.args.iterations):
+            local_port = _free_port()
+            command = Tunnel.build_command(server.username, server.host, server.port, self.key_path,
+                                           "-L", f"{local_port}:127.0.0.1:{echo_port}", ssh_options=options)
+            result = {}
+            start = time.perf_counter()
+            thread = threading.Thread(target=lambda: result.update(proc=Tunnel.launch(command),
+                                                                   end=time.perf_counter()))
+            thread.start()
+            if _wait_for_echo(local_port, timeout=10):
+                ready.append(time.perf_counter() - start)
+            thread.join()
+            launched.append(result["end"] - start)
+            result["proc"].terminate()
+            result["proc"].wait()
+        self._record("tunnel-forwarding-ready", "Tunnel", ready)
+        self._record("tunnel-launch-return", "Tunnel.launch", launched)
+
+    def _start_agent(self):
+        if self._agent is None:
+            if not shutil.which("ssh-agent"):
+                return False
+            agent_sock = os.path.join(self.work_dir, "agent.sock")
+            output = subprocess.run(["ssh-agent", "-s", "-a", agent_sock], capture_output=True, text=True).stdout
+            pid = re.search(r"SSH_AGENT_PID=(\d+)", output)
+            if not pid:
+                return False
+            self._agent = int(pid.group(1))
+            os.environ["SSH_AUTH_SOCK"] = agent_sock
+            subprocess.run(["ssh-add", "-q", self.key_path], check=True)
+        return True
+
+    def _stop_agent(self):
+        if self._agent:
+            subprocess.run(["kill", str(self._agent)])
+            self._agent = None
+
+    def _record(self, operation, method, samples):
+        if not samples:
+            return
+        samples_ms = sorted(sample * 1000 for sample in samples)
+        self.results.append({
+            "operation": operation,
+            "method": method,
+            "iterations": len(samples_ms),
+            "min_ms": samples_ms[0],
+            "median_ms": statistics.median(samples_ms),
+            "p95_ms": samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))],
+            "mean_ms": statistics.fmean(samples_ms),
+            "samples_ms": samples_ms,
+        })
+
+
+"""
+Salida estándar falsa que guarda el instante en que aparece cada texto esperado.
+"""
+
+
+class _OutputRecorder:
+
+    def __init__(self):
+        self._buffer = ""
+        self._seen = {}
+        self._cond = threading.Condition()
+
+    def write(self, text):
+        now = time.perf_counter()
+        with self._cond:
+            self._buffer = (self._buffer + text)[-4096:]
+            for token in re.findall(r"M\d+K", self._buffer):
+                self._seen.setdefault(token, now)
+            self._cond.notify_all()
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def wait_for(self, token, timeout):
+        with self._cond:
+            return self._cond.wait_for(lambda: token in self._seen, timeout)
+
+    def seen_at(self, token):
+        return self._seen[token]
+
+
+"""
+Servidor de eco TCP mínimo usado como destino del túnel.
+"""
+
+
+class _EchoServer:
+
+    def start(self):
+        self._sock = socket.socket()
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(16)
+        threading.Thread(target=self._serve, daemon=True).start()
+        return self._sock.getsockname()[1]
+
+    def _serve(self):
+        while True:
+            conn, _ = self._sock.accept()
+            threading.Thread(target=self._echo, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _echo(conn):
+        with conn:
+            for data in iter(lambda: conn.recv(4096), b""):
+                conn.sendall(data)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_echo(port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1) as sock:
+                sock.sendall(b"ping")
+                if sock.recv(4) == b"ping":
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.005)
+    return False
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de conexión, exec, shell y túneles de SSH Tool")
+    parser.add_argument("--output", default="connection_bench.json", help="Archivo JSON de resultados")
+    parser.add_argument("--iterations", type=int, default=10, help="Repeticiones de cada medición")
+    parser.add_argument("--methods", default="password,key,agent,cert",
+                        help="Métodos de autenticación a medir, separados por comas")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latencia simulada en un sentido (ms)")
+    parser.add_argument("--skip-tunnel", action="store_true", help="No medir la creación de túneles")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"], help="Captura un perfil de la ejecución")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    ConnectionBenchmark(parse_args()).run()
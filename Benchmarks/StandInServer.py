@@ -0,0 +1,463 @@
+# Importaciones necesarias de librerías
+import base64
+import os
+import pty
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import paramiko
+from cryptography.hazmat.primitives.serialization import ssh
+# Importaciones necesarias de otras clases
+from Benchmarks.ThrottledSocket import ThrottledSocket
+from Connection.CertificateAuthority import CertificateAuthority
+
+"""
+Clase que levanta un servidor SSH/SFTP local dentro del propio proceso (con paramiko) para medir la herramienta
+sin depender de un servidor real. Escucha en 127.0.0.1 en un puerto libre y ofrece:
+- Autenticación por contraseña, por clave pública y por certificado firmado por una CA de confianza
+- Subsistema SFTP servido desde un directorio raíz temporal
+- Ejecución de comandos (exec) y shell interactiva, ejecutados localmente con el directorio raíz como HOME
+- Canales direct-tcpip (túneles locales y saltos a través de bastión)
+- Enlace simulado con latencia y ancho de banda limitados (ver ThrottledSocket)
+"""
+
+
+class StandInServer:
+    """
+    Constructor de la clase.
+    :param username: Usuario aceptado por el servidor
+    :param password: Contraseña aceptada por el servidor
+    :param root: Directorio raíz del servidor (por defecto uno temporal)
+    :param latency_ms: Latencia simulada en un sentido para lo que envía el servidor
+    :param bandwidth_mbps: Ancho de banda simulado para lo que envía el servidor (None = sin límite)
+    """
+
+    def __init__(self, username="bench", password="bench", root=None, latency_ms=0, bandwidth_mbps=None):
+        self.username = username
+        self.password = password
+        self.root = root or tempfile.mkdtemp(prefix="sshtool-standin-")
+        self.latency_ms = latency_ms
+        self.bandwidth_mbps = bandwidth_mbps
+        self.host_key = paramiko.Ed25519Key.from_private_key_file(self._generate_host_key())
+        self.authorized_keys = set()  # Claves públicas autorizadas (base64)
+        self.trusted_ca_keys = []  # Claves públicas de CA de confianza (líneas OpenSSH)
+        self.host = "127.0.0.1"
+        self.port = None
+        self._listener = None
+        self._transports = []
+        self._running = False
+
+    """
+    Método que empieza a escuchar conexiones en segundo plano. Devuelve la propia instancia.
+    """
+
+    def start(self):
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((self.host, 0))
+        self._listener.listen(128)
+        self.port = self._listener.getsockname()[1]
+        self._running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    """
+    Método que deja de aceptar conexiones y cierra las que sigan abiertas.
+    """
+
+    def stop(self):
+        self._running = False
+        if self._listener:
+            self._listener.close()
+        for transport in self._transports:
+            transport.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    """
+    Método que autoriza una clave pública (ruta de un archivo .pub o línea OpenSSH).
+    """
+
+    def authorize_key(self, pub_key):
+        if os.path.exists(pub_key):
+            with open(pub_key, "r") as f:
+                pub_key = f.read()
+        self.authorized_keys.add(pub_key.split()[1])
+
+    """
+    Método que añade una CA de confianza (ruta de un archivo .pub o línea OpenSSH), como TrustedUserCAKeys.
+    """
+
+    def trust_ca(self, ca_pub):
+        if os.path.exists(ca_pub):
+            with open(ca_pub, "r") as f:
+                ca_pub = f.read()
+        self.trusted_ca_keys.append(" ".join(ca_pub.split()[:2]))
+
+    """
+    Método auxiliar que genera la clave de host del servidor en un archivo temporal.
+    """
+
+    def _generate_host_key(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="sshtool-standin-key-"), "host_key")
+        CertificateAuthority.generate_ca_key(path, comment="standin-host")
+        return path
+
+    """
+    Método auxiliar (hilo) que acepta conexiones y arranca un transporte de servidor por cada una.
+    """
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self.latency_ms or self.bandwidth_mbps:
+                sock = ThrottledSocket(sock, self.latency_ms, self.bandwidth_mbps)
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    """
+    Método auxiliar (hilo) que atiende una conexión: handshake, autenticación y apertura de canales.
+    """
+
+    def _serve(self, sock):
+        transport = paramiko.Transport(sock)
+        self._transports.append(transport)
+        transport.add_server_key(self.host_key)
+        transport.set_subsystem_handler("sftp", _StandInSFTPServer, _StandInSFTP, root=self.root)
+        interface = _StandInInterface(self)
+        try:
+            transport.start_server(server=interface)
+        except (paramiko.SSHException, EOFError, OSError):
+            return
+
+        # paramiko solo guarda referencias débiles a los canales: se conservan aquí para que un canal aceptado
+        # no se cierre (al recolectarse) antes de recibir su petición de subsistema o de comando
+        channels = []
+        while transport.is_active():
+            channel = transport.accept(timeout=1)
+            if channel is None:
+                continue
+            channels = [open_channel for open_channel in channels if not open_channel.closed] + [channel]
+            destination = interface.direct_tcpip.pop(channel.get_id(), None)
+            if destination:
+                threading.Thread(target=self._relay, args=(channel, destination), daemon=True).start()
+
+    """
+    Método auxiliar (hilo) que ejecuta un comando localmente y conecta su entrada/salida con el canal SSH.
+    Si el cliente pidió un PTY, el comando se ejecuta sobre un pseudoterminal (como haría sshd).
+    """
+
+    def run_command(self, channel, command, use_pty):
+        env = dict(os.environ, HOME=self.root)
+        argv = ["/bin/sh", "-c", command] if command else ["/bin/sh", "-i"]
+
+        if use_pty:
+            master, slave = pty.openpty()
+            process = subprocess.Popen(argv, cwd=self.root, env=env, stdin=slave, stdout=slave, stderr=slave,
+                                       start_new_session=True)
+            os.close(slave)
+            threading.Thread(target=self._pump_input, args=(channel, lambda data: os.write(master, data),
+                                                            lambda: None), daemon=True).start()
+            while True:
+                try:
+                    data = os.read(master, 32768)
+                except OSError:
+                    break
+                if not data:
+                    break
+                channel.sendall(data)
+            os.close(master)
+        else:
+            process = subprocess.Popen(argv, cwd=self.root, env=env, stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+            def write(data):
+                process.stdin.write(data)
+                process.stdin.flush()
+
+            threading.Thread(target=self._pump_input, args=(channel, write, process.stdin.close),
+                             daemon=True).start()
+            stderr_thread = threading.Thread(
+                target=self._pump_output, args=(process.stderr, channel.sendall_stderr), daemon=True)
+            stderr_thread.start()
+            self._pump_output(process.stdout, channel.sendall)
+            stderr_thread.join()
+
+        channel.send_exit_status(process.wait())
+        channel.close()
+
+    """
+    Métodos auxiliares que copian datos entre el canal SSH y el proceso local o un socket.
+    """
+
+    @staticmethod
+    def _pump_input(channel, write, close):
+        try:
+            while True:
+                data = channel.recv(32768)
+                if not data:
+                    break
+                write(data)
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _pump_output(stream, send):
+        for data in iter(lambda: stream.read1(32768), b""):
+            send(data)
+
+    @staticmethod
+    def _relay(channel, destination):
+        try:
+            sock = socket.create_connection(destination, timeout=10)
+        except OSError:
+            channel.close()
+            return
+
+        def forward(read, write):
+            try:
+                for data in iter(lambda: read(32768), b""):
+                    write(data)
+            except OSError:
+                pass
+            finally:
+                channel.close()
+                sock.close()
+
+        threading.Thread(target=forward, args=(sock.recv, channel.sendall), daemon=True).start()
+        forward(channel.recv, sock.sendall)
+
+
+"""
+Interfaz de servidor de paramiko: decide qué autenticaciones y canales se aceptan.
+"""
+
+
+class _StandInInterface(paramiko.ServerInterface):
+
+    def __init__(self, server):
+        self.server = server
+        self.pty_channels = set()
+        self.direct_tcpip = {}  # id de canal -> (host, puerto) de destino
+
+    def get_allowed_auths(self, username):
+        return "password,publickey"
+
+    def check_auth_password(self, username, password):
+        if username == self.server.username and password == self.server.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_auth_publickey(self, username, key):
+        if username != self.server.username:
+            return paramiko.AUTH_FAILED
+        blob = key.public_blob
+        if blob is not None and blob.key_type.endswith("-cert-v01@openssh.com"):
+            return self._check_certificate(username, blob)
+        if key.get_base64() in self.server.authorized_keys:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def _check_certificate(self, username, blob):
+        try:
+            cert = ssh.load_ssh_public_identity(
+                blob.key_type.encode() + b" " + base64.b64encode(blob.key_blob))
+            cert.verify_cert_signature()
+        except Exception:
+            return paramiko.AUTH_FAILED
+        ca_line = cert.signature_key().public_bytes(
+            ssh.Encoding.OpenSSH, ssh.PublicFormat.OpenSSH).decode()
+        now = time.time()
+        if (ca_line in self.server.trusted_ca_keys and cert.valid_after <= now < cert.valid_before
+                and username.encode() in cert.valid_principals):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_direct_tcpip_request(self, chanid, origin, destination):
+        self.direct_tcpip[chanid] = destination
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        self.pty_channels.add(channel.get_id())
+        return True
+
+    def check_channel_shell_request(self, channel):
+        threading.Thread(target=self.server.run_command, args=(channel, None, True), daemon=True).start()
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        use_pty = channel.get_id() in self.pty_channels
+        threading.Thread(target=self.server.run_command, args=(channel, command.decode(), use_pty),
+                         daemon=True).start()
+        return True
+
+    def check_channel_env_request(self, channel, name, value):
+        return True
+
+    def check_global_request(self, kind, msg):
+        # keepalive@openssh.com y similares
+        return True
+
+
+"""
+Subsistema SFTP que, como sshd, envía el código de salida al terminar (el cliente scp lo necesita).
+"""
+
+
+class _StandInSFTPServer(paramiko.SFTPServer):
+
+    def finish_subsystem(self):
+        try:
+            self.sock.send_exit_status(0)
+        except (OSError, EOFError):
+            pass
+        super().finish_subsystem()
+
+
+"""
+Implementación del subsistema SFTP sobre un directorio local (todas las rutas se resuelven dentro de la raíz).
+"""
+
+
+class _StandInHandle(paramiko.SFTPHandle):
+
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def chattr(self, attr):
+        return paramiko.SFTP_OK
+
+
+class _StandInSFTP(paramiko.SFTPServerInterface):
+
+    def __init__(self, server, *args, root=None, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.root = root
+
+    def _local(self, path):
+        path = self.canonicalize(path)
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def canonicalize(self, path):
+        if not path.startswith("/"):
+            path = "/" + path
+        return os.path.normpath(path)
+
+    def list_folder(self, path):
+        local = self._local(path)
+        try:
+            result = []
+            for name in os.listdir(local):
+                attr = paramiko.SFTPAttributes.from_stat(os.lstat(os.path.join(local, name)))
+                attr.filename = name
+                result.append(attr)
+            return result
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def lstat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.lstat(self._local(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def open(self, path, flags, attr):
+        local = self._local(path)
+        try:
+            mode = getattr(attr, "st_mode", None) or 0o644
+            fd = os.open(local, flags, mode)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+        if flags & os.O_WRONLY:
+            fstr = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            fstr = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            fstr = "rb"
+        handle = _StandInHandle(flags)
+        handle.filename = local
+        handle.readfile = handle.writefile = os.fdopen(fd, fstr)
+        return handle
+
+    def remove(self, path):
+        try:
+            os.remove(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def rename(self, oldpath, newpath):
+        try:
+            os.rename(self._local(oldpath), self._local(newpath))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def posix_rename(self, oldpath, newpath):
+        return self.rename(oldpath, newpath)
+
+    def mkdir(self, path, attr):
+        try:
+            os.mkdir(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def rmdir(self, path):
+        try:
+            os.rmdir(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def chattr(self, path, attr):
+        try:
+            if attr.st_mode is not None:
+                os.chmod(self._local(path), attr.st_mode)
+            if attr.st_atime is not None and attr.st_mtime is not None:
+                os.utime(self._local(path), (attr.st_atime, attr.st_mtime))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def symlink(self, target_path, path):
+        try:
+            os.symlink(target_path, self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def readlink(self, path):
+        try:
+            return os.readlink(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
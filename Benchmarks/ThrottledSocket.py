@@ -0,0 +1,91 @@
+# Importaciones necesarias de librerías
+import heapq
+import threading
+import time
+
+"""
+Clase que envuelve un socket para simular un enlace con latencia y ancho de banda limitados.
+Solo se retrasa el envío: lo que se escribe se encola y un hilo lo entrega al socket real cuando corresponde
+(tiempo de serialización según el ancho de banda + latencia en un sentido). Así la latencia no convierte el
+enlace en "enviar y esperar": igual que en una red real, pueden viajar muchos datos a la vez.
+Para un enlace simétrico se envuelven los dos extremos (cliente y servidor).
+"""
+
+
+class ThrottledSocket:
+    """
+    Constructor de la clase.
+    :param sock: Socket real
+    :param latency_ms: Latencia en un sentido (milisegundos)
+    :param bandwidth_mbps: Ancho de banda en megabits por segundo (None = sin límite)
+    """
+
+    def __init__(self, sock, latency_ms=0, bandwidth_mbps=None):
+        self._sock = sock
+        self.latency = latency_ms / 1000.0
+        self.bytes_per_second = bandwidth_mbps * 125000 if bandwidth_mbps else None
+        self._queue = []  # Montículo de (instante_de_entrega, orden, datos)
+        self._counter = 0
+        self._link_free_at = time.monotonic()  # Instante en que el enlace termina de serializar lo ya enviado
+        self._cond = threading.Condition()
+        self._closed = False
+        self._sender = threading.Thread(target=self._deliver, daemon=True)
+        self._sender.start()
+
+    def send(self, data):
+        data = bytes(data)
+        with self._cond:
+            now = time.monotonic()
+            start = max(now, self._link_free_at)
+            if self.bytes_per_second:
+                self._link_free_at = start + len(data) / self.bytes_per_second
+            else:
+                self._link_free_at = start
+            heapq.heappush(self._queue, (self._link_free_at + self.latency, self._counter, data))
+            self._counter += 1
+            self._cond.notify()
+        # Si la cola acumula más de un segundo de datos se frena al emisor (como un búfer de red lleno)
+        backlog = self._link_free_at - time.monotonic()
+        if backlog > 1:
+            time.sleep(backlog - 1)
+        return len(data)
+
+    def sendall(self, data):
+        self.send(data)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._sender.join(timeout=5)
+        self._sock.close()
+
+    """
+    El resto de operaciones (recv, settimeout, fileno, getpeername...) se delegan en el socket real.
+    """
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+    """
+    Método auxiliar (hilo de entrega) que escribe los datos en el socket real cuando vence su instante de entrega.
+    Al cerrar, se entrega lo que quede en cola antes de cerrar el socket.
+    """
+
+    def _deliver(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                deliver_at = self._queue[0][0]
+                wait = deliver_at - time.monotonic()
+                if wait > 0 and not self._closed:
+                    self._cond.wait(wait)
+                    continue
+                _, _, data = heapq.heappop(self._queue)
+            try:
+                self._sock.sendall(data)
+            except OSError:
+                return
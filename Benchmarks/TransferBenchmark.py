@@ -0,0 +1,196 @@
+# Importaciones necesarias de librerías
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+from rich.console import Console
+# Importaciones necesarias de otras clases
+from Benchmarks.BenchmarkSupport import BenchmarkSupport
+from Benchmarks.StandInServer import StandInServer
+from Commands.FileTransferCommand import FileTransferCommand
+from Connection.TransportProfile import TransportProfile
+
+"""
+Benchmark de transferencias de FileTransferCommand contra un servidor SSH/SFTP local (StandInServer).
+Mide el rendimiento y la latencia de:
+- Un archivo grande (subida y descarga)
+- Muchos archivos pequeños (subida)
+- SFTP frente a SCP (cliente scp del sistema, en modo SFTP y en modo legado con -O)
+- Cada perfil de transporte y, opcionalmente, una rejilla de tamaños de petición y de ventana
+El enlace se puede simular con latencia y ancho de banda limitados. Los resultados se guardan en JSON.
+
+Uso (desde la raíz del proyecto):
+  python3 -m Benchmarks.TransferBenchmark --output transfer_bench.json --latency-ms 20 --bandwidth-mbps 100
+"""
+
+
+class TransferBenchmark:
+
+    def __init__(self, args):
+        self.args = args
+        self.console = Console()
+        self.work_dir = tempfile.mkdtemp(prefix="sshtool-bench-")
+        self.results = []
+
+    """
+    Método principal que levanta el servidor, ejecuta todos los escenarios y guarda los resultados.
+    """
+
+    def run(self):
+        large_file = self._make_file("large.bin", self.args.large_mb * 1024 * 1024)
+        small_dir = os.path.join(self.work_dir, "small")
+        os.makedirs(small_dir)
+        small_files = [
+            self._make_file(os.path.join("small", f"f{i:05d}.bin"), self.args.small_kb * 1024)
+            for i in range(self.args.small_count)
+        ]
+
+        server = StandInServer(latency_ms=self.args.latency_ms, bandwidth_mbps=self.args.bandwidth_mbps)
+        with server:
+            os.makedirs(os.path.join(server.root, "small"))
+            with BenchmarkSupport.profiled(self.args.profile, os.path.join(self.work_dir, "transfer")):
+                for profile in self._profiles():
+                    self._bench_sftp(server, profile, large_file, small_files)
+                if not self.args.skip_scp:
+                    self._bench_scp(server, large_file)
+
+        settings = {key: value for key, value in vars(self.args).items() if key != "output"}
+        BenchmarkSupport.write_results(self.args.output, "transfer", settings, self.results)
+        BenchmarkSupport.print_table(
+            "Transferencias", self.results,
+            ["scenario", "protocol", "profile", "files", "bytes", "seconds", "mb_per_s", "ms_per_file"])
+        self.console.print(f"[green]✔ Resultados guardados en:[/green] {self.args.output}")
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    """
+    Método que mide SFTP con un perfil: subida y descarga del archivo grande y subida de muchos archivos pequeños.
+    Se usa FileTransferCommand.transfer_file_sftp(), el mismo método que emplea el menú de la herramienta.
+    """
+
+    def _bench_sftp(self, server, profile, large_file, small_files):
+        connection = BenchmarkSupport.connect(server, profile, self.args.latency_ms, self.args.bandwidth_mbps)
+        command = FileTransferCommand(connection.client, server.host, server.username, server.port, profile)
+        command.console = Console(quiet=True)
+        # Todos los perfiles suben los mismos archivos a las mismas rutas: sin esto, a partir del segundo perfil las
+        # subidas se omitirían por tener el mismo contenido y se mediría solo la comparación de hashes
+        command.skip_identical = False
+        command.sftp = command.profile.open_sftp(connection.client)
+
+        seconds, _ = BenchmarkSupport.timed(self._transfer, command, "put", large_file, "large.bin")
+        self._record("large-file-put", "sftp", profile, 1, os.path.getsize(large_file), seconds)
+
+        download = os.path.join(self.work_dir, "large.download")
+        seconds, _ = BenchmarkSupport.timed(self._transfer, command, "get", "large.bin", download)
+        self._record("large-file-get", "sftp", profile, 1, os.path.getsize(download), seconds)
+        os.remove(download)
+
+        def put_small_files():
+            for path in small_files:
+                self._transfer(command, "put", path, "small/" + os.path.basename(path))
+
+        seconds, _ = BenchmarkSupport.timed(put_small_files)
+        self._record("small-files-put", "sftp", profile, len(small_files),
+                     sum(os.path.getsize(path) for path in small_files), seconds)
+
+        command.sftp.close()
+        connection.client.close()
+
+    """
+    Método auxiliar que transfiere un archivo con transfer_file_sftp() y lanza una excepción si falla: el método
+    captura los errores y devuelve False, y una transferencia fallida no debe contarse como una medida (rápida).
+    """
+
+    @staticmethod
+    def _transfer(command, sftp_method, src, dest):
+        if not command.transfer_file_sftp(sftp_method, src, dest):
+            raise RuntimeError(f"Falló la transferencia SFTP ({sftp_method} {src} -> {dest})")
+
+    """
+    Método que mide el cliente scp del sistema con el comando que construye FileTransferCommand.
+    Se autoriza una clave temporal en el servidor para que scp no pida contraseña.
+    """
+
+    def _bench_scp(self, server, large_file):
+        if not shutil.which("scp"):
+            self.console.print("[yellow]⚠ scp no está instalado: se omiten los escenarios SCP[/yellow]")
+            return
+
+        key_path = os.path.join(self.work_dir, "bench_key")
+        subprocess.run(["ssh-keygen", "-q", "-t", "ed25519", "-f", key_path, "-N", ""], check=True)
+        server.authorize_key(key_path + ".pub")
+
+        command = FileTransferCommand(None, server.host, server.username, server.port)
+        options = ["-q", "-i", key_path, "-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=no",
+                   "-o", "UserKnownHostsFile=/dev/null", "-o", "LogLevel=ERROR"]
+        download = os.path.join(self.work_dir, "large.scp")
+
+        for mode, extra in (("scp", []), ("scp-legacy", ["-O"])):
+            for scenario, action, local, remote in (("large-file-put", "subir", large_file, "large.scp"),
+                                                    ("large-file-get", "descargar", download, "large.scp")):
+                scp_cmd = command.build_scp_command(action, local, remote)
+                scp_cmd[1:1] = options + extra
+                seconds, _ = BenchmarkSupport.timed(subprocess.run, scp_cmd, check=True)
+                self._record(scenario, mode, None, 1, os.path.getsize(large_file), seconds)
+
+    """
+    Método que devuelve los perfiles a medir: los indicados por el usuario y, si se pide, una rejilla de
+    tamaños de petición SFTP y de ventana.
+    """
+
+    def _profiles(self):
+        profiles = [TransportProfile.by_name(name) for name in self.args.profiles.split(",")]
+        if self.args.request_sizes or self.args.window_sizes:
+            request_sizes = [int(size) for size in (self.args.request_sizes or "32768").split(",")]
+            window_sizes = [int(size) for size in (self.args.window_sizes or "2097152").split(",")]
+            for request_size in request_sizes:
+                for window_size in window_sizes:
+                    profiles.append(TransportProfile(
+                        f"req{request_size}-win{window_size}",
+                        window_size=window_size,
+                        sftp_request_size=request_size,
+                    ))
+        return profiles
+
+    def _make_file(self, name, size):
+        path = os.path.join(self.work_dir, name)
+        with open(path, "wb") as f:
+            remaining = size
+            while remaining > 0:
+                chunk = os.urandom(min(remaining, 1024 * 1024))
+                f.write(chunk)
+                remaining -= len(chunk)
+        return path
+
+    def _record(self, scenario, protocol, profile, files, total_bytes, seconds):
+        self.results.append({
+            "scenario": scenario,
+            "protocol": protocol,
+            "profile": profile.name if profile else None,
+            "files": files,
+            "bytes": total_bytes,
+            "seconds": seconds,
+            "mb_per_s": total_bytes / seconds / 1e6 if seconds else None,
+            "ms_per_file": seconds * 1000 / files,
+        })
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de transferencias SFTP/SCP de SSH Tool")
+    parser.add_argument("--output", default="transfer_bench.json", help="Archivo JSON de resultados")
+    parser.add_argument("--large-mb", type=int, default=64, help="Tamaño del archivo grande (MB)")
+    parser.add_argument("--small-count", type=int, default=200, help="Número de archivos pequeños")
+    parser.add_argument("--small-kb", type=int, default=4, help="Tamaño de cada archivo pequeño (KB)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latencia simulada en un sentido (ms)")
+    parser.add_argument("--bandwidth-mbps", type=float, default=None, help="Ancho de banda simulado (Mbit/s)")
+    parser.add_argument("--profiles", default=",".join(TransportProfile.names()),
+                        help="Perfiles de transporte a medir, separados por comas")
+    parser.add_argument("--request-sizes", help="Rejilla de tamaños de petición SFTP (bytes, separados por comas)")
+    parser.add_argument("--window-sizes", help="Rejilla de tamaños de ventana (bytes, separados por comas)")
+    parser.add_argument("--skip-scp", action="store_true", help="No medir el cliente scp del sistema")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"], help="Captura un perfil de la ejecución")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    TransferBenchmark(parse_args()).run()
@@ -1,27 +1,59 @@
 # Importaciones necesarias de librerías
+import codecs
+import os
+import socket
+import sys
 import threading
 import time
 from rich.console import Console
+from rich.markup import escape
 from rich.panel import Panel
+from rich.prompt import Prompt
 from rich.text import Text
 from rich.rule import Rule
+# Importaciones necesarias de otras clases
+from Commands.Scrollback import Scrollback
+from Commands.SessionRecorder import SessionRecorder
+from Connection.BandwidthLimiter import BandwidthLimiter
 
 """
 Clase que gestiona una terminal interactiva para ejecutar comandos remotos a través de una conexión SSH (previamente 
 realizada). Utiliza un shell interactivo creado anteriormente mediante la librería paramiko.
+La salida se guarda en un historial acotado (Scrollback) en el que se puede buscar con "::buscar <regex>", y se
+muestra como mucho cada RENDER_INTERVAL segundos: si un comando escribe más de MAX_BURST bytes entre dos
+actualizaciones, solo se muestran las últimas líneas y se indica cuánto se ha omitido (sigue en el historial).
 """
 
 
 class CommandsExecutorCommand:
+    # Tamaño del historial de salida en MB (se puede cambiar con la variable SSHTOOL_SCROLLBACK_MB)
+    SCROLLBACK_MB = 100
+    # Tiempo mínimo (segundos) entre dos actualizaciones de la pantalla
+    RENDER_INTERVAL = 0.05
+    # Bytes como máximo que se muestran en cada actualización; de una ráfaga mayor solo se muestra el final
+    MAX_BURST = 64 * 1024
+    # Prefijo de las órdenes que atiende la propia herramienta (no se envían al servidor)
+    LOCAL_PREFIX = "::"
+
     """
     Constructor de la clase que inicializa la terminal con el shell SSH proporcionado.
     :param ssh_shell: Canal interactivo de la sesión SSH (obtenido con invoke_shell())
+    :param host: Servidor de la sesión (se usa para nombrar la grabación)
+    :param connection: SSHConnection del shell; si se indica, cuando la conexión se pierde se reconecta y la
+                       terminal sigue con el shell nuevo
     """
 
-    def __init__(self, ssh_shell):
+    def __init__(self, ssh_shell, host="servidor", connection=None):
         self.shell = ssh_shell
+        self.host = host
+        self.connection = connection
+        # Lo que se escribe cuenta para los límites de velocidad, pero con prioridad sobre las transferencias
+        self.flow = BandwidthLimiter.default().flow(host, "interactivo")
         self.console = Console()
         self.keep_running = True  # Controla cuándo se debe cerrar la terminal
+        self.recorder = None  # SessionRecorder si la sesión se está grabando
+        megabytes = float(os.environ.get("SSHTOOL_SCROLLBACK_MB", self.SCROLLBACK_MB))
+        self.scrollback = Scrollback(int(megabytes * 1024 * 1024))
 
     """
     Método principal de la clase que ejecuta la terminal interactiva SSH.
@@ -30,11 +62,17 @@ class CommandsExecutorCommand:
     """
 
     def run(self):
+        # Con SSHTOOL_RECORD definida (ej: para auditorías) todas las sesiones se graban sin preguntar
+        if os.environ.get("SSHTOOL_RECORD") or Prompt.ask(
+                "[ ] ¿Grabar la sesión?", choices=["si", "no"], default="no") == "si":
+            self.recorder = SessionRecorder(self.host, width=self.console.width, height=self.console.height)
+
         self.console.clear()  # Limpia la consola y muestra un panel de bienvenida
         self.console.print(Panel.fit(
             Text.from_markup(
                 "[bold cyan]🔧 Terminal interactiva SSH[/bold cyan]\n[i]Puedes ejecutar comandos como en una terminal real[/i]\n\n"
-                "[dim]Escribe 'exit' o presiona Ctrl+C para salir[/dim]"
+                "[dim]Escribe 'exit' o presiona Ctrl+C para salir[/dim]\n"
+                "[dim]Escribe '::buscar <expresión regular>' para buscar en la salida anterior[/dim]"
             ),
             title="[bold green]Modo comandos remotos[/bold green]",
             subtitle="SSH Tool",
@@ -54,30 +92,111 @@ class CommandsExecutorCommand:
             # Bucle principal de la terminal: espera comandos del usuario
             while self.keep_running:
                 user_input = input()  # Espera entrada del usuario
+                if self.recorder:
+                    self.recorder.input(user_input + "\n")
                 if user_input.strip().lower() == "exit":  # Termina la sesión si se escribe "exit"
                     self.keep_running = False
                     break
-                self.shell.send(user_input + "\n")  # Envía el comando al servidor
+                if user_input.startswith(self.LOCAL_PREFIX):  # Orden de la herramienta (ej: buscar en el historial)
+                    self.run_local_command(user_input[len(self.LOCAL_PREFIX):].strip())
+                    continue
+                self.flow.throttle(len(user_input) + 1)
+                try:
+                    self.shell.send(user_input + "\n")  # Envía el comando al servidor
+                except OSError:
+                    # Shell cerrado: si la conexión se ha perdido se reconecta y se envía por el shell nuevo
+                    if not self.recover_shell():
+                        self.console.print("[bold red]✖ La conexión se ha cerrado[/bold red]")
+                        break
+                    self.shell.send(user_input + "\n")
         except KeyboardInterrupt:  # Si el usuario presiona Ctrl+C, también se detiene la terminal
             self.keep_running = False
         finally:
+            thread.join(timeout=1)  # El hilo lector termina en como mucho RENDER_INTERVAL segundos
             self.console.print()  # Mensaje de despedida visual al salir
             self.console.print(Panel("[cyan]🔚 Sesión SSH finalizada[/cyan]", border_style="cyan"))
+            if self.recorder:
+                self.recorder.close()
+                self.console.print(f"[green]✔ Sesión grabada en {self.recorder.path}[/green]")
+
+    """
+    Método que atiende las órdenes de la propia herramienta escritas con el prefijo "::".
+    - buscar <expresión regular>: muestra las líneas del historial que coinciden (las más recientes al final)
+    """
+
+    def run_local_command(self, command):
+        name, _, argument = command.partition(" ")
+        if name != "buscar" or not argument:
+            self.console.print("[yellow]⚠ Uso: ::buscar <expresión regular>[/yellow]")
+            return
+        try:
+            lines = self.scrollback.search(argument)
+        except Exception as e:
+            self.console.print(f"[red]✖ Expresión no válida: {e}[/red]")
+            return
+        self.console.print(Rule(f"[cyan]🔎 {len(lines)} coincidencias en los últimos "
+                                f"{len(self.scrollback) / 1048576:.1f} MB[/cyan]"))
+        for line in lines:
+            self.console.print(escape(line), highlight=False)
+        self.console.print(Rule())
+
+    """
+    Método que pasa al shell nuevo de la conexión si el actual se cerró porque la conexión se perdió (ver
+    SSHConnection.recover). Devuelve False si no hay conexión que recuperar.
+    """
+
+    def recover_shell(self):
+        if self.connection is None or not self.connection.recover(self.shell):
+            return False
+        self.shell = self.connection.shell
+        self.shell.settimeout(self.RENDER_INTERVAL)
+        return True
 
     """
     Método que lee continuamente la salida del servidor a través del shell SSH.
-    Imprime en pantalla todo lo que llegue como respuesta a los comandos ejecutados.
+    Guarda todo lo que llega en el historial (y en la grabación, si la hay) y lo muestra en pantalla como mucho cada
+    RENDER_INTERVAL segundos. Si entre dos actualizaciones llegan más de MAX_BURST bytes, solo se muestra el final
+    (a partir de un salto de línea) y un aviso con lo omitido, de modo que un comando desbocado no inunda la terminal.
     Se ejecuta en un hilo separado para no bloquear la entrada del usuario.
     """
 
     def read_from_shell(self):
+        # La lectura espera datos como mucho RENDER_INTERVAL segundos, así que no hace falta dormir entre lecturas
+        self.shell.settimeout(self.RENDER_INTERVAL)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        pending = bytearray()  # Salida recibida que todavía no se ha mostrado
+        skipped = 0
+        last_render = 0.0
         while self.keep_running:
-            if self.shell.recv_ready():  # Comprueba si hay datos disponibles para leer
-                """
-                Lee lo que responde el servidor
-                (Lee hasta 1024 bytes y convierte los bytes recibidos a una cadena de texto legible.
-                Si hay caracteres que no se pueden decodificar correctamente los ignora).
-                """
-                output = self.shell.recv(1024).decode("utf-8", errors="ignore")  # Guarda la respuesta para mostrarla
-                print(output, end='', flush=True)  # Imprime la salida directamente en consola
-            time.sleep(0.1)  # Pequeña pausa para evitar uso excesivo de CPU
+            try:
+                data = self.shell.recv(32768)
+                if not data:  # El shell se ha cerrado: se sigue solo si era porque se perdió la conexión
+                    if self.keep_running and self.recover_shell():
+                        continue
+                    break
+            except socket.timeout:
+                data = b""
+            if data:
+                self.scrollback.append(data)
+                if self.recorder:
+                    self.recorder.output(data)  # Se graban los bytes recibidos, tal como llegan
+                pending += data
+                if len(pending) > self.MAX_BURST:
+                    skipped += len(pending) - self.MAX_BURST
+                    del pending[:-self.MAX_BURST]
+
+            now = time.monotonic()
+            if pending and now - last_render >= self.RENDER_INTERVAL:
+                if skipped:
+                    # Se empieza en una línea completa para no mostrar media secuencia de escape o medio carácter
+                    newline = pending.find(b"\n")
+                    skipped += newline + 1
+                    del pending[:newline + 1]
+                    decoder.reset()
+                    self.console.print(f"\n[yellow]⚠ {skipped / 1024:.0f} KB de salida omitidos "
+                                       f"(use ::buscar para consultarlos)[/yellow]")
+                    skipped = 0
+                sys.stdout.write(decoder.decode(bytes(pending)))  # Imprime la salida directamente en consola
+                sys.stdout.flush()
+                pending.clear()
+                last_render = now
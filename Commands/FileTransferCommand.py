@@ -1,9 +1,20 @@
 # Importaciones necesarias de librerías
+import glob
 import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+import pexpect
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.panel import Panel
-import subprocess
+# Importaciones necesarias de otras clases
+from Commands.RemoteBrowser import RemoteBrowser
+from Commands.RemoteCopyCommand import RemoteCopyCommand
+from Commands.TransferDedup import TransferDedup
+from Commands.TransferProgress import TransferProgress
+from Connection.BandwidthLimiter import BandwidthLimiter
+from Connection.TransportProfile import TransportProfile
+from Instrumentation.Metrics import Metrics
 
 """
 Clase encargada de controlar la transferencia de archivos mediante SFTP o SCP sobre una conexión SSH que ya existe.
@@ -12,11 +23,15 @@ Permite al usuario subir o descargar archivos.
 
 
 class FileTransferCommand:
+    # Número máximo de archivos que se suben a la vez (cada uno con su propia sesión SFTP)
+    MAX_PARALLEL_TRANSFERS = 4
+
     """
     Constructor que inicializa la clase con el cliente SSH proporcionado.
+    :param profile: Perfil de transporte de la conexión (se puede cambiar para cada transferencia SFTP)
     """
 
-    def __init__(self, ssh_client, host, username, port):
+    def __init__(self, ssh_client, host, username, port, profile="default"):
 
         self.client = ssh_client
         self.console = Console()
@@ -24,6 +39,14 @@ class FileTransferCommand:
         self.host = host
         self.username = username
         self.port = port
+        self.profile = TransportProfile.by_name(profile)
+        # Si es True, las subidas SFTP omiten los archivos que ya están en el servidor con el mismo contenido
+        self.skip_identical = True
+        self.dedup = TransferDedup.default()
+        self.server_id = f"{username}@{host}:{port}"  # Identifica el servidor en el índice de TransferDedup
+        # Límites de velocidad (SSHTOOL_BWLIMIT) y límite propio de las transferencias de este comando (bytes/s)
+        self.limiter = BandwidthLimiter.default()
+        self.rate_limit = None
 
     """
     Método principal de la clase que muestra el menú de transferencia de archivos (subir/descargar).
@@ -36,13 +59,26 @@ class FileTransferCommand:
         # Pregunta qué acción desea hacer el usuario
         action = Prompt.ask(
             "[ ] ¿Qué desea hacer?",
-            choices=["subir", "descargar", "volver"],
+            choices=["subir", "descargar", "distribuir", "copiar-a-servidor", "volver"],
             default="subir"
         )
 
         if action == "volver":
             return
 
+        # Copia de este servidor a otro sin pasar los datos por el disco local (ver RemoteCopyCommand)
+        if action == "copiar-a-servidor":
+            RemoteCopyCommand(self.client, self.host, self.username, self.port, self.profile.name).run()
+            return
+
+        # Sube un archivo a este servidor y lo reenvía desde él a otros (ver distribute)
+        if action == "distribuir":
+            try:
+                self.distribute()
+            except Exception as e:
+                self.console.print(f"[bold red]✖ Error durante la distribución: {e}[/bold red]")
+            return
+
         # Pregunta qué protocolo quiere utilizar para la transferencia
         protocol = Prompt.ask(
             "[ ] ¿Qué protocolo desea utilizar?",
@@ -50,6 +86,20 @@ class FileTransferCommand:
             default="sftp"
         )
 
+        # En SFTP se puede elegir un perfil distinto para esta transferencia (ventana, paquetes, peticiones)
+        if protocol == "sftp":
+            self.profile = TransportProfile.by_name(Prompt.ask(
+                "[📶] Perfil de transferencia",
+                choices=TransportProfile.names(),
+                default=self.profile.name
+            ))
+            if action == "subir":
+                self.skip_identical = Prompt.ask("[ ] ¿Omitir los archivos que ya están iguales en el servidor?",
+                                                 choices=["si", "no"], default="si") == "si"
+        # Límite de velocidad de cada archivo, además de los de SSHTOOL_BWLIMIT (por servidor y global)
+        self.rate_limit = BandwidthLimiter.parse_rate(
+            Prompt.ask("[🚦] Límite de velocidad por archivo (ej: 512K, 5M; vacío = sin límite)", default=""))
+
         try:
             if protocol == "sftp":
                 self.transfer_by_sftp(action)
@@ -60,26 +110,49 @@ class FileTransferCommand:
 
     """
         Método que pregunta las rutas de origen y destino según la acción seleccionada por el usuario usando el 
-        protocolo SFTP.
+        protocolo SFTP. Las rutas remotas se autocompletan con Tab y se comprueban con los metadatos en caché
+        de RemoteBrowser (sin adivinar si son directorios).
     """
 
     def transfer_by_sftp(self, action):
-        # Abre sesión SFTP sobre el cliente SSH
-        self.sftp = self.client.open_sftp()
+        # Abre sesión SFTP sobre el cliente SSH con la ventana y el tamaño de paquete del perfil
+        self.sftp = self.profile.open_sftp(self.client)
+        browser = RemoteBrowser(self.sftp, (self.username, self.host, self.port), self.console)
+        try:
+            self._transfer_by_sftp(action, browser)
+        finally:
+            # Cierra sesión SFTP
+            browser.close()
+            self.sftp.close()
 
+    def _transfer_by_sftp(self, action, browser):
         if action == "subir":  # Si el usuario decide subir un archivo al servidor remoto
-            local_path = Prompt.ask("[📁] Ruta del archivo local")
-            remote_path = Prompt.ask("[🗂️] Ruta destino en el servidor")
+            local_path = Prompt.ask("[📁] Ruta del archivo local (admite comodines, ej: logs/*.gz)")
+            remote_path = browser.ask_path("[🗂️] Ruta destino en el servidor")
 
-            # Si el destino parece ser un directorio, se añade el nombre del archivo automáticamente
-            if remote_path.endswith("/") or "." not in os.path.basename(remote_path):
+            # Si la ruta local tiene comodines y coincide con varios archivos, se suben en paralelo al directorio
+            local_paths = sorted(path for path in glob.glob(os.path.expanduser(local_path)) if os.path.isfile(path))
+            if len(local_paths) > 1:
+                pairs = [(path, os.path.join(remote_path, os.path.basename(path)).replace("\\", "/"))
+                         for path in local_paths]
+                self.transfer_many_sftp("put", pairs)
+                for _, remote_file in pairs:
+                    browser.invalidate(remote_file)
+                return
+
+            # Si el destino es un directorio, se añade el nombre del archivo automáticamente
+            if remote_path.endswith("/") or browser.is_dir(remote_path):
                 filename = os.path.basename(local_path)
                 remote_path = os.path.join(remote_path, filename).replace("\\", "/")
 
             self.transfer_file_sftp("put", local_path, remote_path)
+            browser.invalidate(remote_path)
 
         elif action == "descargar":  # Si el usuario quiere descargar en local un archivo que está en el servidor
-            remote_path = Prompt.ask("[🗂️] Ruta del archivo en el servidor")
+            remote_path = browser.ask_path("[🗂️] Ruta del archivo en el servidor (un directorio permite explorarlo)")
+            # Si se indica un directorio se muestra su contenido para elegir el archivo
+            if browser.is_dir(remote_path):
+                remote_path = browser.browse(remote_path)
             local_path = Prompt.ask("[📁] Ruta destino en tu equipo")
 
             # Si el destino es un directorio, se añade el nombre del archivo del servidor
@@ -89,52 +162,234 @@ class FileTransferCommand:
 
             self.transfer_file_sftp("get", remote_path, local_path)
 
-        # Cierra sesión SFTP
-        self.sftp.close()
+    """
+    Método que sube un archivo a varios servidores enviándolo una sola vez desde este equipo: primero se sube a este
+    servidor y desde él se reenvía a los demás con scp de servidor a servidor (ver RemoteCopyCommand, modo directo).
+    Los servidores que ya tienen el archivo con el mismo contenido se omiten (ver TransferDedup).
+    """
+
+    def distribute(self):
+        from Connection.SSHConnection import SSHConnection
+
+        local_path = os.path.expanduser(Prompt.ask("[📁] Ruta del archivo local"))
+        if not os.path.isfile(local_path):
+            raise Exception(f"No se encontró el archivo {local_path}")
+
+        self.sftp = self.profile.open_sftp(self.client)
+        browser = RemoteBrowser(self.sftp, (self.username, self.host, self.port), self.console)
+        destinations = []
+        try:
+            remote_path = browser.ask_path("[🗂️] Ruta destino (la misma en todos los servidores)")
+            if remote_path.endswith("/") or browser.is_dir(remote_path):
+                remote_path = posixpath.join(remote_path, os.path.basename(local_path))
+            remote_path = browser.absolute(remote_path)
+            servers = Prompt.ask("[🖥️] Resto de servidores (usuario@host:puerto, separados por comas)")
+
+            # Primero se conecta a todos (puede hacer falta pedir contraseñas) y después se copia en paralelo
+            for server in [server.strip() for server in servers.split(",") if server.strip()]:
+                user, host, port = RemoteCopyCommand.parse_destination(server, self.username)
+                connection = SSHConnection(host, user, port, "agente", profile=self.profile.name)
+                try:
+                    connection.connect_unattended(ask_password=lambda text: Prompt.ask(f"[🔐] {text}", password=True))
+                    destinations.append(connection)
+                except Exception as e:
+                    self.console.print(f"[bold red]✖ No se pudo conectar a {server}: {e}[/bold red]")
+
+            if not self.transfer_file_sftp("put", local_path, remote_path):
+                return
+            browser.invalidate(remote_path)
+            if not destinations:
+                return
+
+            with ThreadPoolExecutor(max_workers=min(self.MAX_PARALLEL_TRANSFERS, len(destinations))) as pool:
+                results = list(pool.map(lambda connection: self._relay(connection, local_path, remote_path),
+                                        destinations))
+            self.console.print(f"[green]✔ {1 + sum(results)}/{1 + len(destinations)} servidores tienen el archivo[/green]")
+        finally:
+            for connection in destinations:
+                connection.client.close()
+            browser.close()
+            self.sftp.close()
+
+    """
+    Método auxiliar que hace llegar a otro servidor el archivo ya subido a este. Si el reenvío de servidor a servidor
+    falla (ej: no se ven entre sí o no hay agente SSH), se le sube directamente desde este equipo.
+    Devuelve True si el servidor termina con el archivo.
+    """
+
+    def _relay(self, connection, local_path, remote_path):
+        server = f"{connection.username}@{connection.host}:{connection.port}"
+        sftp = self.profile.open_sftp(connection.client)
+        try:
+            if self.dedup.is_identical(connection.client, sftp, server, local_path, remote_path):
+                self.console.print(f"[green]✔ Sin cambios en {connection.host}[/green]")
+                return True
+            try:
+                with Metrics.span("transfer.relay", host=connection.host, path=remote_path):
+                    # El reenvío va de servidor a servidor con su propio scp, fuera de los límites de este equipo
+                    RemoteCopyCommand.push_with_agent(self.client, remote_path, connection.username, connection.host,
+                                                      connection.port, remote_path)
+                self.console.print(f"[green]✔ Reenviado de {self.host} a {connection.host}[/green]")
+            except Exception as e:
+                self.console.print(f"[yellow]⚠ No se pudo reenviar de {self.host} a {connection.host} ({e}); "
+                                   f"se sube desde este equipo[/yellow]")
+                flow = self.limiter.flow(connection.host, rate=self.rate_limit)
+                self.profile.put(sftp, local_path, remote_path, throttle=flow.throttle if flow.buckets else None)
+                self.console.print(f"[green]✔ Subido a {connection.host}[/green]")
+            self.dedup.record(sftp, server, local_path, remote_path)
+            return True
+        except Exception as e:
+            self.console.print(f"[bold red]✖ Error al copiar a {connection.host}: {e}[/bold red]")
+            return False
+        finally:
+            sftp.close()
 
     """
     Método que pregunta las rutas de origen y destino según la acción seleccionada por el usuario usando el 
     protocolo SCP, usa el programa scp que ya está instalado en el sistema. Pregunta por la contraseña del servidor.
+    El progreso que imprime scp se muestra en la vista de TransferProgress.
     """
 
     def transfer_by_scp(self, action):
-        scp_cmd = []
         if action == "subir":
             local_path = Prompt.ask("[📁] Ruta del archivo local")
             remote_path = Prompt.ask("[🗂️] Ruta destino en el servidor")
-            scp_cmd = [
-                "scp", "-P", str(self.port),
-                local_path,
-                f"{self.username}@{self.host}:{remote_path}"
-            ]
-        elif action == "descargar":
+        else:
             remote_path = Prompt.ask("[🗂️] Ruta del archivo en el servidor")
             local_path = Prompt.ask("[📁] Ruta destino en tu equipo")
-            scp_cmd = [
-                "scp", "-P", str(self.port),
-                f"{self.username}@{self.host}:{remote_path}",
-                local_path
-            ]
+        scp_cmd = self.build_scp_command(action, local_path, remote_path)
+        total = os.path.getsize(local_path) if action == "subir" and os.path.isfile(local_path) else None
         try:
-            subprocess.run(scp_cmd, check=True)
+            direction = "put" if action == "subir" else "get"
+            with Metrics.span("scp.transfer", host=self.host, direction=direction, path=remote_path):
+                self.run_scp(scp_cmd, os.path.basename(remote_path if action == "descargar" else local_path), total)
             self.console.print(f"[bold green]✔ Transferencia SCP completada correctamente[/bold green]")
         except Exception as e:
             self.console.print(f"[bold red]✖ Error en la transferencia: {e}[/bold red]")
 
+    """
+    Método que construye el comando scp para subir o descargar un archivo.
+    Si hay límite de velocidad para este servidor se pasa a scp con -l (en Kbit/s).
+    :param action: 'subir' o 'descargar'
+    """
+
+    def build_scp_command(self, action, local_path, remote_path):
+        remote = f"{self.username}@{self.host}:{remote_path}"
+        options = ["-P", str(self.port)]
+        limit = self.limiter.scp_limit(self.host, self.rate_limit)
+        if limit:
+            options += ["-l", str(limit)]
+        if action == "subir":
+            return ["scp", *options, local_path, remote]
+        return ["scp", *options, remote, local_path]
+
+    """
+    Método que ejecuta scp en una pseudo-terminal (scp solo imprime su progreso si tiene terminal) y lleva ese
+    progreso a TransferProgress. Si scp pide contraseña o confirmar la clave del host, se pausa la vista y se
+    pregunta al usuario.
+    :param name: Nombre del archivo a mostrar
+    :param total: Tamaño del archivo si se conoce (en las descargas no se sabe de antemano)
+    """
+
+    def run_scp(self, scp_cmd, name, total=None):
+        child = pexpect.spawn(scp_cmd[0], scp_cmd[1:], encoding="utf-8", timeout=None)
+        output = ""
+        with TransferProgress(self.console) as progress:
+            task_id = progress.add(name, total)
+            while True:
+                i = child.expect([r"[Pp]assword[^\r\n]*:", r"\(yes/no[^)]*\)\?", "\r", pexpect.EOF])
+                output = (output + child.before)[-2000:]
+                if i == 0:
+                    progress.progress.stop()
+                    child.sendline(Prompt.ask(f"[🔐] {child.after.strip()}", password=True))
+                    progress.progress.start()
+                elif i == 1:
+                    progress.progress.stop()
+                    self.console.print(child.before.strip())
+                    child.sendline(Prompt.ask("[ ] ¿Confía en la clave del servidor?", choices=["yes", "no"]))
+                    progress.progress.start()
+                elif i == 2:
+                    progress.update_from_scp(task_id, child.before)
+                else:
+                    break
+            child.close()
+            ok = child.exitstatus == 0
+            progress.finish(task_id, ok)
+        if not ok:
+            raise Exception(f"scp terminó con código {child.exitstatus}: {output.strip()[-300:]}")
+
     """
     Método que realiza la transferencia de archivos vía SFTP usando put o get según la opción elegida por el usuario.
+    El avance se muestra en vivo (velocidad, tiempo restante y aviso si se detiene).
     :param sftp_method: 'put' para subir o 'get' para descargar
     :param src: Ruta origen del archivo
     :param dest: Ruta destino del archivo
+    :param progress: TransferProgress compartido (si no se indica, se muestra uno solo para este archivo)
+    :param sftp: Sesión SFTP a usar (por defecto la del comando)
+    Cada archivo es un flujo de BandwidthLimiter: respeta su límite y comparte de forma justa los del servidor y el
+    global con el resto de transferencias.
     """
 
-    def transfer_file_sftp(self, sftp_method, src, dest):
+    def transfer_file_sftp(self, sftp_method, src, dest, progress=None, sftp=None):
+        if progress is None:
+            with TransferProgress(self.console) as progress:
+                return self.transfer_file_sftp(sftp_method, src, dest, progress, sftp)
+
+        sftp = sftp or self.sftp
+        callback = None  # Se crea dentro del try: un archivo local que no existe también devuelve False
         try:
-            if sftp_method == "put":
-                self.sftp.put(src, dest)
-            else:
-                self.sftp.get(src, dest)
+            callback = progress.callback(os.path.basename(src),
+                                         os.path.getsize(src) if sftp_method == "put" else None)
+            if sftp_method == "put" and self.skip_identical and \
+                    self.dedup.is_identical(self.client, sftp, self.server_id, src, dest):
+                callback(os.path.getsize(src), os.path.getsize(src))
+                progress.finish(callback.task_id)
+                self.console.print(f"[green]✔ Sin cambios (ya está en el servidor): {os.path.basename(dest)}[/green]")
+                return True
 
+            flow = self.limiter.flow(self.host, rate=self.rate_limit)
+            throttle = flow.throttle if flow.buckets else None
+            with Metrics.span("sftp.transfer", host=self.host, direction=sftp_method, profile=self.profile.name,
+                              path=src) as span:
+                if sftp_method == "put":
+                    self.profile.put(sftp, src, dest, callback=callback, throttle=throttle)
+                    size = os.path.getsize(src)
+                    if self.skip_identical:
+                        self.dedup.record(sftp, self.server_id, src, dest)
+                else:
+                    self.profile.get(sftp, src, dest, callback=callback, throttle=throttle)
+                    size = os.path.getsize(dest)
+                span.set(bytes=size, throttled=round(flow.waited, 3))
+            Metrics.count("sftp.bytes", size, host=self.host, direction=sftp_method)
+
+            progress.finish(callback.task_id)
             self.console.print(f"[bold green]✔ Transferencia completada: {os.path.basename(dest)}[/bold green]")
+            return True
         except Exception as e:
+            if callback is not None:
+                progress.finish(callback.task_id, ok=False)
             self.console.print(f"[bold red]✖ Error en la transferencia: {e}[/bold red]")
+            return False
+
+    """
+    Método que transfiere varios archivos a la vez, cada uno con su propia sesión SFTP, mostrando el progreso de
+    todos (y el total agregado) en una misma vista.
+    :param pairs: Lista de tuplas (origen, destino)
+    :return: Número de transferencias correctas
+    """
+
+    def transfer_many_sftp(self, sftp_method, pairs):
+        def transfer(pair):
+            sftp = self.profile.open_sftp(self.client)
+            try:
+                return self.transfer_file_sftp(sftp_method, pair[0], pair[1], progress, sftp)
+            finally:
+                sftp.close()
+
+        with TransferProgress(self.console) as progress:
+            with ThreadPoolExecutor(max_workers=min(self.MAX_PARALLEL_TRANSFERS, len(pairs))) as pool:
+                results = list(pool.map(transfer, pairs))
+
+        done = sum(results)
+        self.console.print(f"[green]✔ {done}/{len(pairs)} archivos transferidos[/green]")
+        return done
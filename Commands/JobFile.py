@@ -0,0 +1,240 @@
+# Importaciones necesarias de librerías
+import getpass
+import os
+# Importaciones necesarias de otras clases
+from Connection.Inventory import Inventory
+
+"""
+Clase que lee un archivo de trabajos (TOML o, si está instalado PyYAML, YAML) que describe operaciones sobre grupos
+de servidores, y lo convierte en tareas (un paso en un servidor) con sus dependencias, listas para JobRunnerCommand.
+
+Formato (TOML):
+    [defaults]                      # Opcional: valores para todos los pasos
+    user = "deploy"                 # Usuario por defecto (por defecto el local)
+    port = 22
+    profile = "default"             # Perfil de transporte (ver TransportProfile)
+    jump_hosts = ""                 # Bastiones, como en la conexión interactiva
+    max_parallel = 8                # Tareas a la vez en total
+    max_per_host = 2                # Tareas a la vez en un mismo servidor
+    retries = 1                     # Reintentos de una tarea que falla
+    retry_delay = 5                 # Segundos entre reintentos
+    inventory = "inventario.toml"   # Inventario (ver Inventory) que se suma al de ~/.ssh/config y SSHTOOL_INVENTORY
+    probe = true                    # Comprobar antes qué servidores responden y omitir los caídos (ver HostProber)
+
+    [hosts]                         # Grupos de servidores ("usuario@host:puerto", usuario y puerto opcionales)
+    web = ["web1.example.com", "web2.example.com:2222"]
+    db = ["postgres@db1.example.com"]
+
+    [[steps]]
+    name = "subir"
+    hosts = "web"                   # Grupo, servidor o lista de ambos
+    upload = { src = "dist/app.tar.gz", dest = "/tmp/app.tar.gz" }
+
+    [[steps]]
+    name = "desplegar"
+    hosts = "web"
+    after = ["subir"]               # Pasos que tienen que haber terminado antes
+    run = ["tar xzf /tmp/app.tar.gz -C /srv/app", "systemctl restart app"]
+    sudo = true
+
+Cada paso tiene una sola acción:
+- run: comando o lista de comandos (en un único canal, ver BatchExec; con sudo = true, con SudoSession).
+  Opciones: sudo, timeout, stop_on_error (por defecto true) y cache = true para comandos de solo lectura (su salida
+  se reutiliza desde ResultCache, si está activada; el resto de run y upload invalidan lo guardado del servidor).
+- upload / download: { src, dest }. En las descargas a varios servidores dest debe llevar {host}.
+- push_key: ruta de una clave pública local que se añade a authorized_keys.
+- tunnel: { local_port, remote_host, remote_port, key } (túnel local) o con remote = true
+  { remote_port, local_host, local_port, key } (túnel remoto). Se lanza con ssh en segundo plano (ver Tunnel).
+Todos admiten retries y retry_delay propios.
+
+En hosts (de los pasos y de los grupos) también valen los selectores del inventario: un grupo, "tag:<etiqueta>",
+"all" o el nombre de un servidor (también como "usuario@nombre"). Los servidores del inventario con ProxyJump se
+conectan a través de esos bastiones, y sus variables se pueden usar como {variable} en las rutas de upload y
+download, igual que {host} y {user}.
+
+"after" espera, en cada servidor, a que el paso anterior haya terminado en ese mismo servidor; si el paso anterior
+no se ejecuta en él, espera a que termine en todos. Si una dependencia falla, la tarea se omite.
+"""
+
+
+class JobFile:
+    # Acciones que puede tener un paso (exactamente una)
+    ACTIONS = ("run", "upload", "download", "push_key", "tunnel")
+    # Valores por defecto de [defaults]
+    DEFAULTS = {"port": 22, "profile": "default", "jump_hosts": "", "max_parallel": 8, "max_per_host": 2,
+                "retries": 0, "retry_delay": 5, "inventory": "", "probe": True}
+
+    """
+    Constructor de la clase. Comprueba el contenido y lanza ValueError con el primer error encontrado.
+    :param data: Diccionario con el contenido del archivo
+    :param path: Ruta del archivo (para los mensajes de error y las rutas locales relativas)
+    """
+
+    def __init__(self, data, path="trabajos"):
+        self.path = path
+        self.base_dir = os.path.dirname(os.path.abspath(path))
+        self.defaults = dict(self.DEFAULTS, user=getpass.getuser())
+        self.defaults.update(data.get("defaults") or {})
+        self.groups = data.get("hosts") or {}
+        self.steps = data.get("steps") or []
+        self.inventory = Inventory.default()
+        if self.defaults["inventory"]:
+            self.inventory.merge(Inventory.load(self.local_path(self.defaults["inventory"])))
+        self.host_options = {}  # Servidor -> (bastiones, variables) de los que vienen del inventario
+        self._validate()
+
+    """
+    Método estático que lee un archivo de trabajos. Los .yml/.yaml necesitan PyYAML y, con Python anterior a 3.11,
+    los .toml necesitan tomli (dependencias opcionales).
+    """
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as job_file:
+            raw = job_file.read()
+        if path.endswith((".yml", ".yaml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML no está instalado (pip install pyyaml); use un archivo .toml")
+            data = yaml.safe_load(raw) or {}
+        else:
+            try:
+                import tomllib
+            except ImportError:  # Python anterior a 3.11: se usa tomli, del que procede tomllib
+                try:
+                    import tomli as tomllib
+                except ImportError:
+                    raise ImportError("Con Python anterior a 3.11 se necesita tomli (pip install tomli) para leer "
+                                      "archivos .toml")
+            data = tomllib.loads(raw.decode("utf-8"))
+        return JobFile(data, path)
+
+    """
+    Método que convierte una referencia a servidores (grupo, selector del inventario, servidor o lista de ellos)
+    en una lista de tuplas (usuario, host, puerto) sin repetidos. El usuario y el puerto que falten son los de
+    [defaults].
+    """
+
+    def resolve_hosts(self, spec):
+        servers = []
+        for item in [spec] if isinstance(spec, str) else spec:
+            for entry in self.groups.get(item, [item]):
+                for server, name in self.inventory.resolve(entry, self.defaults["user"], self.defaults["port"]):
+                    if name is not None:
+                        variables = self.inventory.variables(name)
+                        self.host_options[server] = (variables.get("proxyjump", ""), variables)
+                    if server not in servers:
+                        servers.append(server)
+        return servers
+
+    """
+    Método que devuelve los bastiones por los que conectar con un servidor: los de su ProxyJump en el inventario o,
+    si no tiene, los de [defaults].
+    """
+
+    def jump_hosts(self, server):
+        return self.host_options.get(server, ("", {}))[0] or self.defaults["jump_hosts"]
+
+    """
+    Método que devuelve las variables del inventario de un servidor (vacías si no está en el inventario).
+    """
+
+    def variables(self, server):
+        return self.host_options.get(server, ("", {}))[1]
+
+    """
+    Método que devuelve una ruta local del archivo: las relativas lo son al directorio del archivo de trabajos.
+    """
+
+    def local_path(self, path):
+        return os.path.join(self.base_dir, os.path.expanduser(path))
+
+    """
+    Método que devuelve las tareas en orden de dependencias. Cada tarea es un diccionario con:
+    id ("paso@usuario@host:puerto"), step (el paso), server (usuario, host, puerto), action y deps (ids).
+    """
+
+    def tasks(self):
+        by_step = {}
+        tasks = []
+        for step in self.steps:
+            servers = self.resolve_hosts(step["hosts"])
+            action = next(name for name in self.ACTIONS if name in step)
+            step_tasks = []
+            for server in servers:
+                deps = []
+                for previous in self._after(step):
+                    previous_tasks = by_step[previous]
+                    same_host = [task for task in previous_tasks if task["server"] == server]
+                    deps += [task["id"] for task in (same_host or previous_tasks)]
+                step_tasks.append({"id": f"{step['name']}@{self.label(server)}", "step": step, "server": server,
+                                   "action": action, "deps": deps})
+            by_step[step["name"]] = step_tasks
+            tasks += step_tasks
+        return tasks
+
+    """
+    Método estático que da el nombre legible de un servidor ("usuario@host:puerto").
+    """
+
+    @staticmethod
+    def label(server):
+        user, host, port = server
+        return f"{user}@{host}:{port}"
+
+    """
+    Método auxiliar que comprueba el archivo: nombres únicos, una acción por paso, servidores conocidos y
+    dependencias existentes y definidas antes (así no puede haber ciclos y el orden del archivo ya es válido).
+    """
+
+    def _validate(self):
+        if not self.steps:
+            raise ValueError(f"{self.path}: no hay ningún paso ([[steps]])")
+        for option in ("max_parallel", "max_per_host"):
+            value = self.defaults[option]
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                raise ValueError(f"{self.path}: {option} debe ser un número entero mayor o igual que 1")
+        for name, members in self.groups.items():
+            if not isinstance(members, list) or not members:
+                raise ValueError(f"{self.path}: el grupo '{name}' debe ser una lista de servidores")
+
+        seen = set()
+        for number, step in enumerate(self.steps, 1):
+            name = step.get("name")
+            where = f"{self.path}: paso {number}" + (f" ('{name}')" if name else "")
+            if not name:
+                raise ValueError(f"{where}: falta name")
+            if name in seen:
+                raise ValueError(f"{where}: el nombre está repetido")
+            actions = [action for action in self.ACTIONS if action in step]
+            if len(actions) != 1:
+                raise ValueError(f"{where}: debe tener exactamente una acción de {', '.join(self.ACTIONS)}")
+            if not step.get("hosts"):
+                raise ValueError(f"{where}: falta hosts")
+            try:
+                servers = self.resolve_hosts(step["hosts"])
+            except ValueError as e:
+                raise ValueError(f"{where}: {e}")
+            for previous in self._after(step):
+                if previous not in seen:
+                    raise ValueError(f"{where}: after '{previous}' no es un paso anterior")
+
+            action, value = actions[0], step[actions[0]]
+            if action in ("upload", "download") and not (isinstance(value, dict) and value.get("src")
+                                                         and value.get("dest")):
+                raise ValueError(f"{where}: {action} necesita src y dest")
+            if action == "download" and len(servers) > 1 and "{host}" not in value["dest"]:
+                raise ValueError(f"{where}: con varios servidores, el destino de download debe incluir {{host}}")
+            if action == "tunnel":
+                needed = ("remote_port", "local_host", "local_port") if value.get("remote") else \
+                    ("local_port", "remote_host", "remote_port")
+                missing = [key for key in needed if key not in value]
+                if missing:
+                    raise ValueError(f"{where}: al túnel le falta {', '.join(missing)}")
+            seen.add(name)
+
+    @staticmethod
+    def _after(step):
+        after = step.get("after") or []
+        return [after] if isinstance(after, str) else after
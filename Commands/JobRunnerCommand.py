@@ -0,0 +1,358 @@
+# Importaciones necesarias de librerías
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from rich.console import Console
+from rich.markup import escape
+from rich.prompt import Prompt
+from rich.table import Table
+# Importaciones necesarias de otras clases
+from Commands.JobFile import JobFile
+from Commands.KeyManagerCommand import KeyManagerCommand
+from Commands.TransferDedup import TransferDedup
+from Connection.BandwidthLimiter import BandwidthLimiter
+from Connection.BatchExec import BatchExec
+from Connection.HostProber import HostProber
+from Connection.ResultCache import ResultCache
+from Connection.SudoSession import SudoSession
+from Connection.Tunnel import Tunnel
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que ejecuta un archivo de trabajos (ver JobFile) sin menús: "python3 SSHTool.py run trabajos.toml".
+- Las tareas (un paso en un servidor) se lanzan en cuanto sus dependencias han terminado, con como mucho
+  max_parallel a la vez en total y max_per_host a la vez en cada servidor. Los pasos independientes avanzan en
+  paralelo.
+- Una tarea que falla se reintenta (retries, con retry_delay segundos de espera); si sigue fallando, las que
+  dependen de ella se omiten y el resto continúa.
+- Antes de empezar se comprueba (con HostProber) qué servidores responden: las tareas de los caídos no se intentan
+  y cuentan como omitidas, igual que las que dependen de ellas.
+- Hay una conexión por servidor, abierta la primera vez que se necesita (agente o claves de ~/.ssh y, si no,
+  contraseña) y compartida por todas sus tareas: cada comando, subida o descarga usa su propio canal.
+Al terminar muestra un resumen y devuelve 0 si todo ha ido bien o 1 si alguna tarea ha fallado o se ha omitido.
+"""
+
+
+class JobRunnerCommand:
+
+    """
+    Constructor de la clase.
+    :param job: JobFile a ejecutar
+    :param max_parallel: Tareas a la vez en total (por defecto la de [defaults])
+    """
+
+    def __init__(self, job, max_parallel=None, console=None):
+        self.job = job
+        self.max_parallel = int(max_parallel or job.defaults["max_parallel"])
+        self.max_per_host = int(job.defaults["max_per_host"])
+        self.console = console or Console()
+        self.connections = {}  # (usuario, host, puerto) -> SSHConnection
+        self._connection_locks = {}
+        self._lock = threading.Lock()
+        self._prompt_lock = threading.Lock()  # Las preguntas (contraseñas) se hacen de una en una
+        self._sudo_password = None
+
+    """
+    Método principal que ejecuta todas las tareas y muestra el resumen. Devuelve el código de salida.
+    """
+
+    def run(self):
+        tasks = self.job.tasks()
+        self.console.print(f"[bold blue]📋 {len(tasks)} tareas de {len(self.job.steps)} pasos "
+                           f"({escape(self.job.path)})[/bold blue]")
+        try:
+            with Metrics.span("job.run", path=self.job.path, tasks=len(tasks)):
+                results = self.schedule(tasks, self.skip_unreachable(tasks) if self.job.defaults["probe"] else {})
+        finally:
+            for connection in self.connections.values():
+                if connection.sudo:
+                    connection.sudo.forget()
+                connection.client.close()
+            self._sudo_password = None
+        self.show_summary(tasks, results)
+        return 0 if all(result["status"] == "ok" for result in results.values()) else 1
+
+    """
+    Método que muestra las tareas en orden con sus dependencias, sin ejecutar nada (--dry-run).
+    """
+
+    def plan(self):
+        table = Table(title=f"Plan de {escape(self.job.path)}")
+        table.add_column("Tarea", style="cyan")
+        table.add_column("Acción")
+        table.add_column("Depende de")
+        for task in self.job.tasks():
+            table.add_row(escape(task["id"]), task["action"], escape(", ".join(task["deps"]) or "-"))
+        self.console.print(table)
+        return 0
+
+    """
+    Método que comprueba a la vez todos los servidores de conexión directa y devuelve el resultado (omitido) de las
+    tareas de los que no responden. Los que van por bastiones no se comprueban (se sabrá al conectar).
+    """
+
+    def skip_unreachable(self, tasks):
+        servers = [task["server"] for task in tasks if not self.job.jump_hosts(task["server"])
+                   and "proxycommand" not in self.job.variables(task["server"])]
+        if not servers:
+            return {}
+        with self.console.status(f"Comprobando {len(set(servers))} servidores..."):
+            probes = HostProber().probe(servers)
+        results = {}
+        for task in tasks:
+            probe = probes.get(task["server"])
+            if probe and probe["status"] != "ok":
+                results[task["id"]] = {"status": "omitido", "attempts": 0, "duration": 0.0,
+                                       "detail": f"{probe['status']}: {probe['detail']}"}
+                self._report(task, results[task["id"]])
+        return results
+
+    """
+    Método que reparte las tareas entre los hilos respetando dependencias y límites de concurrencia.
+    Devuelve un diccionario id -> resultado (status, attempts, duration, detail).
+    :param results: Resultados ya conocidos (tareas que no se deben ejecutar)
+    """
+
+    def schedule(self, tasks, results=None):
+        results = dict(results or {})
+        pending = [task for task in tasks if task["id"] not in results]  # En orden de dependencias
+        running = {}  # Futuro -> tarea
+        per_host = Counter()
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+            while pending or running:
+                for task in list(pending):
+                    failed = [dep for dep in task["deps"] if dep in results and results[dep]["status"] != "ok"]
+                    if failed:
+                        pending.remove(task)
+                        results[task["id"]] = {"status": "omitido", "attempts": 0, "duration": 0.0,
+                                               "detail": f"falló {failed[0]}"}
+                        self._report(task, results[task["id"]])
+                        continue
+                    if len(running) >= self.max_parallel:
+                        break
+                    if any(dep not in results for dep in task["deps"]) or \
+                            per_host[task["server"]] >= self.max_per_host:
+                        continue
+                    pending.remove(task)
+                    running[pool.submit(self.execute, task)] = task
+                    per_host[task["server"]] += 1
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    per_host[task["server"]] -= 1
+                    results[task["id"]] = future.result()
+                    self._report(task, results[task["id"]])
+        return results
+
+    """
+    Método que ejecuta una tarea con sus reintentos y devuelve su resultado. Nunca lanza excepciones.
+    """
+
+    def execute(self, task):
+        step = task["step"]
+        retries = int(step.get("retries", self.job.defaults["retries"]))
+        delay = float(step.get("retry_delay", self.job.defaults["retry_delay"]))
+        started = time.monotonic()
+        for attempt in range(1, retries + 2):
+            try:
+                with Metrics.span("job.task", step=step["name"], host=task["server"][1], action=task["action"],
+                                  attempt=attempt):
+                    detail = getattr(self, f"_do_{task['action']}")(task, step[task["action"]])
+                return {"status": "ok", "attempts": attempt, "duration": time.monotonic() - started,
+                        "detail": detail}
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                if attempt <= retries:
+                    self.console.print(f"[yellow]⚠ {escape(task['id'])}: {escape(error)} "
+                                       f"(reintento {attempt} de {retries} en {delay:g} s)[/yellow]")
+                    time.sleep(delay)
+        return {"status": "fallido", "attempts": retries + 1, "duration": time.monotonic() - started,
+                "detail": error}
+
+    """
+    Método que muestra una tabla con el resultado de cada tarea.
+    """
+
+    def show_summary(self, tasks, results):
+        table = Table(title="Resultado")
+        table.add_column("Tarea", style="cyan")
+        table.add_column("Estado")
+        table.add_column("Intentos", justify="right")
+        table.add_column("Duración", justify="right")
+        table.add_column("Detalle")
+        colors = {"ok": "green", "fallido": "red", "omitido": "yellow"}
+        for task in tasks:
+            result = results[task["id"]]
+            table.add_row(escape(task["id"]), f"[{colors[result['status']]}]{result['status']}[/]",
+                          str(result["attempts"]), f"{result['duration']:.1f} s",
+                          escape(str(result["detail"] or ""))[-120:])
+        self.console.print(table)
+        counts = Counter(result["status"] for result in results.values())
+        self.console.print(f"[bold]{counts['ok']} correctas, {counts['fallido']} fallidas, "
+                           f"{counts['omitido']} omitidas[/bold]")
+
+    """
+    Métodos que ejecutan cada tipo de acción. Devuelven un texto con el detalle o lanzan una excepción si fallan.
+    """
+
+    def _do_run(self, task, commands):
+        step = task["step"]
+        commands = [commands] if isinstance(commands, str) else list(commands)
+        user, host, port = task["server"]
+        timeout = step.get("timeout")
+        stop_on_error = step.get("stop_on_error", True)
+        cache = ResultCache.default()
+        if step.get("sudo"):
+            sudo = self._sudo(self._connection(task["server"]))
+            output = ""
+            try:
+                for command in commands:
+                    status, output = sudo.run(command, timeout=timeout)
+                    if status != 0 and stop_on_error:
+                        raise RuntimeError(self._failure(command, status, output))
+            finally:
+                cache.invalidate(host, port, user)
+            return output.splitlines()[-1] if output else ""
+
+        def run_batch():
+            connection = self._connection(task["server"])
+            results = BatchExec.run(connection.client, commands, stop_on_error=stop_on_error,
+                                    host=connection.host, timeout=timeout)
+            failed = next((result for result in results if result["exit_status"] != 0), None)
+            if failed and (stop_on_error or failed["exit_status"] is None):
+                raise RuntimeError(self._failure(failed["command"], failed["exit_status"], failed["stderr"]))
+            return results[-1]["stdout"].strip()
+
+        if step.get("cache"):
+            # Solo lectura: la salida se reutiliza (sin conectar siquiera) con los comandos como clave; si fallan no se
+            # guarda
+            output, age = cache.fetch(host, port, user, "\n".join(commands), run_batch)
+        else:
+            age = None
+            try:
+                output = run_batch()
+            finally:
+                cache.invalidate(host, port, user)  # Puede haber cambiado cualquier cosa
+        last_line = output.splitlines()[-1] if output else ""
+        return f"{last_line} (en caché, hace {age:.0f} s)" if age is not None else last_line
+
+    def _do_upload(self, task, spec):
+        connection = self._connection(task["server"])
+        source = self.job.local_path(self._format(spec["src"], task))
+        destination = self._format(spec["dest"], task)
+        server_id = JobFile.label(task["server"])
+        sftp = connection.profile.open_sftp(connection.client)
+        try:
+            dedup = TransferDedup.default()
+            if dedup.is_identical(connection.client, sftp, server_id, source, destination):
+                return "sin cambios"
+            flow = BandwidthLimiter.default().flow(connection.host)
+            connection.profile.put(sftp, source, destination, throttle=flow.throttle if flow.buckets else None)
+            dedup.record(sftp, server_id, source, destination)
+        finally:
+            sftp.close()
+        ResultCache.default().invalidate(connection.host, connection.port, connection.username)
+        return f"{os.path.getsize(source)} bytes"
+
+    def _do_download(self, task, spec):
+        connection = self._connection(task["server"])
+        destination = self.job.local_path(self._format(spec["dest"], task))
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        sftp = connection.profile.open_sftp(connection.client)
+        try:
+            flow = BandwidthLimiter.default().flow(connection.host)
+            connection.profile.get(sftp, self._format(spec["src"], task), destination,
+                                   throttle=flow.throttle if flow.buckets else None)
+        finally:
+            sftp.close()
+        return f"{os.path.getsize(destination)} bytes"
+
+    def _do_push_key(self, task, path):
+        with open(self.job.local_path(path)) as key_file:
+            public_key = key_file.read()
+        connection = self._connection(task["server"])
+        result = KeyManagerCommand.authorize_key(connection.client, public_key, connection.host, connection.port)
+        return "la clave ya estaba" if result == "existe" else "clave añadida"
+
+    def _do_tunnel(self, task, spec):
+        user, host, port = task["server"]
+        if spec.get("remote"):
+            forward = ("-R", f"{spec['remote_port']}:{spec['local_host']}:{spec['local_port']}")
+        else:
+            forward = ("-L", f"{spec['local_port']}:{spec['remote_host']}:{spec['remote_port']}")
+        # Sin preguntas: si la clave no basta, ssh falla en lugar de quedarse esperando una contraseña
+        options = Tunnel.SSH_OPTIONS + ["-o", "BatchMode=yes", "-o", "ExitOnForwardFailure=yes"]
+        key_path = os.path.expanduser(spec.get("key", "~/.ssh/clave_privada"))
+        process = Tunnel.launch(Tunnel.build_command(user, host, port, key_path, *forward, ssh_options=options))
+        return f"túnel {' '.join(forward)} (pid {process.pid})"
+
+    """
+    Método auxiliar que devuelve la conexión con un servidor, abriéndola la primera vez (una sola vez aunque la
+    pidan varias tareas a la vez).
+    """
+
+    def _connection(self, server):
+        from Connection.SSHConnection import SSHConnection
+        with self._lock:
+            lock = self._connection_locks.setdefault(server, threading.Lock())
+        with lock:
+            connection = self.connections.get(server)
+            transport = connection.client.get_transport() if connection else None
+            if transport is not None and transport.is_active():
+                return connection
+            user, host, port = server
+            variables = self.job.variables(server)
+            connection = SSHConnection(host, user, port, "agente", jump_hosts=self.job.jump_hosts(server),
+                                       profile=self.job.defaults["profile"],
+                                       proxy_command=variables.get("proxycommand", ""),
+                                       identity_file=variables.get("identityfile"))
+            connection.console = self.console
+            connection.connect_unattended(ask_password=self._ask)
+            self.connections[server] = connection
+            return connection
+
+    """
+    Método auxiliar que crea la sesión sudo de una conexión. La contraseña de sudo se pide una vez para todo el
+    trabajo (lo habitual es que sea la misma en todos los servidores); si un servidor la rechaza, se pide de nuevo.
+    """
+
+    def _sudo(self, connection):
+        with self._lock:
+            if connection.sudo is None:
+                rejected = []  # La sesión solo vuelve a pedir la contraseña si la anterior no era válida
+
+                def ask_password():
+                    if self._sudo_password is None or rejected:
+                        self._sudo_password = self._ask(f"Contraseña de sudo en {connection.host}: " if rejected
+                                                        else "Contraseña de sudo: ")
+                    rejected.append(True)
+                    return self._sudo_password
+
+                connection.sudo = SudoSession(connection.client, ask_password=ask_password, host=connection.host)
+            return connection.sudo
+
+    def _ask(self, text):
+        with self._prompt_lock:
+            return Prompt.ask(f"[🔐] {text.rstrip(': ')}", password=True, console=self.console)
+
+    @staticmethod
+    def _failure(command, status, output):
+        output = output.strip()[-200:]
+        return f"'{command}' terminó con código {status}" + (f": {output}" if output else "")
+
+    def _format(self, path, task):
+        user, host, port = task["server"]
+        for name, value in self.job.variables(task["server"]).items():
+            path = path.replace("{" + name + "}", str(value))
+        return path.replace("{host}", host).replace("{user}", user)
+
+    def _report(self, task, result):
+        icons = {"ok": "[green]✔[/green]", "fallido": "[red]✖[/red]", "omitido": "[yellow]⚠[/yellow]"}
+        icon = icons[result["status"]]
+        detail = f" — {escape(str(result['detail']))}" if result["detail"] else ""
+        self.console.print(f"{icon} {escape(task['id'])} [dim]({result['duration']:.1f} s)[/dim]{detail}")
@@ -1,11 +1,16 @@
 # Importaciones necesarias de librerías
 import os
+import shlex
 import subprocess
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.panel import Panel
 # Importaciones necesarias de las clases
+from Connection.BatchExec import BatchExec
 from Connection.SSHConnection import SSHConnection
+from Connection.CertificateAuthority import CertificateAuthority
+from Connection.KnownHostsStore import KnownHostsStore
+from Connection.ResultCache import ResultCache
 
 """
 Clase que gestiona la funcionalidad relacionada con claves SSH.
@@ -13,17 +18,26 @@ Permite:
 - Generar un par de claves localmente
 - Copiar la clave pública al servidor remoto
 - Visualizar claves autorizadas en el servidor
+- Firmar certificados en lote con la CA integrada y revocarlos
+- Pre-escanear las claves de host de un inventario (known_hosts)
 """
 
 
 class KeyManagerCommand:
+    # Comando que lista las claves autorizadas (su salida se guarda en ResultCache si está activada)
+    LIST_KEYS_COMMAND = "cat ~/.ssh/authorized_keys"
+
     """
     Costructor que inicializa el administrador de claves.
     :param ssh_client: Cliente SSH (puede ser None si no existe conexión, para la opción 2 se pide conectar)
+    :param host: Servidor al que está conectado ssh_client (identifica sus resultados en ResultCache)
+    :param port: Puerto con el que se conectó a host
     """
 
-    def __init__(self, ssh_client=None):
+    def __init__(self, ssh_client=None, host=None, port=None):
         self.client = ssh_client  # Puede ser None si no hay conexión activa
+        self.host = host
+        self.port = port
         self.console = Console()
 
     """
@@ -38,7 +52,10 @@ class KeyManagerCommand:
             "1": ("Generar par de claves SSH localmente", self.generate_local_keys),
             "2": ("Copiar clave pública al servidor remoto", self.copy_key_to_server),
             "3": ("Ver claves existentes en el servidor", self.list_server_keys),
-            "4": ("Volver", lambda: None)
+            "4": ("Firmar certificados en lote con la CA", self.sign_certificates),
+            "5": ("Revocar certificados (KRL)", self.revoke_certificates),
+            "6": ("Escanear claves de host de un inventario", self.prescan_host_keys),
+            "7": ("Volver", lambda: None)
         }
 
         """
@@ -50,7 +67,7 @@ class KeyManagerCommand:
                 self.console.print(f"[cyan]{key}[/cyan]. {desc}")
 
             choice = Prompt.ask("\nSeleccione una opción", choices=list(options.keys()))
-            if choice == "4":
+            if choice == "7":
                 break  # Vuelve al menú principal
 
             _, action = options[choice]
@@ -130,6 +147,8 @@ class KeyManagerCommand:
                 return
 
             self.client = ssh_conn.get_client()  # Guarda el cliente resultante
+            self.host = ssh_conn.host
+            self.port = ssh_conn.port
 
         # Solicita la ruta a la clave pública local
         pub_key_path = Prompt.ask(
@@ -145,11 +164,6 @@ class KeyManagerCommand:
             return
 
         try:
-            self.console.print("[blue]🔍 Verificando directorio ~/.ssh en el servidor...[/blue]")
-            # Crea el directorio .ssh en el home del usuario si no existe (-p no lanza error si el directorio ya existe)
-            # y cambia los permisos del directorio .ssh a 700 (solo el propietario puede leer, escribir y acceder)
-            self.client.exec_command("mkdir -p ~/.ssh && chmod 700 ~/.ssh")
-
             self.console.print("[blue]📥 Leyendo clave pública local...[/blue]")
             # Abre el archivo en modo lectura.
             # (Asegura cierre automático del archivo con with).
@@ -157,37 +171,52 @@ class KeyManagerCommand:
                 # Lee el contenido completo del archivo y elimina espacios y saltos de línea.
                 pub_key = pub_key_file.read().strip()
 
-            # Comprueba si la clave ya existe en el servidor
-            stdin, stdout, stderr = self.client.exec_command(
-                # Comando para leer (y si es necesario, crear) el archivo authorized_keys del servidor remoto,
-                # donde se almacenan las claves públicas autorizadas para el acceso por SSH.
-                "cat ~/.ssh/authorized_keys || touch ~/.ssh/authorized_keys")
-            # Lee la salida del comando remoto (obtiene los bytes recibidos (read) y convierte esos bytes en texto).
-            existing_keys = stdout.read().decode()
-
-            # Condición para comprobar si la clave pública ya existe en el servidor
-            if pub_key in existing_keys:
+            self.console.print("[blue]🔐 Autorizando la clave pública en el servidor...[/blue]")
+            # Condición para comprobar si la clave pública ya existía en el servidor
+            if self.authorize_key(self.client, pub_key, self.host, self.port) == "existe":
                 self.console.print("[yellow]⚠ La clave ya existe en el servidor.[/yellow]")
                 return
 
-            # Si la clave pública no existe en el servidor, se añade
-            self.console.print("[blue]🔐 Añadiendo clave pública a authorized_keys...[/blue]")
-            # Busca todas las comillas dobles " dentro del texto pub_key y las reemplaza por \"
-            # para que no rompan el comando echo en la shell
-            escaped_key = pub_key.replace('"', r'\"')
-            # Comando que añade la clave pública al final del archivo authorized_keys del servidor remoto
-            # También, se cambian los permisos para que sean correctos.
-            self.client.exec_command(
-                f'echo "{escaped_key}" >> ~/.ssh/authorized_keys && chmod 600 ~/.ssh/authorized_keys')
-
             self.console.print("[green]✔ Clave pública copiada y autorizada correctamente en el servidor.[/green]")
 
         except Exception as e:
             self.console.print(f"[red]✖ Error al copiar la clave: {e}[/red]")
 
+    """
+    Método estático que añade una clave pública al authorized_keys del usuario en el servidor (creando ~/.ssh con
+    los permisos correctos si hace falta). Devuelve "nueva" si se ha añadido o "existe" si ya estaba.
+    Todos los pasos se envían juntos por un único canal (ver BatchExec) y se comprueba cada código de salida.
+    Al añadirla se descarta el listado de claves guardado en ResultCache para ese servidor, puerto y usuario.
+    """
+
+    @staticmethod
+    def authorize_key(client, public_key, host=None, port=None):
+        pub_key = shlex.quote(public_key.strip())
+        results = BatchExec.run(client, [
+            # Crea el directorio .ssh si no existe (-p no lanza error si ya existe) y le da permisos 700
+            # (solo el propietario puede leer, escribir y acceder)
+            "mkdir -p ~/.ssh && chmod 700 ~/.ssh",
+            # Crea authorized_keys (donde se almacenan las claves públicas autorizadas) con permisos 600
+            "touch ~/.ssh/authorized_keys && chmod 600 ~/.ssh/authorized_keys",
+            # Añade la clave al final del archivo solo si todavía no está
+            f"if grep -qF -- {pub_key} ~/.ssh/authorized_keys; then echo existe; "
+            f"else printf '%s\\n' {pub_key} >> ~/.ssh/authorized_keys && echo nueva; fi",
+        ], stop_on_error=True)
+
+        failed = next((result for result in results if result["exit_status"] != 0), None)
+        if failed:
+            raise Exception(f"'{failed['command']}' terminó con código {failed['exit_status']}: "
+                            f"{failed['stderr'].strip()}")
+        result = results[-1]["stdout"].strip()
+        if result == "nueva":
+            host, port, user = ResultCache.server(client, host, port)
+            ResultCache.default().invalidate(host, port, user, KeyManagerCommand.LIST_KEYS_COMMAND)
+        return result
+
     """
     Método que muestra todas las claves públicas autorizadas actualmente en el servidor remoto 
     (archivo authorized_keys). Si no hay conexión SSH activa, ofrece al usuario realizarla.
+    Si ResultCache está activada, un listado reciente se muestra sin volver a consultar el servidor.
     """
 
     def list_server_keys(self):
@@ -206,11 +235,19 @@ class KeyManagerCommand:
                 return
 
             self.client = ssh_conn.get_client()  # Guarda el cliente resultante
+            self.host = ssh_conn.host
+            self.port = ssh_conn.port
 
         try:
-            # Ejecuta el comando remoto para leer el archivo authorized_keys
-            stdin, stdout, stderr = self.client.exec_command("cat ~/.ssh/authorized_keys")
-            output = stdout.read().decode().strip()
+            # Ejecuta el comando remoto para leer el archivo authorized_keys (o toma el resultado de la caché)
+            def read_keys():
+                stdin, stdout, stderr = self.client.exec_command(self.LIST_KEYS_COMMAND)
+                return stdout.read().decode().strip()
+
+            host, port, user = ResultCache.server(self.client, self.host, self.port)
+            output, age = ResultCache.default().fetch(host, port, user, self.LIST_KEYS_COMMAND, read_keys)
+            if age is not None:
+                self.console.print(f"[dim](resultado en caché de hace {age:.0f} s)[/dim]")
 
             # Muestra el contenido si hay claves
             if output:
@@ -220,3 +257,108 @@ class KeyManagerCommand:
 
         except Exception as e:
             self.console.print(f"[red]✖ Error al listar claves: {e}[/red]")
+
+    """
+    Método que firma en lote todas las claves públicas indicadas (una lista separada por comas o un directorio
+    con archivos .pub) usando la CA integrada. Todos los certificados comparten principales, validez y tipo.
+    """
+
+    def sign_certificates(self):
+        self.console.print("\n[bold blue]🏷 Firmar certificados en lote[/bold blue]")
+
+        ca_key_path = os.path.expanduser(Prompt.ask("[ ] Ruta de la clave privada de la CA", default="~/.ssh/ca"))
+        if not os.path.exists(ca_key_path):
+            create_ca = Prompt.ask("[ ] No existe la CA. ¿Desea generarla ahora?", choices=["si", "no"], default="si")
+            if create_ca != "si":
+                self.console.print("[dim]Operación cancelada por el usuario.[/dim]")
+                return
+            CertificateAuthority.generate_ca_key(ca_key_path)
+            self.console.print(f"[green]✔ Clave de CA generada en: {ca_key_path}[/green]")
+
+        source = os.path.expanduser(Prompt.ask("[ ] Claves públicas a firmar (directorio o rutas separadas por comas)"))
+        if os.path.isdir(source):
+            pub_keys = sorted(
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.endswith(".pub") and not name.endswith("-cert.pub")
+            )
+        else:
+            pub_keys = [os.path.expanduser(path.strip()) for path in source.split(",") if path.strip()]
+
+        if not pub_keys:
+            self.console.print("[yellow]⚠ No se encontraron claves públicas para firmar.[/yellow]")
+            return
+
+        cert_type = Prompt.ask("[ ] Tipo de certificado", choices=["user", "host"], default="user")
+        principals = Prompt.ask("[ ] Principales (separados por comas, vacío = nombre de cada clave)", default="")
+        validity = Prompt.ask("[ ] Validez (ej: +8h, +1d, +52w)", default="+1d")
+
+        # La identidad de cada certificado es el nombre del archivo de la clave sin extensión
+        requests = []
+        for pub_key in pub_keys:
+            identity = os.path.basename(pub_key)[:-len(".pub")] if pub_key.endswith(".pub") else os.path.basename(pub_key)
+            requests.append({
+                "pub_key_path": pub_key,
+                "identity": identity,
+                "principals": principals or [identity],
+                "validity": validity,
+                "cert_type": cert_type,
+            })
+
+        try:
+            results = CertificateAuthority(ca_key_path).sign_batch(requests)
+            for cert_path, serial in results:
+                self.console.print(f"[green]✔[/green] [dim]#{serial}[/dim] {cert_path}")
+            self.console.print(f"[green]✔ {len(results)} certificados firmados correctamente.[/green]")
+        except Exception as e:
+            self.console.print(f"[red]✖ Error al firmar los certificados: {e}[/red]")
+
+    """
+    Método que revoca certificados por número de serie y regenera la lista de revocación (KRL) de la CA.
+    """
+
+    def revoke_certificates(self):
+        self.console.print("\n[bold blue]⛔ Revocar certificados[/bold blue]")
+
+        ca_key_path = os.path.expanduser(Prompt.ask("[ ] Ruta de la clave privada de la CA", default="~/.ssh/ca"))
+        if not os.path.exists(ca_key_path):
+            self.console.print(f"[red]✖ No se encontró la clave de la CA en: {ca_key_path}[/red]")
+            return
+
+        serials = Prompt.ask("[ ] Números de serie a revocar (separados por comas)")
+        try:
+            krl_path = CertificateAuthority(ca_key_path).revoke(
+                [int(serial) for serial in serials.split(",") if serial.strip()]
+            )
+            self.console.print(f"[green]✔ KRL actualizada en:[/green] {krl_path}")
+            self.console.print("[dim]Configure 'RevokedKeys' en sshd_config con esta ruta para aplicarla.[/dim]")
+        except Exception as e:
+            self.console.print(f"[red]✖ Error al revocar certificados: {e}[/red]")
+
+    """
+    Método que obtiene en paralelo las claves de host de todos los servidores de un inventario (un archivo de texto
+    con un host por línea, con formato host o host:puerto) y guarda las nuevas en known_hosts.
+    """
+
+    def prescan_host_keys(self):
+        self.console.print("\n[bold blue]🛰 Escanear claves de host[/bold blue]")
+
+        inventory_path = os.path.expanduser(Prompt.ask("[ ] Ruta del inventario (un host por línea)"))
+        if not os.path.isfile(inventory_path):
+            self.console.print(f"[red]✖ No se encontró el inventario en: {inventory_path}[/red]")
+            return
+
+        with open(inventory_path, "r") as f:
+            hosts = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+        store = KnownHostsStore.default()
+        self.console.print(f"[blue]🔍 Escaneando {len(hosts)} hosts...[/blue]")
+        results = store.prescan(hosts)
+
+        failed = {host: result for host, result in results.items() if isinstance(result, str)}
+        for host, error in failed.items():
+            self.console.print(f"[red]✖[/red] {host}: {error}")
+        rejected = [host for host, error in failed.items() if error in KnownHostsStore.REJECTED.values()]
+        if rejected:
+            self.console.print(f"[bold red]⚠ {len(rejected)} hosts presentan una clave que no se puede aceptar: "
+                               f"{', '.join(rejected)}. Verifique su identidad antes de conectarse.[/bold red]")
+        self.console.print(f"[green]✔ {len(results) - len(failed)} claves de host verificadas en:[/green] {store.path}")
@@ -0,0 +1,165 @@
+# Importaciones necesarias de librerías
+import queue
+import shlex
+import socket
+import threading
+import time
+from rich.console import Console
+from rich.markup import escape
+from rich.prompt import IntPrompt, Prompt
+# Importaciones necesarias de otras clases
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que permite seguir logs remotos en tiempo real, filtrándolos en el propio servidor.
+En cada servidor se ejecuta "tail -F | grep --line-buffered" sobre un canal exec, así que solo viajan por la red
+las líneas que cumplen el filtro. Se pueden seguir varios archivos y varios servidores a la vez: las líneas se
+mezclan en un único flujo etiquetado con el host (y el archivo) y la hora de llegada.
+
+Además del menú interactivo, ofrece generadores para usar desde código:
+    for timestamp, source, line in LogFollowCommand.follow_many([("web1", client, "/var/log/nginx/error.log")],
+                                                                pattern="upstream timed out"):
+        ...
+"""
+
+
+class LogFollowCommand:
+    # Tamaño máximo de cada lectura del canal
+    READ_SIZE = 32768
+
+    """
+    Constructor de la clase.
+    :param connections: Lista de SSHConnection conectadas cuyos logs se quieren seguir
+    """
+
+    def __init__(self, connections):
+        self.connections = connections
+        self.console = Console()
+
+    """
+    Método principal que pide los archivos y el filtro y muestra las líneas hasta que se pulsa Ctrl+C.
+    """
+
+    def run(self):
+        self.console.print("[bold blue]📜 Seguimiento de logs remotos[/bold blue]")
+        paths = Prompt.ask("[📁] Archivos de log (separados por comas)", default="/var/log/syslog")
+        pattern = Prompt.ask("[🔎] Filtro (expresión regular, vacío = todas las líneas)", default="")
+        ignore_case = Prompt.ask("[ ] ¿Ignorar mayúsculas/minúsculas?", choices=["si", "no"], default="no") == "si"
+        lines = IntPrompt.ask("[ ] Líneas anteriores a mostrar", default=10)
+
+        paths = [path.strip() for path in paths.split(",") if path.strip()]
+        sources = []
+        for connection in self.connections:
+            for path in paths:
+                label = connection.host if len(paths) == 1 else f"{connection.host}:{path}"
+                sources.append((label, connection.client, path))
+
+        self.console.print("[dim]Mostrando líneas en tiempo real. Pulse Ctrl+C para salir.[/dim]")
+        stream = self.follow_many(sources, pattern or None, ignore_case=ignore_case, lines=lines)
+        try:
+            for timestamp, source, line in stream:
+                clock = time.strftime("%H:%M:%S", time.localtime(timestamp))
+                self.console.print(f"[dim]{clock}[/dim] [cyan]{escape(source)}[/cyan] {escape(line)}",
+                                   highlight=False)
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            self.console.print(f"[bold red]✖ Error al seguir los logs: {e}[/bold red]")
+        finally:
+            stream.close()
+        self.console.print("[yellow]⚠ Seguimiento de logs finalizado[/yellow]")
+
+    """
+    Método estático que construye el comando remoto: tail -F de los archivos y, si hay filtro, grep con salida
+    por líneas (sin él, grep acumularía la salida en bloques de 4 KB antes de enviarla).
+    :param fixed: True para buscar el filtro como texto literal en lugar de como expresión regular
+    """
+
+    @staticmethod
+    def build_command(path, pattern=None, ignore_case=False, fixed=False, lines=10):
+        command = f"tail -n {int(lines)} -F -- {shlex.quote(path)}"
+        if pattern:
+            flags = ("-F" if fixed else "-E") + (" -i" if ignore_case else "")
+            command += f" | grep --line-buffered {flags} -e {shlex.quote(pattern)}"
+        return command
+
+    """
+    Método estático (generador) que sigue un archivo en un servidor y devuelve tuplas (instante, línea).
+    """
+
+    @staticmethod
+    def follow(client, path, pattern=None, **options):
+        for timestamp, _, line in LogFollowCommand.follow_many([("", client, path)], pattern, **options):
+            yield timestamp, line
+
+    """
+    Método estático (generador) que sigue varios archivos/servidores a la vez y mezcla las líneas en orden de
+    llegada, como tuplas (instante, origen, línea). Cada origen se lee en su propio hilo.
+    Al cerrar el generador (o al salir del bucle que lo recorre) se cierran todos los canales, lo que termina
+    tail y grep en los servidores.
+    :param sources: Lista de tuplas (etiqueta, cliente paramiko, ruta del archivo)
+    """
+
+    @staticmethod
+    def follow_many(sources, pattern=None, **options):
+        lines = queue.Queue()
+        stop = threading.Event()
+        channels = []
+        readers = []
+
+        # Los canales se abren dentro del try: si falla uno, se cierran los que ya estaban abiertos
+        try:
+            for label, client, path in sources:
+                channel = client.get_transport().open_session()
+                channels.append(channel)
+                # Con PTY, al cerrar el canal el servidor envía SIGHUP a tail y grep y no quedan procesos huérfanos
+                channel.get_pty()
+                channel.exec_command(LogFollowCommand.build_command(path, pattern, **options))
+                reader = threading.Thread(target=LogFollowCommand._read, args=(label, channel, lines, stop),
+                                          daemon=True)
+                reader.start()
+                readers.append(reader)
+
+            active = len(readers)
+            while active:
+                item = lines.get()
+                if item is None:
+                    active -= 1
+                    continue
+                yield item
+        finally:
+            stop.set()
+            for channel in channels:
+                channel.close()
+
+    """
+    Método auxiliar (hilo) que lee un canal, lo divide en líneas y las pone en la cola común.
+    Al terminar (fin del comando o cierre) pone None en la cola.
+    """
+
+    @staticmethod
+    def _read(label, channel, lines, stop):
+        channel.settimeout(0.5)
+        host = label.split(":")[0]
+        pending = b""
+        try:
+            while not stop.is_set():
+                try:
+                    data = channel.recv(LogFollowCommand.READ_SIZE)
+                except socket.timeout:
+                    continue
+                if not data:
+                    break
+                now = time.time()
+                pending += data
+                *complete, pending = pending.split(b"\n")
+                for line in complete:
+                    lines.put((now, label, line.rstrip(b"\r").decode("utf-8", errors="replace")))
+                Metrics.count("logs.bytes", len(data), host=host)
+                Metrics.count("logs.lines", len(complete), host=host)
+            if pending and not stop.is_set():
+                lines.put((time.time(), label, pending.rstrip(b"\r").decode("utf-8", errors="replace")))
+        except OSError:
+            pass
+        finally:
+            lines.put(None)
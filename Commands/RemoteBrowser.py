@@ -0,0 +1,270 @@
+# Importaciones necesarias de librerías
+import paramiko
+import posixpath
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from rich.markup import escape
+from rich.prompt import Prompt
+from rich.table import Table
+
+try:
+    import readline
+except ImportError:  # readline no existe en todas las plataformas: sin él no hay autocompletado
+    readline = None
+
+"""
+Clase que permite explorar el sistema de archivos remoto por SFTP sin escribir las rutas a ciegas.
+- Lista directorios con listdir_attr (una sola petición devuelve nombres, tipos, tamaños y fechas) y guarda los
+  metadatos en una caché en memoria con caducidad (TTL). Los stat de archivos listados salen de esa caché.
+- Tras listar un directorio, lee por adelantado (en segundo plano) sus subdirectorios, de modo que al entrar en
+  ellos o al completar rutas ya no hay que esperar a la red. La lectura anticipada usa su propia sesión SFTP,
+  porque SFTPClient no admite peticiones simultáneas desde varios hilos.
+- Autocompleta rutas remotas con la tecla Tab (readline).
+- La caché se invalida al escribir en el servidor desde la herramienta (ver invalidate()).
+La caché se comparte entre instancias del mismo servidor (cache_key), así que sobrevive entre transferencias.
+"""
+
+
+class RemoteBrowser:
+    # Tiempo (segundos) que se consideran válidos los metadatos guardados
+    TTL = 30
+    # Número de subdirectorios que se leen por adelantado tras listar un directorio
+    PREFETCH_LIMIT = 32
+
+    # Cachés compartidas por servidor: cache_key -> {"dirs": {...}, "stats": {...}}
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    """
+    Constructor de la clase.
+    :param sftp: Sesión SFTP abierta
+    :param cache_key: Identificador del servidor (ej: (usuario, host, puerto)) para compartir la caché
+    """
+
+    def __init__(self, sftp, cache_key=None, console=None, ttl=None):
+        self.sftp = sftp
+        self.console = console or Console()
+        self.ttl = self.TTL if ttl is None else ttl
+        with RemoteBrowser._caches_lock:
+            cache = RemoteBrowser._caches.setdefault(cache_key or id(sftp),
+                                                     {"dirs": {}, "stats": {}, "lock": threading.Lock()})
+        self._dirs = cache["dirs"]    # directorio -> (caducidad, lista de SFTPAttributes)
+        self._stats = cache["stats"]  # ruta -> (caducidad, SFTPAttributes o None si no existe)
+        self._lock = cache["lock"]
+        self._prefetcher = ThreadPoolExecutor(max_workers=1)
+        self._prefetch_sftp = None  # Sesión SFTP de la lectura anticipada (se abre al primer uso)
+        self._prefetching = set()
+        self.cwd = self.sftp.normalize(".")
+
+    """
+    Método que devuelve el contenido de un directorio (lista de SFTPAttributes), desde la caché si no ha caducado.
+    Al leerlo de la red también guarda el stat de cada entrada y lanza la lectura anticipada de sus subdirectorios.
+    """
+
+    def listdir(self, path):
+        path = self.absolute(path)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._dirs.get(path)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        entries = self.sftp.listdir_attr(path)
+        self._store_listing(path, entries)
+        self._prefetch([posixpath.join(path, entry.filename) for entry in entries if stat.S_ISDIR(entry.st_mode)])
+        return entries
+
+    """
+    Método que devuelve el stat de una ruta (None si no existe), desde la caché si es posible.
+    Los listados guardan el lstat de cada entrada: para un enlace simbólico se pide el stat de su destino (y se
+    guarda en su lugar), así que un enlace a un directorio se trata como un directorio.
+    """
+
+    def stat(self, path):
+        path = self.absolute(path)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._stats.get(path)
+            link = cached is not None and cached[1] is not None and stat.S_ISLNK(cached[1].st_mode)
+            if cached and cached[0] > now and not link:
+                return cached[1]
+            # Si el directorio padre está en caché y la entrada no aparece, es que no existe
+            parent = self._dirs.get(posixpath.dirname(path))
+            if parent and parent[0] > now and path != "/" and not link:
+                return None
+
+        try:
+            attributes = self.sftp.stat(path)
+        except FileNotFoundError:
+            attributes = None
+        with self._lock:
+            self._stats[path] = (now + self.ttl, attributes)
+        return attributes
+
+    """
+    Método que indica si una ruta remota es un directorio (sustituye a adivinarlo por si el nombre tiene un punto).
+    """
+
+    def is_dir(self, path):
+        attributes = self.stat(path)
+        return attributes is not None and stat.S_ISDIR(attributes.st_mode)
+
+    """
+    Método que elimina de la caché una ruta y el listado de su directorio. Se llama después de escribir en el
+    servidor (subidas, borrados, renombrados) para no mostrar datos antiguos.
+    """
+
+    def invalidate(self, path):
+        path = self.absolute(path)
+        with self._lock:
+            self._stats.pop(path, None)
+            self._dirs.pop(path, None)
+            self._dirs.pop(posixpath.dirname(path), None)
+
+    """
+    Método que convierte una ruta remota en absoluta (las relativas parten del directorio inicial de la sesión).
+    """
+
+    def absolute(self, path):
+        if not path:
+            return self.cwd
+        if path == "~" or path.startswith("~/"):
+            path = path[2:]
+        return posixpath.normpath(posixpath.join(self.cwd, path))
+
+    """
+    Método que devuelve las rutas que completan un texto (los directorios terminan en "/").
+    Se usa como función de autocompletado de readline.
+    """
+
+    def complete(self, text):
+        directory, prefix = posixpath.split(text)
+        try:
+            entries = self.listdir(directory or ".")
+        except OSError:
+            return []
+        matches = []
+        for entry in sorted(entries, key=lambda e: e.filename):
+            if entry.filename.startswith(prefix) and (prefix.startswith(".") or not entry.filename.startswith(".")):
+                path = posixpath.join(directory, entry.filename)
+                is_dir = self.is_dir(path) if stat.S_ISLNK(entry.st_mode) else stat.S_ISDIR(entry.st_mode)
+                matches.append(path + ("/" if is_dir else ""))
+        return matches
+
+    """
+    Método que pide una ruta remota al usuario con autocompletado (Tab) si readline está disponible.
+    """
+
+    def ask_path(self, prompt, default=None):
+        if readline is None:
+            return Prompt.ask(prompt, default=default)
+
+        matches = []
+
+        def completer(text, state):
+            if state == 0:
+                matches[:] = self.complete(text)
+            return matches[state] if state < len(matches) else None
+
+        previous = (readline.get_completer(), readline.get_completer_delims())
+        readline.set_completer(completer)
+        readline.set_completer_delims(" \t\n")
+        readline.parse_and_bind("tab: complete")
+        try:
+            return Prompt.ask(prompt + " [dim](Tab para completar)[/dim]", default=default)
+        finally:
+            readline.set_completer(previous[0])
+            readline.set_completer_delims(previous[1])
+
+    """
+    Método que permite navegar por directorios remotos y elegir un archivo. Muestra el contenido del directorio
+    actual; se puede escribir un subdirectorio (o "..") para entrar en él o un archivo para elegirlo.
+    :param path: Directorio inicial
+    :param select_dir: Si es True, pulsar Enter sin escribir nada devuelve el directorio actual
+    :return: Ruta absoluta elegida
+    """
+
+    def browse(self, path=".", select_dir=False):
+        current = self.absolute(path)
+        while True:
+            self.show(current)
+            hint = "Enter = este directorio, " if select_dir else ""
+            choice = self.ask_path(f"[🗂️] {escape(current)} ({hint}'..' para subir)", default="" if select_dir else None)
+            if not choice:
+                if select_dir:
+                    return current
+                continue
+            target = posixpath.normpath(posixpath.join(current, choice))
+            if self.is_dir(target):
+                current = target
+            elif self.stat(target) is not None or select_dir:
+                return target
+            else:
+                self.console.print(f"[red]✖ No existe: {escape(target)}[/red]")
+
+    """
+    Método que muestra el contenido de un directorio remoto en una tabla (primero los directorios).
+    """
+
+    def show(self, path):
+        table = Table(title=escape(self.absolute(path)), show_lines=False)
+        table.add_column("Nombre")
+        table.add_column("Tamaño", justify="right")
+        table.add_column("Modificado")
+        try:
+            entries = self.listdir(path)
+        except OSError as e:
+            self.console.print(f"[red]✖ No se puede listar {escape(path)}: {e}[/red]")
+            return
+        for entry in sorted(entries, key=lambda e: (not stat.S_ISDIR(e.st_mode), e.filename)):
+            is_dir = stat.S_ISDIR(entry.st_mode)
+            table.add_row(
+                f"[bold blue]{escape(entry.filename)}/[/bold blue]" if is_dir else escape(entry.filename),
+                "" if is_dir else str(entry.st_size),
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.st_mtime or 0)),
+            )
+        self.console.print(table)
+
+    def close(self):
+        self._prefetcher.shutdown(wait=True, cancel_futures=True)
+        if self._prefetch_sftp is not None:
+            self._prefetch_sftp.close()
+
+    """
+    Método auxiliar que guarda un listado y el stat de cada una de sus entradas.
+    """
+
+    def _store_listing(self, path, entries):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._dirs[path] = (expires, entries)
+            for entry in entries:
+                self._stats[posixpath.join(path, entry.filename)] = (expires, entry)
+
+    """
+    Método auxiliar que lee en segundo plano los subdirectorios que aún no están en caché.
+    """
+
+    def _prefetch(self, directories):
+        now = time.monotonic()
+        for directory in directories[:self.PREFETCH_LIMIT]:
+            with self._lock:
+                cached = self._dirs.get(directory)
+                if (cached and cached[0] > now) or directory in self._prefetching:
+                    continue
+                self._prefetching.add(directory)
+            self._prefetcher.submit(self._prefetch_one, directory)
+
+    def _prefetch_one(self, directory):
+        try:
+            if self._prefetch_sftp is None:
+                self._prefetch_sftp = paramiko.SFTPClient.from_transport(self.sftp.get_channel().get_transport())
+            self._store_listing(directory, self._prefetch_sftp.listdir_attr(directory))
+        except Exception:
+            pass  # La lectura anticipada es opcional: si falla (ej: sin permisos o sesión cerrada) se ignora
+        finally:
+            with self._lock:
+                self._prefetching.discard(directory)
@@ -0,0 +1,211 @@
+# Importaciones necesarias de librerías
+import queue
+import shlex
+import threading
+import paramiko
+from paramiko.agent import AgentRequestHandler
+from rich.console import Console
+from rich.prompt import Prompt
+# Importaciones necesarias de otras clases
+from Commands.RemoteBrowser import RemoteBrowser
+from Commands.TransferProgress import TransferProgress
+from Connection.BandwidthLimiter import BandwidthLimiter
+from Connection.TransportProfile import TransportProfile
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que copia archivos entre dos servidores sin pasar por el disco del equipo local. Hay dos modos:
+- directo: el servidor de origen envía el archivo al de destino con su propio scp. La autenticación usa el agente
+  SSH local reenviado por la conexión (agent forwarding), así que los datos no pasan por este equipo y la copia va
+  a la velocidad de la red entre los servidores (ej: dentro del mismo centro de datos).
+- memoria: se lee por SFTP del origen y se escribe por SFTP en el destino a la vez, con un búfer acotado en
+  memoria. Sirve cuando los servidores no se ven entre sí; los datos atraviesan este equipo, pero nunca su disco.
+"""
+
+
+class RemoteCopyCommand:
+    # Bloques que caben en el búfer entre la lectura y la escritura (memoria máxima = BUFFER_BLOCKS × tamaño de bloque)
+    BUFFER_BLOCKS = 64
+
+    """
+    Constructor de la clase.
+    :param ssh_client: Cliente paramiko conectado al servidor de origen
+    :param host: Servidor de origen (con username y port identifica su caché de RemoteBrowser)
+    :param profile: Perfil de transporte para las sesiones SFTP
+    """
+
+    def __init__(self, ssh_client, host, username, port, profile="default"):
+        self.client = ssh_client
+        self.host = host
+        self.username = username
+        self.port = port
+        self.profile = TransportProfile.by_name(profile)
+        self.console = Console()
+
+    """
+    Método principal que pregunta el destino, el modo y las rutas y realiza la copia.
+    """
+
+    def run(self):
+        from Connection.SSHConnection import SSHConnection
+
+        destination = Prompt.ask("[🖥️] Servidor de destino (usuario@host:puerto)")
+        user, host, port = self.parse_destination(destination, self.username)
+        mode = Prompt.ask("[ ] Modo de copia (directo = de servidor a servidor, memoria = a través de este equipo)",
+                          choices=["directo", "memoria"], default="directo")
+
+        src_sftp = self.profile.open_sftp(self.client)
+        browser = RemoteBrowser(src_sftp, (self.username, self.host, self.port), self.console)
+        try:
+            src_path = browser.ask_path(f"[🗂️] Archivo en {self.host}")
+            if browser.is_dir(src_path):
+                src_path = browser.browse(src_path)
+            src_path = browser.absolute(src_path)
+            dst_path = Prompt.ask(f"[🗂️] Ruta destino en {host}")
+
+            if mode == "directo":
+                with self.console.status(f"[blue]Copiando {src_path} de {self.host} a {host}...[/blue]"):
+                    self.push_with_agent(self.client, src_path, user, host, port, dst_path)
+            else:
+                dest = SSHConnection(host, user, port, Prompt.ask(
+                    "[🔐] Autenticación en el destino", choices=["contraseña", "clave", "agente"],
+                    default="contraseña"), profile=self.profile.name)
+                if not dest.connect():
+                    return
+                dst_sftp = self.profile.open_sftp(dest.client)
+                try:
+                    with TransferProgress(self.console) as progress:
+                        size = src_sftp.stat(src_path).st_size
+                        callback = progress.callback(src_path.rsplit("/", 1)[-1], size)
+                        # Los datos atraviesan este equipo: cuentan para los límites de velocidad del destino
+                        flow = BandwidthLimiter.default().flow(host, "copia")
+                        self.stream_copy(src_sftp, src_path, dst_sftp, dst_path, self.profile.sftp_request_size,
+                                         callback=callback, host=self.host,
+                                         throttle=flow.throttle if flow.buckets else None)
+                        progress.finish(callback.task_id)
+                finally:
+                    dst_sftp.close()
+                    dest.close()
+            self.console.print(f"[bold green]✔ Copia completada: {self.host}:{src_path} → {host}:{dst_path}[/bold green]")
+        except Exception as e:
+            self.console.print(f"[bold red]✖ Error en la copia entre servidores: {e}[/bold red]")
+        finally:
+            browser.close()
+            src_sftp.close()
+
+    """
+    Método estático que interpreta "usuario@host:puerto" (usuario y puerto opcionales). Las direcciones IPv6 se
+    escriben entre corchetes si llevan puerto ("usuario@[::1]:2222"); sin puerto también valen sin corchetes.
+    Devuelve (usuario, host, puerto); el usuario y el puerto que no se indiquen son default_user y default_port.
+    """
+
+    @staticmethod
+    def parse_destination(destination, default_user=None, default_port=22):
+        user, _, address = destination.strip().rpartition("@")
+        if address.startswith("["):
+            host, _, rest = address[1:].partition("]")
+            if rest and not rest.startswith(":"):
+                raise ValueError(f"Dirección no válida: {destination}")
+            port = rest[1:]
+        elif address.count(":") > 1:
+            host, port = address, ""  # IPv6 sin corchetes: no puede llevar puerto
+        else:
+            host, _, port = address.partition(":")
+        return user or default_user, host, int(port) if port else default_port
+
+    """
+    Método estático que hace que el servidor de origen envíe un archivo al de destino con scp.
+    El agente SSH local se reenvía solo en este canal, de modo que el origen se autentica en el destino con las
+    claves del usuario sin copiarlas al servidor. BatchMode evita que scp se quede esperando una contraseña.
+    """
+
+    @staticmethod
+    def push_with_agent(source_client, src_path, user, host, port, dst_path):
+        if not paramiko.Agent().get_keys():
+            raise RuntimeError("El modo directo necesita un agente SSH local con claves cargadas (ssh-add)")
+        target = f"{user}@{host}" if user else host
+        command = (f"scp -q -o BatchMode=yes -o StrictHostKeyChecking=accept-new -P {int(port)} "
+                   f"{shlex.quote(src_path)} {shlex.quote(f'{target}:{dst_path}')}")
+
+        with Metrics.span("copy.push", host=host, path=src_path):
+            channel = source_client.get_transport().open_session()
+            forwarding = AgentRequestHandler(channel)
+            try:
+                channel.exec_command(command)
+                stderr = channel.makefile_stderr("rb").read().decode("utf-8", errors="replace")
+                status = channel.recv_exit_status()
+            finally:
+                forwarding.close()
+                channel.close()
+        if status != 0:
+            raise RuntimeError(f"scp en el servidor de origen terminó con código {status}: {stderr.strip()}")
+
+    """
+    Método estático que copia un archivo de una sesión SFTP a otra sin tocar el disco local.
+    Un hilo lee del origen y deja los bloques en una cola acotada; este hilo los escribe en el destino en modo
+    pipeline. La lectura pide los bloques por ventanas (TransportProfile.read_blocks) en lugar de con prefetch()
+    de todo el archivo, que guardaría en memoria todo lo recibido aunque el destino fuese más lento. Si el destino
+    es más lento, la cola se llena y la lectura espera, así que la memoria usada queda acotada a unas
+    2 × buffer_blocks × block_size.
+    :param throttle: Función que recibe el tamaño de cada bloque antes de escribirlo (límite de velocidad)
+    """
+
+    @staticmethod
+    def stream_copy(src_sftp, src_path, dst_sftp, dst_path, block_size=32768, buffer_blocks=None, callback=None,
+                    host=None, throttle=None):
+        buffer_blocks = buffer_blocks or RemoteCopyCommand.BUFFER_BLOCKS
+        blocks = queue.Queue(maxsize=buffer_blocks)
+        stop = threading.Event()
+        errors = []
+
+        def put(data):
+            # Espera a que haya sitio en la cola, salvo que la escritura haya fallado y ya no se vaya a vaciar
+            while not stop.is_set():
+                try:
+                    blocks.put(data, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        def reader(remote_file, size):
+            try:
+                for data in TransportProfile.read_blocks(remote_file, size, block_size, buffer_blocks):
+                    if stop.is_set():
+                        return
+                    put(data)
+                put(b"")
+            except Exception as e:
+                errors.append(e)
+                put(b"")
+
+        with Metrics.span("copy.stream", host=host, path=src_path) as span:
+            with src_sftp.open(src_path, "rb") as src_file, dst_sftp.open(dst_path, "wb") as dst_file:
+                size = src_file.stat().st_size
+                dst_file.MAX_REQUEST_SIZE = block_size
+                dst_file.set_pipelined(True)
+                thread = threading.Thread(target=reader, args=(src_file, size), daemon=True)
+                thread.start()
+
+                copied = 0
+                try:
+                    while True:
+                        data = blocks.get()
+                        if not data:
+                            break
+                        if throttle:
+                            throttle(len(data))
+                        dst_file.write(data)
+                        copied += len(data)
+                        if callback:
+                            callback(copied, size)
+                finally:
+                    stop.set()
+                    thread.join()
+
+            if errors:
+                raise errors[0]
+            if copied != size:
+                raise IOError(f"Tamaño incorrecto en el destino: {copied} != {size}")
+            span.set(bytes=copied)
+        Metrics.count("copy.bytes", copied, host=host, kind="stream")
+        return copied
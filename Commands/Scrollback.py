@@ -0,0 +1,109 @@
+# Importaciones necesarias de librerías
+import re
+import threading
+from collections import deque
+
+"""
+Clase que guarda en memoria los últimos bytes de salida de una sesión interactiva (búfer circular) para poder
+buscar en ellas aunque ya no se vean en la terminal.
+- La memoria está acotada: el búfer crece hasta la capacidad indicada y a partir de ahí sobrescribe lo más antiguo,
+  así que un comando que no para de escribir no hace crecer el proceso.
+- Se guardan los bytes tal como llegan (sin decodificar), lo que hace que añadir datos sea solo una copia.
+- La búsqueda usa expresiones regulares sobre bytes, que se ejecutan en C y recorren 100 MB en décimas de segundo
+  (antes se quitan las secuencias de escape de una copia, lo que en salidas muy coloreadas añade algún segundo).
+Es segura entre hilos: el hilo que lee del servidor añade datos mientras el usuario busca.
+"""
+
+
+class Scrollback:
+    # Secuencias de escape ANSI (colores, movimiento del cursor...), que se quitan antes de buscar
+    ANSI_ESCAPE = re.compile(rb"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+
+    """
+    Constructor de la clase.
+    :param capacity: Tamaño máximo del búfer en bytes
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.total = 0  # Bytes recibidos desde el principio (incluidos los ya descartados)
+        self._buffer = bytearray()
+        self._start = 0  # Posición del byte más antiguo cuando el búfer ya está lleno
+        self._lock = threading.Lock()
+
+    """
+    Método que añade datos al final del búfer, descartando lo más antiguo si no cabe.
+    """
+
+    def append(self, data):
+        with self._lock:
+            self.total += len(data)
+            if len(data) >= self.capacity:
+                self._buffer[:] = data[-self.capacity:]
+                self._start = 0
+                return
+            room = self.capacity - len(self._buffer)
+            if room > 0:
+                # Mientras no está lleno, el búfer solo crece
+                self._buffer += data[:room]
+                data = data[room:]
+            if data:
+                # Lleno: se sobrescribe desde el más antiguo, dando la vuelta al final si hace falta
+                end = self._start + len(data)
+                if end <= self.capacity:
+                    self._buffer[self._start:end] = data
+                else:
+                    split = self.capacity - self._start
+                    self._buffer[self._start:] = data[:split]
+                    self._buffer[:end - self.capacity] = data[split:]
+                self._start = end % self.capacity
+
+    """
+    Método que devuelve el contenido del búfer en orden (de lo más antiguo a lo más reciente).
+    """
+
+    def contents(self):
+        with self._lock:
+            with memoryview(self._buffer) as view:
+                return b"".join((view[self._start:], view[:self._start]))
+
+    """
+    Método que devuelve lo añadido después de la posición mark (un valor anterior de total), sin copiar el resto
+    del búfer. Si parte ya se ha descartado, devuelve lo que queda.
+    """
+
+    def since(self, mark):
+        with self._lock:
+            count = min(max(self.total - mark, 0), len(self._buffer))
+            with memoryview(self._buffer) as view:
+                older, newer = view[self._start:], view[:self._start]
+                if count <= len(newer):
+                    return bytes(newer[len(newer) - count:])
+                return b"".join((older[len(older) - (count - len(newer)):], newer))
+
+    def __len__(self):
+        return len(self._buffer)
+
+    """
+    Método que busca una expresión regular en el búfer y devuelve las líneas que coinciden (como texto, sin
+    secuencias de escape), las más recientes al final. Se busca en una copia sin secuencias de escape, así que un
+    texto con cambios de color en medio (ej: "error: disk" en la salida coloreada de gcc) también se encuentra,
+    igual que en SessionReplayCommand.search.
+    :param max_results: Número máximo de líneas devueltas (se devuelven las últimas)
+    """
+
+    def search(self, pattern, ignore_case=True, max_results=100):
+        regex = re.compile(pattern.encode(), re.IGNORECASE if ignore_case else 0)
+        data = self.ANSI_ESCAPE.sub(b"", self.contents())
+        lines = deque(maxlen=max_results)
+        position = 0  # Las coincidencias dentro de una línea ya devuelta se saltan
+        for match in regex.finditer(data):
+            if match.start() < position:
+                continue
+            start = data.rfind(b"\n", 0, match.start()) + 1
+            end = data.find(b"\n", match.end())
+            end = len(data) if end == -1 else end
+            line = data[start:end].rstrip(b"\r")
+            lines.append(line.decode("utf-8", errors="replace"))
+            position = end
+        return list(lines)
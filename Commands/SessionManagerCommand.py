@@ -0,0 +1,388 @@
+# Importaciones necesarias de librerías
+import codecs
+import functools
+import os
+import queue
+import selectors
+import sys
+import threading
+import time
+from rich.console import Console
+from rich.markup import escape
+from rich.prompt import Prompt
+from rich.rule import Rule
+from rich.table import Table
+# Importaciones necesarias de otras clases
+from Commands.CommandsExecutorCommand import CommandsExecutorCommand
+from Commands.Scrollback import Scrollback
+from Connection.BandwidthLimiter import BandwidthLimiter
+
+"""
+Clase que mantiene abiertas varias sesiones SSH a la vez (objetos SSHConnection) para pasar de un servidor a otro
+sin volver a conectar.
+- Un único hilo lee la salida de todos los shells interactivos con un selector, así que tener muchas sesiones
+  abiertas no supone un hilo por sesión. La salida de cada sesión se guarda en su propio historial (Scrollback).
+- La sesión activa muestra su salida en pantalla; las demás la acumulan y, al entrar en ellas, se ve lo último que
+  escribieron mientras no se miraba.
+- Dentro de una sesión se cambia a otra con "::cambiar <nombre>" (al instante, sin handshake), y "::difundir
+  <comando>" envía un comando a todas las sesiones abiertas.
+- Se puede enviar un comando a una selección de sesiones y ver la respuesta de cada una.
+
+Las sesiones siguen abiertas al volver al menú principal; se cierran por nombre o al salir de la herramienta.
+Si una conexión se pierde y SSHConnection la restablece, la sesión sigue con el shell nuevo.
+"""
+
+
+class SessionManagerCommand:
+    # Tiempo máximo (segundos) que espera el selector antes de atender altas y bajas de sesiones
+    POLL_INTERVAL = 0.1
+    # Tamaño máximo de cada lectura de un shell
+    READ_SIZE = 32768
+    # Bytes de la salida no vista que se muestran al entrar en una sesión
+    TAIL_BYTES = 4096
+    # Tiempo (segundos) sin salida nueva tras el que se da por terminada la respuesta a un comando difundido
+    QUIET_SECONDS = 0.5
+    # Tiempo máximo (segundos) que se espera la respuesta a un comando difundido
+    BROADCAST_TIMEOUT = 5.0
+    # Líneas de la respuesta de cada sesión que se muestran al difundir un comando
+    BROADCAST_LINES = 20
+    # Prefijo de las órdenes que atiende la propia herramienta (no se envían al servidor)
+    LOCAL_PREFIX = "::"
+
+    """
+    Constructor de la clase. El hilo lector se inicia con la primera sesión.
+    """
+
+    def __init__(self):
+        self.console = Console()
+        self.sessions = {}  # nombre -> diccionario con la conexión, su historial y su estado
+        self.active = None  # Nombre de la sesión cuya salida se muestra en pantalla
+        self._selector = selectors.DefaultSelector()
+        self._changes = queue.Queue()  # Altas y bajas en el selector, que solo toca el hilo lector
+        self._reader = None
+        self._running = True
+
+    """
+    Método principal que muestra las sesiones abiertas y el menú para gestionarlas.
+    """
+
+    def run(self):
+        from Connection.SSHConnection import SSHConnection
+        options = {
+            "1": ("Abrir una nueva sesión", lambda: self._ask_add(SSHConnection.create_connection())),
+            "2": ("Entrar en una sesión (terminal)", lambda: self.attach(self._ask_name())),
+            "3": ("Enviar un comando a varias sesiones", self._ask_broadcast),
+            "4": ("Abrir el menú de una sesión (transferencias, túneles...)", lambda: self.open_menu(self._ask_name())),
+            "5": ("Cerrar una sesión", lambda: self.close(self._ask_name())),
+            "6": ("Volver al menú principal", None)
+        }
+
+        while True:
+            self.show_sessions()
+            self.console.print("\n[bold]Gestor de sesiones:[/bold]")
+            for key, (desc, _) in options.items():
+                self.console.print(f"[cyan]{key}[/cyan]. {desc}")
+            choice = Prompt.ask("Seleccione una opción", choices=list(options.keys()))
+            if choice == "6":
+                break  # Las sesiones siguen abiertas
+            if choice != "1" and not self.sessions:
+                self.console.print("[yellow]⚠ No hay sesiones abiertas[/yellow]")
+                continue
+            try:
+                options[choice][1]()
+            except Exception as e:
+                self.console.print(f"[bold red]✖ Error: {e}[/bold red]")
+
+    """
+    Método que añade una conexión ya establecida (con su shell interactivo) y devuelve el nombre de la sesión.
+    :param name: Nombre de la sesión (por defecto usuario@host, con un número si ya existe)
+    """
+
+    def add(self, connection, name=None):
+        base = name or f"{connection.username}@{connection.host}"
+        name, number = base, 2
+        while name in self.sessions:
+            name, number = f"{base}-{number}", number + 1
+        megabytes = float(os.environ.get("SSHTOOL_SCROLLBACK_MB", CommandsExecutorCommand.SCROLLBACK_MB))
+        session = {
+            "name": name,
+            "connection": connection,
+            "scrollback": Scrollback(int(megabytes * 1024 * 1024)),
+            "decoder": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+            "seen": 0,  # Posición del historial hasta la que el usuario ha visto la salida
+            "status": "abierta",
+            "paused": False,  # True mientras su menú propio usa el shell
+            "flow": BandwidthLimiter.default().flow(connection.host, "interactivo"),  # Prioridad sobre transferencias
+        }
+        self.sessions[name] = session
+        connection.reconnect_listeners.append(functools.partial(self._reconnected, session))
+        if self._reader is None or not self._reader.is_alive():
+            self._running = True
+            self._reader = threading.Thread(target=self._read_loop, daemon=True)
+            self._reader.start()
+        self._change("register", session)
+        return name
+
+    """
+    Método que muestra una tabla con las sesiones abiertas.
+    """
+
+    def show_sessions(self):
+        if not self.sessions:
+            self.console.print("[dim]No hay sesiones abiertas[/dim]")
+            return
+        table = Table(title="Sesiones")
+        table.add_column("Nombre", style="cyan")
+        table.add_column("Servidor")
+        table.add_column("Estado")
+        table.add_column("Salida sin ver", justify="right")
+        for name, session in self.sessions.items():
+            connection = session["connection"]
+            unseen = session["scrollback"].total - session["seen"]
+            status = "[green]abierta[/green]" if session["status"] == "abierta" else f"[red]{session['status']}[/red]"
+            table.add_row(escape(name), escape(f"{connection.host}:{connection.port}"), status,
+                          f"{unseen / 1024:.1f} KB" if unseen else "-")
+        self.console.print(table)
+
+    """
+    Método que entra en la terminal de una sesión. Desde ella se puede cambiar a otra sesión sin salir, así que
+    termina cuando el usuario vuelve al gestor (::salir, exit o Ctrl+C).
+    """
+
+    def attach(self, name):
+        while name:
+            name = self._interact(name)
+
+    """
+    Método que envía un comando a varias sesiones a la vez y devuelve, por sesión, la salida que producen hasta que
+    dejan de escribir (QUIET_SECONDS) o pasa BROADCAST_TIMEOUT.
+    """
+
+    def broadcast(self, names, command):
+        marks = {}
+        for name in names:
+            session = self.sessions[name]
+            if session["status"] == "cerrada por el servidor":
+                continue
+            marks[name] = session["scrollback"].total
+            self._send(session, command)
+
+        deadline = time.monotonic() + self.BROADCAST_TIMEOUT
+        last_total, last_change = None, time.monotonic()
+        while time.monotonic() < deadline:
+            time.sleep(self.POLL_INTERVAL)
+            total = sum(self.sessions[name]["scrollback"].total for name in marks)
+            if total != last_total:
+                last_total, last_change = total, time.monotonic()
+            elif time.monotonic() - last_change >= self.QUIET_SECONDS:
+                break
+        return {name: self.sessions[name]["scrollback"].since(mark) for name, mark in marks.items()}
+
+    """
+    Método que muestra el menú propio de una sesión (comandos, transferencias, túneles, logs) sin cerrarla al
+    volver. Mientras tanto el hilo lector deja de leer su shell, que pasa a usar la terminal de comandos.
+    """
+
+    def open_menu(self, name):
+        session = self.sessions[name]
+        session["paused"] = True
+        self._change("unregister", session)
+        try:
+            session["connection"].show_session_menu(keep_open=True)
+        finally:
+            session["paused"] = False
+            if session["status"] == "abierta":
+                self._change("register", session)
+
+    """
+    Método que cierra una sesión por su nombre.
+    """
+
+    def close(self, name):
+        session = self.sessions.pop(name)
+        self._change("unregister", session)
+        session["connection"].close()
+
+    """
+    Método que cierra todas las sesiones y detiene el hilo lector (al salir de la herramienta).
+    """
+
+    def close_all(self):
+        for name in list(self.sessions):
+            self.close(name)
+        self._running = False
+
+    """
+    Método auxiliar con la terminal de una sesión. Devuelve el nombre de la sesión a la que cambiar o None para
+    volver al gestor.
+    """
+
+    def _interact(self, name):
+        session = self.sessions[name]
+        self.console.print(Rule(f"[cyan]🖥️ Sesión {escape(name)}[/cyan] [dim](::cambiar <nombre>, ::lista, "
+                                f"::difundir <comando>, ::buscar <regex>, ::salir)[/dim]"))
+        # Lo último que escribió la sesión mientras no se miraba
+        unseen = session["scrollback"].since(session["seen"])
+        if len(unseen) > self.TAIL_BYTES:
+            self.console.print(f"[dim]… {(len(unseen) - self.TAIL_BYTES) / 1024:.0f} KB anteriores omitidos[/dim]")
+            unseen = unseen[-self.TAIL_BYTES:]
+        sys.stdout.write(unseen.decode("utf-8", errors="replace"))
+        sys.stdout.flush()
+        session["seen"] = session["scrollback"].total
+        self.active = name
+
+        try:
+            while True:
+                user_input = input()
+                if user_input.strip().lower() == "exit":
+                    return None
+                if not user_input.startswith(self.LOCAL_PREFIX):
+                    if session["status"] == "cerrada por el servidor":
+                        self.console.print(f"[red]✖ La sesión está {session['status']}[/red]")
+                        continue
+                    self._send(session, user_input)
+                    continue
+
+                command, _, argument = user_input[len(self.LOCAL_PREFIX):].strip().partition(" ")
+                argument = argument.strip()
+                if command == "salir":
+                    return None
+                if command == "cambiar" and argument in self.sessions:
+                    return argument
+                if command == "lista":
+                    self.show_sessions()
+                elif command == "difundir" and argument:
+                    self._show_broadcast(self.broadcast(list(self.sessions), argument))
+                elif command == "buscar" and argument:
+                    lines = session["scrollback"].search(argument)
+                    self.console.print(Rule(f"[cyan]🔎 {len(lines)} coincidencias[/cyan]"))
+                    for line in lines:
+                        self.console.print(escape(line), highlight=False)
+                    self.console.print(Rule())
+                else:
+                    self.console.print("[yellow]⚠ Órdenes: ::cambiar <nombre>, ::lista, ::difundir <comando>, "
+                                       "::buscar <regex>, ::salir[/yellow]")
+        except KeyboardInterrupt:
+            return None
+        finally:
+            self.active = None
+            self.console.print()
+
+    """
+    Métodos auxiliares que piden al usuario los datos de cada opción del menú.
+    """
+
+    def _ask_name(self):
+        names = list(self.sessions)
+        return Prompt.ask("[ ] Sesión", choices=names, default=self.active or names[0])
+
+    def _ask_add(self, connection):
+        if not connection:
+            self.console.print("[bold red]✖ No se pudo establecer la conexión SSH[/bold red]")
+            return
+        default = f"{connection.username}@{connection.host}"
+        name = self.add(connection, Prompt.ask("[ ] Nombre de la sesión", default=default))
+        self.console.print(f"[green]✔ Sesión {escape(name)} abierta[/green]")
+
+    def _ask_broadcast(self):
+        selection = Prompt.ask("[ ] Sesiones (separadas por comas o 'todas')", default="todas")
+        if selection.strip() == "todas":
+            names = list(self.sessions)
+        else:
+            names = [name.strip() for name in selection.split(",") if name.strip()]
+            unknown = [name for name in names if name not in self.sessions]
+            if unknown:
+                raise ValueError(f"Sesiones desconocidas: {', '.join(unknown)}")
+        command = Prompt.ask("[>] Comando")
+        self._show_broadcast(self.broadcast(names, command))
+
+    def _show_broadcast(self, outputs):
+        for name, output in outputs.items():
+            text = Scrollback.ANSI_ESCAPE.sub(b"", output).decode("utf-8", errors="replace").replace("\r", "")
+            lines = text.strip("\n").split("\n")
+            self.console.print(Rule(f"[cyan]{escape(name)}[/cyan]"))
+            for line in lines[-self.BROADCAST_LINES:]:
+                self.console.print(escape(line), highlight=False)
+            # Lo que ya se ha mostrado aquí no se vuelve a mostrar como pendiente al entrar en la sesión
+            self.sessions[name]["seen"] = self.sessions[name]["scrollback"].total
+
+    """
+    Método auxiliar que envía una línea al shell de una sesión; si la conexión se había perdido, reconecta y la
+    envía por el shell nuevo.
+    """
+
+    def _send(self, session, line):
+        connection = session["connection"]
+        shell = connection.shell
+        session["flow"].throttle(len(line) + 1)
+        try:
+            shell.send(line + "\n")
+        except OSError:
+            if not connection.recover(shell):
+                raise
+            connection.shell.send(line + "\n")
+
+    """
+    Método auxiliar que se llama cuando SSHConnection ha reconectado una sesión: el hilo lector pasa a leer el shell
+    nuevo (salvo si su menú propio lo está usando).
+    """
+
+    def _reconnected(self, session, connection):
+        session["status"] = "abierta"
+        if not session["paused"] and session["name"] in self.sessions:
+            self._change("register", session)
+
+    """
+    Método auxiliar que pide al hilo lector un alta o baja en el selector y espera a que la haga (así, tras una
+    baja, ya nadie más lee ese shell).
+    """
+
+    def _change(self, action, session):
+        done = threading.Event()
+        self._changes.put((action, session, done))
+        if self._reader and self._reader.is_alive():
+            done.wait(timeout=2)
+
+    """
+    Método auxiliar (hilo) que lee la salida de todos los shells. Guarda cada bloque en el historial de su sesión y,
+    si es la sesión activa, lo muestra en pantalla.
+    """
+
+    def _read_loop(self):
+        while self._running:
+            while not self._changes.empty():
+                action, session, done = self._changes.get()
+                # Se quita cualquier shell de la sesión (tras reconectar puede quedar el anterior) y, en un alta,
+                # se pone el actual
+                for key in list(self._selector.get_map().values()):
+                    if key.data is session:
+                        self._selector.unregister(key.fileobj)
+                if action == "register":
+                    self._selector.register(session["connection"].shell, selectors.EVENT_READ, session)
+                done.set()
+            if not self._selector.get_map():
+                time.sleep(self.POLL_INTERVAL)
+                continue
+            for key, _ in self._selector.select(timeout=self.POLL_INTERVAL):
+                self._read_session(key.data, key.fileobj)
+
+    def _read_session(self, session, shell):
+        if not shell.recv_ready() and not shell.closed and not shell.eof_received:
+            return  # Aviso del selector sin datos (ya leídos en la vuelta anterior)
+        data = shell.recv(self.READ_SIZE) if shell.recv_ready() else b""
+        if not data:
+            self._selector.unregister(shell)
+            if shell is not session["connection"].shell:
+                return  # Shell anterior a una reconexión
+            transport = session["connection"].client.get_transport()
+            # Si la conexión se ha perdido, la vigilancia de SSHConnection la restablecerá (ver _reconnected)
+            lost = transport is None or not transport.is_active()
+            session["status"] = "desconectada" if lost else "cerrada por el servidor"
+            if self.active == session["name"]:
+                self.console.print(f"\n[yellow]⚠ La sesión {escape(session['name'])} se ha cerrado[/yellow]")
+            return
+        session["scrollback"].append(data)
+        if self.active == session["name"]:
+            sys.stdout.write(session["decoder"].decode(data))
+            sys.stdout.flush()
+            session["seen"] = session["scrollback"].total
@@ -0,0 +1,185 @@
+# Importaciones necesarias de librerías
+import bisect
+import codecs
+import json
+import os
+import queue
+import re
+import struct
+import threading
+import time
+
+"""
+Clase que graba una sesión interactiva (lo que devuelve el servidor y, si se pide, lo que se escribe) con marcas de
+tiempo.
+- Lo que escribe el usuario no se graba por defecto (como asciinema sin --stdin): las contraseñas de sudo o passwd
+  no tienen eco en la salida, pero sí pasarían por la entrada. Los comandos se ven igualmente en la grabación,
+  porque el shell remoto los repite en la salida. SSHTOOL_RECORD_INPUT=1 graba también la entrada.
+- Las grabaciones y su directorio solo son accesibles para el usuario (permisos 0600 y 0700).
+- Formato asciicast v2 (https://docs.asciinema.org): una cabecera JSON y una línea [tiempo, "o"|"i", texto] por
+  evento, solo añadiendo al final. Se puede reproducir también con asciinema.
+- La escritura la hace un hilo en segundo plano: registrar un evento solo lo deja en una cola, así que la terminal
+  nunca espera al disco. Los eventos seguidos del mismo tipo (ráfagas de salida) se juntan en una sola línea.
+- Junto a cada grabación se guarda un índice binario (.idx) con pares (tiempo, posición en el archivo) cada
+  INDEX_INTERVAL segundos, que permite empezar a reproducir en cualquier minuto sin leer todo lo anterior.
+
+Las grabaciones se guardan en SSHTOOL_RECORD_DIR (por defecto ~/.sshtool/sessions). Para reproducirlas y buscar
+en ellas está SessionReplayCommand.
+"""
+
+
+class SessionRecorder:
+    # Directorio por defecto de las grabaciones
+    DIRECTORY = "~/.sshtool/sessions"
+    # Cada cuántos segundos de sesión se añade una entrada al índice
+    INDEX_INTERVAL = 1.0
+    # Eventos del mismo tipo más próximos que esto (segundos) se guardan juntos
+    COALESCE_SECONDS = 0.02
+    # Formato de cada entrada del índice: tiempo (double) y posición (entero sin signo de 64 bits)
+    INDEX_ENTRY = struct.Struct("<dQ")
+
+    """
+    Constructor de la clase. Crea el archivo y empieza a grabar.
+    :param host: Servidor de la sesión (forma parte del nombre del archivo y de la cabecera)
+    :param path: Ruta de la grabación (por defecto una nueva en el directorio de grabaciones)
+    :param width: Columnas de la terminal (para la cabecera asciicast)
+    :param height: Filas de la terminal
+    :param record_input: Si es True se graba también lo que escribe el usuario (por defecto SSHTOOL_RECORD_INPUT)
+    """
+
+    def __init__(self, host, path=None, width=80, height=24, record_input=None):
+        if path is None:
+            directory = os.path.expanduser(os.environ.get("SSHTOOL_RECORD_DIR", self.DIRECTORY))
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            safe_host = re.sub(r"[^\w.-]", "_", host)
+            path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_host}.cast")
+        self.path = path
+        self.record_input = bool(os.environ.get("SSHTOOL_RECORD_INPUT")) if record_input is None else record_input
+        self._started = time.monotonic()
+        self._events = queue.Queue()
+        self._decoders = {kind: codecs.getincrementaldecoder("utf-8")(errors="replace") for kind in "io"}
+
+        self._file = self._open_private(path)
+        self._index = self._open_private(path + ".idx")
+        if self._file.tell() == 0:
+            header = {"version": 2, "width": width, "height": height, "timestamp": int(time.time()),
+                      "title": f"SSH Tool - {host}", "env": {"TERM": os.environ.get("TERM", "xterm")}}
+            self._file.write(json.dumps(header).encode() + b"\n")
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    """
+    Métodos que registran la salida del servidor y la entrada del usuario (bytes o texto). No bloquean.
+    La entrada se descarta si no se ha pedido grabarla (record_input).
+    """
+
+    def output(self, data):
+        self._events.put((time.monotonic() - self._started, "o", data))
+
+    def input(self, data):
+        if self.record_input:
+            self._events.put((time.monotonic() - self._started, "i", data))
+
+    """
+    Método que termina la grabación: espera a que el hilo escriba los eventos pendientes y cierra los archivos.
+    """
+
+    def close(self):
+        self._events.put(None)
+        self._writer.join()
+        self._file.close()
+        self._index.close()
+
+    """
+    Método estático que lee el índice de una grabación y devuelve dos listas: tiempos y posiciones.
+    """
+
+    @staticmethod
+    def read_index(path):
+        times, offsets = [], []
+        try:
+            with open(path + ".idx", "rb") as index:
+                data = index.read()
+        except FileNotFoundError:
+            return times, offsets
+        usable = len(data) - len(data) % SessionRecorder.INDEX_ENTRY.size
+        for elapsed, offset in SessionRecorder.INDEX_ENTRY.iter_unpack(data[:usable]):
+            times.append(elapsed)
+            offsets.append(offset)
+        return times, offsets
+
+    """
+    Método estático (generador) que devuelve los eventos (tiempo, tipo, texto) de una grabación a partir de un
+    instante. Con el índice se salta directamente cerca de ese instante en lugar de leer desde el principio.
+    """
+
+    @staticmethod
+    def events(path, start=0.0):
+        times, offsets = SessionRecorder.read_index(path)
+        position = bisect.bisect_right(times, start) - 1
+        with open(path, "rb") as recording:
+            if position >= 0:
+                recording.seek(offsets[position])
+            else:
+                recording.readline()  # Cabecera
+            for line in recording:
+                try:
+                    elapsed, kind, text = json.loads(line)
+                except ValueError:
+                    continue  # Línea incompleta (ej: la sesión se cortó mientras se escribía)
+                if elapsed >= start:
+                    yield elapsed, kind, text
+
+    """
+    Método estático auxiliar que abre un archivo para añadir al final, creándolo con permisos 0600 si no existe.
+    """
+
+    @staticmethod
+    def _open_private(path):
+        return os.fdopen(os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600), "ab")
+
+    """
+    Método auxiliar (hilo) que escribe los eventos de la cola, juntando los que llegan seguidos.
+    """
+
+    def _write_loop(self):
+        pending = None  # [tiempo, tipo, texto] que todavía puede crecer con eventos siguientes
+        next_index = 0.0
+        finished = False
+        while not finished:
+            # Espera el primer evento y después recoge sin esperar todos los que ya estén en la cola
+            batch = [self._events.get()]
+            while True:
+                try:
+                    batch.append(self._events.get_nowait())
+                except queue.Empty:
+                    break
+
+            for event in batch:
+                if event is None:
+                    finished = True
+                    break
+                elapsed, kind, data = event
+                text = self._decoders[kind].decode(data) if isinstance(data, bytes) else data
+                if pending and pending[1] == kind and elapsed - pending[0] < self.COALESCE_SECONDS:
+                    pending[2] += text
+                    continue
+                if pending:
+                    next_index = self._write_event(pending, next_index)
+                pending = [elapsed, kind, text]
+
+            if pending and (finished or self._events.empty()):
+                next_index = self._write_event(pending, next_index)
+                pending = None
+            self._file.flush()
+            self._index.flush()
+
+    def _write_event(self, event, next_index):
+        elapsed, kind, text = event
+        if not text:
+            return next_index
+        if elapsed >= next_index:
+            self._index.write(self.INDEX_ENTRY.pack(elapsed, self._file.tell()))
+            next_index = elapsed + self.INDEX_INTERVAL
+        self._file.write(json.dumps([round(elapsed, 6), kind, text], ensure_ascii=False).encode() + b"\n")
+        return next_index
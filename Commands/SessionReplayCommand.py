@@ -0,0 +1,142 @@
+# Importaciones necesarias de librerías
+import glob
+import os
+import re
+import sys
+import time
+from rich.console import Console
+from rich.markup import escape
+from rich.panel import Panel
+from rich.prompt import Prompt
+from rich.table import Table
+# Importaciones necesarias de otras clases
+from Commands.SessionRecorder import SessionRecorder
+
+"""
+Clase que permite revisar las sesiones grabadas con SessionRecorder: reproducirlas en la terminal (desde el principio
+o desde cualquier instante, a la velocidad elegida) y buscar en ellas con expresiones regulares.
+La reproducción desde un instante usa el índice de la grabación para no leer todo lo anterior.
+"""
+
+
+class SessionReplayCommand:
+    # Pausa máxima (segundos) entre dos eventos al reproducir (los silencios largos se acortan)
+    MAX_IDLE = 2.0
+    # Número máximo de coincidencias que se muestran en una búsqueda
+    MAX_MATCHES = 200
+
+    # Secuencias de escape ANSI (colores, movimiento del cursor...), que se quitan antes de buscar
+    ANSI_ESCAPE = re.compile(r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+
+    """
+    Constructor de la clase.
+    :param directory: Directorio de las grabaciones (por defecto el de SessionRecorder)
+    """
+
+    def __init__(self, directory=None):
+        self.directory = os.path.expanduser(
+            directory or os.environ.get("SSHTOOL_RECORD_DIR", SessionRecorder.DIRECTORY))
+        self.console = Console()
+
+    """
+    Método principal que muestra las grabaciones disponibles y el menú de reproducción y búsqueda.
+    """
+
+    def run(self):
+        self.console.print(Panel("🎞️ [bold]Sesiones grabadas[/bold]", style="magenta"))
+        recordings = sorted(glob.glob(os.path.join(self.directory, "*.cast")), reverse=True)
+        if not recordings:
+            self.console.print(f"[yellow]⚠ No hay sesiones grabadas en {escape(self.directory)}[/yellow]")
+            return
+
+        table = Table()
+        table.add_column("#", justify="right")
+        table.add_column("Grabación")
+        table.add_column("Tamaño", justify="right")
+        for number, path in enumerate(recordings, 1):
+            table.add_row(str(number), escape(os.path.basename(path)), f"{os.path.getsize(path) / 1024:.1f} KB")
+        self.console.print(table)
+        choice = Prompt.ask("[ ] Grabación", choices=[str(n) for n in range(1, len(recordings) + 1)], default="1")
+        path = recordings[int(choice) - 1]
+
+        while True:
+            action = Prompt.ask("[ ] ¿Qué desea hacer?", choices=["reproducir", "buscar", "volver"],
+                                default="reproducir")
+            if action == "volver":
+                return
+            try:
+                if action == "reproducir":
+                    start = float(Prompt.ask("[⏱️] Empezar en el segundo", default="0"))
+                    speed = float(Prompt.ask("[⏩] Velocidad", default="1"))
+                    self.replay(path, start, speed)
+                else:
+                    self.show_search(path, Prompt.ask("[🔎] Expresión regular"))
+            except KeyboardInterrupt:
+                self.console.print("\n[yellow]⚠ Reproducción interrumpida[/yellow]")
+            except Exception as e:
+                self.console.print(f"[bold red]✖ Error con la grabación: {e}[/bold red]")
+
+    """
+    Método que reproduce la salida de una grabación en la terminal respetando los tiempos (divididos por speed).
+    """
+
+    def replay(self, path, start=0.0, speed=1.0, output=None):
+        output = output or sys.stdout
+        previous = start
+        for elapsed, kind, text in SessionRecorder.events(path, start):
+            if kind != "o":
+                continue
+            time.sleep(min(elapsed - previous, self.MAX_IDLE) / speed)
+            previous = elapsed
+            output.write(text)
+            output.flush()
+        output.write("\n")
+
+    """
+    Método estático (generador) que busca una expresión regular en la salida de una grabación, línea a línea y sin
+    las secuencias de escape de la terminal. Devuelve tuplas (instante, línea) con las líneas que coinciden; el
+    instante es el de la llegada del final de la línea (las que llegaron partidas se juntan antes de buscar).
+    """
+
+    @staticmethod
+    def search(path, pattern, ignore_case=True):
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        pending, elapsed = "", 0.0
+        for elapsed, kind, text in SessionRecorder.events(path):
+            if kind != "o":
+                continue
+            *lines, pending = (pending + text).split("\n")
+            for line in lines:
+                line = SessionReplayCommand.ANSI_ESCAPE.sub("", line).rstrip("\r")
+                if regex.search(line):
+                    yield elapsed, line
+        line = SessionReplayCommand.ANSI_ESCAPE.sub("", pending)
+        if line and regex.search(line):
+            yield elapsed, line
+
+    """
+    Método que muestra las coincidencias de una búsqueda con el instante de cada una y permite reproducir la sesión
+    desde cualquiera de ellas.
+    """
+
+    def show_search(self, path, pattern):
+        matches = []
+        for elapsed, line in self.search(path, pattern):
+            matches.append(elapsed)
+            self.console.print(f"[cyan]{len(matches):>4}[/cyan] [dim]{self._format_time(elapsed)}[/dim] "
+                               f"{escape(line)}", highlight=False)
+            if len(matches) >= self.MAX_MATCHES:
+                self.console.print(f"[yellow]⚠ Se muestran solo las primeras {self.MAX_MATCHES} coincidencias[/yellow]")
+                break
+        if not matches:
+            self.console.print("[yellow]⚠ Sin coincidencias[/yellow]")
+            return
+        choice = Prompt.ask("[ ] Reproducir desde la coincidencia (vacío = no)", default="")
+        if choice.isdigit() and 1 <= int(choice) <= len(matches):
+            self.replay(path, max(matches[int(choice) - 1] - 1.0, 0.0))
+
+    @staticmethod
+    def _format_time(seconds):
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
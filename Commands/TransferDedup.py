@@ -0,0 +1,138 @@
+# Importaciones necesarias de librerías
+import atexit
+import dbm
+import hashlib
+import os
+import shlex
+import threading
+# Importaciones necesarias de otras clases
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que evita subir archivos que ya están en el servidor con el mismo contenido.
+Antes de una subida se compara el sha256 del archivo local con el del archivo remoto (calculado en el servidor con
+sha256sum sobre un canal exec, sin descargarlo). Los dos resultados se guardan en un índice en disco (dbm):
+- Local: por ruta, tamaño y fecha de modificación, para no volver a leer un archivo que no ha cambiado.
+- Remoto: por servidor, ruta, tamaño y fecha de modificación remota, para no volver a ejecutar sha256sum.
+Tras cada subida se guarda el hash del archivo remoto recién escrito, así que un despliegue repetido sin cambios
+solo hace un stat por archivo.
+"""
+
+
+class TransferDedup:
+    # Bytes que se leen de cada vez al calcular el hash de un archivo local
+    HASH_CHUNK = 1024 * 1024
+
+    # Instancia compartida por todas las transferencias (se crea la primera vez que se pide)
+    _default = None
+
+    """
+    Constructor de la clase.
+    :param index_path: Ruta del índice dbm con los hashes conocidos
+    """
+
+    def __init__(self, index_path="~/.sshtool/transfer-hashes"):
+        self.index_path = os.path.expanduser(index_path)
+        self._index = None  # El índice se abre la primera vez que se consulta
+        self._lock = threading.Lock()
+
+    """
+    Método estático que devuelve el índice compartido del usuario.
+    """
+
+    @staticmethod
+    def default():
+        if TransferDedup._default is None:
+            TransferDedup._default = TransferDedup()
+        return TransferDedup._default
+
+    """
+    Método que devuelve el sha256 (hexadecimal) de un archivo local, desde el índice si no ha cambiado.
+    """
+
+    def local_hash(self, path):
+        path = os.path.abspath(path)
+        info = os.stat(path)
+        key = f"L|{path}|{info.st_size}|{info.st_mtime_ns}"
+        digest = self._get(key)
+        if digest is None:
+            sha256 = hashlib.sha256()
+            with open(path, "rb") as local_file:
+                for chunk in iter(lambda: local_file.read(self.HASH_CHUNK), b""):
+                    sha256.update(chunk)
+            digest = sha256.hexdigest()
+            self._put(key, digest)
+        return digest
+
+    """
+    Método que devuelve el sha256 de un archivo remoto (None si no se puede calcular), desde el índice si el archivo
+    no ha cambiado en el servidor.
+    :param server: Identificador del servidor (ej: "usuario@host:puerto")
+    :param attributes: Resultado de sftp.stat() del archivo (tamaño y fecha que identifican la versión)
+    """
+
+    def remote_hash(self, client, server, path, attributes):
+        key = self._remote_key(server, path, attributes)
+        digest = self._get(key)
+        if digest is None:
+            quoted = shlex.quote(path)
+            # sha256sum (GNU coreutils) o, si no existe, shasum (macOS y BSD)
+            _, stdout, _ = client.exec_command(f"sha256sum -- {quoted} 2>/dev/null || shasum -a 256 -- {quoted}")
+            output = stdout.read().decode("utf-8", errors="replace").split()
+            if stdout.channel.recv_exit_status() != 0 or not output or len(output[0]) != 64:
+                return None
+            digest = output[0].lower()
+            self._put(key, digest)
+        return digest
+
+    """
+    Método que indica si el archivo remoto ya tiene el mismo contenido que el local.
+    Si el archivo no existe o el tamaño no coincide se responde sin calcular ningún hash.
+    """
+
+    def is_identical(self, client, sftp, server, local_path, remote_path):
+        try:
+            attributes = sftp.stat(remote_path)
+        except IOError:
+            return False
+        if attributes.st_size != os.path.getsize(local_path):
+            result = False
+        else:
+            result = self.remote_hash(client, server, remote_path, attributes) == self.local_hash(local_path)
+        Metrics.count("transfer.dedup", host=server, result="skipped" if result else "changed")
+        return result
+
+    """
+    Método que guarda, tras una subida, que el archivo remoto tiene el contenido del local (con la fecha que le ha
+    puesto el servidor), de modo que la próxima comparación no necesite ejecutar sha256sum.
+    """
+
+    def record(self, sftp, server, local_path, remote_path):
+        self._put(self._remote_key(server, remote_path, sftp.stat(remote_path)), self.local_hash(local_path))
+
+    def close(self):
+        with self._lock:
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+    @staticmethod
+    def _remote_key(server, path, attributes):
+        return f"R|{server}|{path}|{attributes.st_size}|{attributes.st_mtime}"
+
+    def _get(self, key):
+        with self._lock:
+            value = self._open_index().get(key.encode())
+        return value.decode() if value is not None else None
+
+    def _put(self, key, digest):
+        with self._lock:
+            self._open_index()[key.encode()] = digest.encode()
+
+    def _open_index(self):
+        if self._index is None:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            self._index = dbm.open(self.index_path, "c")
+            # Los hashes calculados se vuelcan a disco al salir de la herramienta
+            atexit.register(self.close)
+        return self._index
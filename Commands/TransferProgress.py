@@ -0,0 +1,173 @@
+# Importaciones necesarias de librerías
+import re
+import threading
+import time
+from rich.console import Console
+from rich.progress import (BarColumn, DownloadColumn, Progress, ProgressColumn, TextColumn, TimeRemainingColumn,
+                           TransferSpeedColumn)
+from rich.text import Text
+
+"""
+Clase que muestra el progreso de una o varias transferencias (SFTP o SCP) en una única vista Rich en vivo:
+una fila por archivo y una fila "Total" que agrega todas, con bytes transferidos, velocidad y tiempo restante.
+Si una transferencia no avanza durante STALL_SECONDS se marca como detenida para que se vea sin esperar a ciegas.
+
+Es segura entre hilos (varias transferencias concurrentes pueden informar a la vez). Los callbacks están
+limitados a una actualización cada UPDATE_INTERVAL segundos, así que llamarlos por cada bloque no frena la copia.
+
+Ejemplo de uso:
+    with TransferProgress(console) as progress:
+        callback = progress.callback("archivo.iso", tamaño)
+        profile.put(sftp, origen, destino, callback=callback)
+"""
+
+
+class TransferProgress:
+    # Tiempo mínimo (segundos) entre dos actualizaciones de una misma transferencia
+    UPDATE_INTERVAL = 0.1
+    # Tiempo (segundos) sin avanzar a partir del cual una transferencia se muestra como detenida
+    STALL_SECONDS = 10
+
+    # Línea de progreso de scp, ej: "archivo.iso   45%   23MB  11.5MB/s   00:02 ETA"
+    SCP_PROGRESS = re.compile(r"(\d+)%\s+(\d+(?:\.\d+)?)([KMGT]?B)\s")
+
+    def __init__(self, console=None):
+        self.console = console or Console()
+        self.progress = Progress(
+            TextColumn("[bold blue]{task.description}", justify="left"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TimeRemainingColumn(),
+            _StallColumn(self.STALL_SECONDS),
+            console=self.console,
+            transient=False,
+        )
+        self._lock = threading.Lock()
+        self._total_task = None
+        self._grand_total = 0
+        self._tasks = {}  # id de tarea -> {"name", "total", "completed", "done"}
+
+    def __enter__(self):
+        self.progress.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.progress.stop()
+        return False
+
+    """
+    Método que añade una transferencia y devuelve su callback (transferidos, total), compatible con el parámetro
+    callback de paramiko y de TransportProfile.put()/get().
+    :param name: Nombre a mostrar (normalmente el nombre del archivo)
+    :param total: Tamaño en bytes (None si no se conoce)
+    """
+
+    def callback(self, name, total=None):
+        task_id = self.add(name, total)
+        state = {"last": 0.0}
+
+        def update(transferred, size):
+            now = time.monotonic()
+            # La última actualización (transferidos == total) siempre se muestra; size es None si no se conoce
+            if now - state["last"] < self.UPDATE_INTERVAL and (size is None or transferred < size):
+                return
+            state["last"] = now
+            self.update(task_id, transferred, size)
+
+        update.task_id = task_id
+        return update
+
+    """
+    Método que añade una transferencia a la vista y devuelve el identificador de su tarea.
+    """
+
+    def add(self, name, total=None):
+        now = time.monotonic()
+        with self._lock:
+            if self._total_task is None:
+                # La fila total solo se muestra cuando hay más de una transferencia
+                self._total_task = self.progress.add_task("Total", total=None, last_change=now, visible=False)
+            task_id = self.progress.add_task(name, total=total, last_change=now)
+            self._tasks[task_id] = {"name": name, "total": total, "completed": 0, "done": False}
+            if total:
+                self._add_to_total(total)
+            self.progress.update(self._total_task, done=False, visible=len(self._tasks) > 1)
+        return task_id
+
+    """
+    Método que actualiza una transferencia (y la fila total) con los bytes transferidos.
+    """
+
+    def update(self, task_id, transferred, total=None):
+        now = time.monotonic()
+        with self._lock:
+            state = self._tasks[task_id]
+            if total and not state["total"]:
+                # El tamaño se conoce al empezar a transferir (ej: descargas): se suma al total agregado
+                state["total"] = total
+                self._add_to_total(total)
+                self.progress.update(task_id, total=total)
+            delta = transferred - state["completed"]
+            if delta <= 0:
+                return
+            state["completed"] = transferred
+            self.progress.update(task_id, completed=transferred, last_change=now)
+            self.progress.update(self._total_task, advance=delta, last_change=now)
+
+    """
+    Método que marca una transferencia como terminada (o fallida); deja de comprobarse si está detenida.
+    Cuando terminan todas, la fila total también se da por terminada.
+    """
+
+    def finish(self, task_id, ok=True):
+        with self._lock:
+            state = self._tasks[task_id]
+            state["done"] = True
+            mark = "[green]✔ " if ok else "[red]✖ "
+            self.progress.update(task_id, description=mark + state["name"], done=True)
+            self.progress.stop_task(task_id)
+            if all(task["done"] for task in self._tasks.values()):
+                self.progress.update(self._total_task, done=True)
+
+    def _add_to_total(self, size):
+        self._grand_total += size
+        self.progress.update(self._total_task, total=self._grand_total)
+
+    """
+    Método que interpreta la salida de scp (solo la muestra cuando tiene una terminal) y actualiza la tarea.
+    Devuelve True si el texto contenía una línea de progreso.
+    """
+
+    def update_from_scp(self, task_id, output):
+        matches = self.SCP_PROGRESS.findall(output)
+        if not matches:
+            return False
+        percent, amount, unit = matches[-1]
+        total = self._tasks[task_id]["total"]
+        if total:
+            transferred = total * int(percent) // 100
+        else:
+            transferred = int(float(amount) * 1024 ** "BKMGT".index(unit[0]))
+        self.update(task_id, transferred)
+        return True
+
+
+"""
+Columna que indica si una transferencia lleva demasiado tiempo sin avanzar.
+"""
+
+
+class _StallColumn(ProgressColumn):
+
+    def __init__(self, stall_seconds):
+        super().__init__()
+        self.stall_seconds = stall_seconds
+
+    def render(self, task):
+        if task.finished or task.fields.get("done"):
+            return Text("")
+        idle = time.monotonic() - task.fields.get("last_change", time.monotonic())
+        if idle >= self.stall_seconds:
+            return Text(f"⚠ detenida {int(idle)}s", style="bold yellow")
+        return Text("")
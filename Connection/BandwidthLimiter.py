@@ -0,0 +1,224 @@
+# Importaciones necesarias de librerías
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+# Importaciones necesarias de otras clases
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que limita el ancho de banda de las transferencias para que una copia grande no sature el enlace y deje sin
+respuesta a los shells interactivos.
+- Los límites son cubos de tokens (TokenBucket): por transferencia, por servidor y global. Cada bloque que se envía
+  o se pide tiene que pasar por todos los cubos que le afectan.
+- Cuando varias transferencias esperan en el mismo cubo, se atienden con reparto justo ponderado (start-time fair
+  queuing): cada una recibe una parte proporcional a su peso (WEIGHTS), así que una copia entre servidores no se
+  queda atrás frente a varias subidas, por muchas que haya.
+- El tráfico interactivo tiene prioridad: consume tokens (cuenta para el límite) pero nunca espera, y son las
+  transferencias las que frenan para dejarle sitio.
+- scp (que es un proceso aparte) no pasa por los cubos: se le pasa el límite equivalente con -l.
+
+Los límites se configuran con la variable SSHTOOL_BWLIMIT, en bytes por segundo con sufijo K, M o G:
+    SSHTOOL_BWLIMIT="global=20M,host=10M,backup.example.com=2M,transfer=5M"
+(global = todo el tráfico, host = cada servidor sin límite propio, <servidor> = ese servidor,
+transfer = cada transferencia). Sin la variable no se limita nada.
+
+Ejemplo de uso:
+    flow = BandwidthLimiter.default().flow("backup.example.com")
+    profile.put(sftp, local_path, remote_path, throttle=flow.throttle)
+"""
+
+
+class BandwidthLimiter:
+    # Peso de cada tipo de tráfico en el reparto (None = prioridad: no espera)
+    WEIGHTS = {"interactivo": None, "copia": 4, "transferencia": 1}
+
+    # Instancia compartida configurada con SSHTOOL_BWLIMIT
+    _default = None
+    _default_lock = threading.Lock()
+
+    """
+    Constructor de la clase. Los límites están en bytes por segundo (None = sin límite).
+    :param host_rates: Diccionario servidor -> límite para servidores concretos
+    """
+
+    def __init__(self, global_rate=None, host_rate=None, host_rates=None, transfer_rate=None):
+        self.global_bucket = TokenBucket(global_rate) if global_rate else None
+        self.host_rate = host_rate
+        self.host_rates = host_rates or {}
+        self.transfer_rate = transfer_rate
+        self._host_buckets = {}
+        self._lock = threading.Lock()
+
+    """
+    Método estático que devuelve el limitador compartido, configurado la primera vez con SSHTOOL_BWLIMIT.
+    """
+
+    @staticmethod
+    def default():
+        with BandwidthLimiter._default_lock:
+            if BandwidthLimiter._default is None:
+                BandwidthLimiter._default = BandwidthLimiter.from_spec(os.environ.get("SSHTOOL_BWLIMIT", ""))
+            return BandwidthLimiter._default
+
+    """
+    Método estático que crea un limitador a partir de una especificación "global=20M,host=10M,web1=2M,transfer=5M".
+    """
+
+    @staticmethod
+    def from_spec(spec):
+        limits = {"global": None, "host": None, "transfer": None}
+        host_rates = {}
+        for item in (spec or "").split(","):
+            if not item.strip():
+                continue
+            name, _, value = item.partition("=")
+            name, rate = name.strip(), BandwidthLimiter.parse_rate(value)
+            if name in limits:
+                limits[name] = rate
+            else:
+                host_rates[name] = rate
+        return BandwidthLimiter(limits["global"], limits["host"], host_rates, limits["transfer"])
+
+    """
+    Método estático que convierte un límite como "512K", "20M" o "1.5G" (bytes por segundo) en un número.
+    Devuelve None si está vacío o es 0 (sin límite).
+    """
+
+    @staticmethod
+    def parse_rate(text):
+        if not text or not text.strip():
+            return None
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)\s*", text, re.IGNORECASE)
+        if not match:
+            raise ValueError(f"Límite de velocidad no válido: {text}")
+        rate = float(match.group(1)) * 1024 ** " KMG".index(match.group(2).upper() or " ")
+        return int(rate) or None
+
+    """
+    Método que crea el flujo de una transferencia (o de un shell interactivo) hacia un servidor.
+    :param kind: Tipo de tráfico (ver WEIGHTS)
+    :param rate: Límite propio de este flujo (por defecto el de "transfer"; los interactivos no tienen)
+    """
+
+    def flow(self, host, kind="transferencia", rate=None):
+        weight = self.WEIGHTS[kind]
+        if weight is not None:
+            rate = rate or self.transfer_rate
+        else:
+            rate = None
+        buckets = [TokenBucket(rate) if rate else None, self._host_bucket(host), self.global_bucket]
+        return Flow(host, kind, weight, [bucket for bucket in buckets if bucket])
+
+    """
+    Método que devuelve el límite más restrictivo que se aplicaría a una transferencia a un servidor, en Kbit/s
+    (la unidad de scp -l), o None si no hay ninguno.
+    """
+
+    def scp_limit(self, host, rate=None):
+        rates = [rate or self.transfer_rate, self.host_rates.get(host, self.host_rate),
+                 self.global_bucket.rate if self.global_bucket else None]
+        rates = [rate for rate in rates if rate]
+        return max(int(min(rates) * 8 / 1024), 1) if rates else None
+
+    def _host_bucket(self, host):
+        rate = self.host_rates.get(host, self.host_rate)
+        if not rate:
+            return None
+        with self._lock:
+            if host not in self._host_buckets:
+                self._host_buckets[host] = TokenBucket(rate)
+            return self._host_buckets[host]
+
+
+"""
+Clase que representa el tráfico de una transferencia: los cubos por los que pasa y su peso en el reparto.
+Su método throttle se pasa como parámetro throttle a TransportProfile (se llama antes de cada bloque).
+"""
+
+
+class Flow:
+
+    def __init__(self, host, kind, weight, buckets):
+        self.host = host
+        self.kind = kind
+        self.weight = weight
+        self.buckets = buckets
+        self.waited = 0.0  # Segundos que ha esperado en total por los límites
+        self.tags = {}  # Etiqueta de fin de su último bloque en cada cubo (para el reparto justo)
+
+    """
+    Método que espera hasta que se puedan enviar (o pedir) size bytes sin superar ningún límite.
+    """
+
+    def throttle(self, size):
+        if not self.buckets:
+            return
+        started = time.monotonic()
+        for bucket in self.buckets:
+            bucket.acquire(size, self)
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self.waited += waited
+            Metrics.count("bandwidth.wait_seconds", waited, host=self.host, kind=self.kind)
+
+
+"""
+Clase que implementa un cubo de tokens con reparto justo entre quienes esperan.
+Se admiten deudas: un bloque mayor que los tokens disponibles pasa en cuanto el saldo no es negativo y deja el saldo
+en negativo, de modo que el siguiente espera lo que corresponda. Así el tamaño de bloque no tiene que ser menor que
+la ráfaga permitida.
+"""
+
+
+class TokenBucket:
+    # Ráfaga máxima en segundos de tráfico (los tokens no se acumulan más allá)
+    BURST_SECONDS = 0.25
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.capacity = rate * self.BURST_SECONDS
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._virtual = 0.0  # Tiempo virtual: etiqueta de inicio del último bloque atendido
+        self._waiting = []  # Montículo de (etiqueta de inicio, orden de llegada) de quienes esperan
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    """
+    Método que espera a que el flujo pueda enviar size bytes. Los flujos esperan por orden de etiqueta de inicio
+    (start-time fair queuing): max(tiempo virtual, fin de su bloque anterior), y cada bloque avanza su etiqueta en
+    size / peso. Un flujo con más peso avanza más despacio y pasa antes; uno que ha estado inactivo entra con el
+    tiempo virtual actual, sin acumular turnos.
+    """
+
+    def acquire(self, size, flow):
+        with self._condition:
+            if flow.weight is None:
+                # Prioridad (interactivo): se descuenta sin esperar
+                self._refill()
+                self.tokens -= size
+                return
+            start = max(self._virtual, flow.tags.get(id(self), 0.0))
+            entry = (start, next(self._sequence))
+            heapq.heappush(self._waiting, entry)
+            while True:
+                if self._waiting[0] == entry:
+                    self._refill()
+                    if self.tokens >= 0:
+                        heapq.heappop(self._waiting)
+                        self.tokens -= size
+                        self._virtual = start
+                        flow.tags[id(self)] = start + size / flow.weight
+                        self._condition.notify_all()
+                        return
+                    self._condition.wait(-self.tokens / self.rate)
+                else:
+                    self._condition.wait()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
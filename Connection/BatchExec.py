@@ -0,0 +1,130 @@
+# Importaciones necesarias de librerías
+import re
+import secrets
+import select
+import shlex
+import time
+# Importaciones necesarias de otras clases
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que ejecuta una lista de comandos en un único canal SSH, en lugar de abrir un canal (y esperar su ida y
+vuelta) por cada uno.
+Los comandos se envían juntos dentro de un script que, tras cada uno, escribe una marca con su número y su código de
+salida en stdout y otra con su número en stderr. Las marcas llevan un separador aleatorio, así que la salida de los
+comandos no puede confundirse con ellas, y permiten separar la salida de cada comando al recibirla.
+Los comandos se ejecutan en la misma shell, uno tras otro, como en un script (un cd afecta a los siguientes).
+
+Ejemplo de uso:
+    for result in BatchExec.run(client, ["uptime", "df -h /", "systemctl is-active nginx"]):
+        print(result["command"], result["exit_status"], result["duration"], result["stdout"])
+"""
+
+
+class BatchExec:
+    # Tamaño máximo de cada lectura del canal
+    READ_SIZE = 32768
+
+    """
+    Método estático que ejecuta los comandos y devuelve una lista con un diccionario por comando:
+    command, stdout, stderr, exit_status y duration (segundos, medidos por la llegada de la marca de cada comando).
+    Los comandos que no llegan a ejecutarse (por stop_on_error o porque uno anterior hace exit) tienen exit_status
+    None.
+    :param stop_on_error: Si es True, se deja de ejecutar tras el primer comando que termine con error
+    :param host: Nombre del servidor (solo se usa como etiqueta de las métricas)
+    :param timeout: Tiempo máximo (segundos) sin recibir datos antes de abandonar la ejecución
+    """
+
+    @staticmethod
+    def run(client, commands, stop_on_error=False, host=None, timeout=None):
+        boundary = f"__sshtool_{secrets.token_hex(8)}__"
+        script = BatchExec.build_script(commands, boundary, stop_on_error)
+        out_frame = re.compile(rb"\n" + boundary.encode() + rb" (\d+) (\d+)\n")
+        err_frame = re.compile(rb"\n" + boundary.encode() + rb" (\d+)\n")
+
+        with Metrics.span("ssh.batch", host=host, commands=len(commands)) as span:
+            channel = client.get_transport().open_session()
+            try:
+                channel.exec_command(f"sh -c {shlex.quote(script)}")
+                started = time.monotonic()
+                channel.shutdown_write()  # Los comandos que lean de la entrada estándar reciben EOF
+                stdout, stderr = bytearray(), bytearray()
+                finished = []  # (instante de llegada, código de salida) de cada comando terminado
+                searched = 0
+                while not (channel.eof_received and not channel.recv_ready() and not channel.recv_stderr_ready()):
+                    readable, _, _ = select.select([channel], [], [], timeout)
+                    if not readable:
+                        raise TimeoutError(f"Sin respuesta del servidor en {timeout} segundos")
+                    if channel.recv_stderr_ready():
+                        stderr += channel.recv_stderr(BatchExec.READ_SIZE)
+                    if channel.recv_ready():
+                        data = channel.recv(BatchExec.READ_SIZE)
+                        if not data:
+                            continue
+                        stdout += data
+                        now = time.monotonic()
+                        # Solo se busca desde el final de la última marca encontrada (menos lo que pueda ocupar una)
+                        for match in out_frame.finditer(stdout, max(searched - len(boundary) - 32, 0)):
+                            if int(match.group(1)) == len(finished):
+                                finished.append((now, int(match.group(2))))
+                        searched = len(stdout)
+                exit_status = channel.recv_exit_status()
+                # Si la ejecución se cortó sin que lo pidiese stop_on_error (ej: un exit), el código de salida del
+                # canal es el del comando que la cortó
+                stopped = stop_on_error and finished and finished[-1][1] != 0
+                if len(finished) < len(commands) and not stopped:
+                    finished.append((time.monotonic(), exit_status))
+            finally:
+                channel.close()
+            span.set(executed=len(finished))
+
+        out_parts = BatchExec._split(stdout, out_frame)
+        err_parts = BatchExec._split(stderr, err_frame)
+        results = []
+        previous = started
+        for index, command in enumerate(commands):
+            result = {"command": command, "stdout": "", "stderr": "", "exit_status": None, "duration": None}
+            if index < len(finished):
+                arrival, status = finished[index]
+                result.update(exit_status=status, duration=arrival - previous)
+                previous = arrival
+                result["stdout"] = BatchExec._decode(out_parts, index)
+                result["stderr"] = BatchExec._decode(err_parts, index)
+            results.append(result)
+        return results
+
+    """
+    Método estático que construye el script que ejecuta los comandos y escribe las marcas.
+    Cada comando va entre llaves y en líneas propias, así que puede contener tuberías, ";", "&&" o comentarios
+    (el ":" inicial evita un bloque vacío si el comando es solo un comentario).
+    El salto de línea inicial de cada marca garantiza que empiece en una línea nueva; al separar la salida se quita.
+    """
+
+    @staticmethod
+    def build_script(commands, boundary, stop_on_error=False):
+        lines = []
+        for index, command in enumerate(commands):
+            lines.append("{ :\n" + command + "\n}")
+            lines.append(f"__status=$?; printf '\\n%s %d %d\\n' '{boundary}' {index} $__status; "
+                         f"printf '\\n%s %d\\n' '{boundary}' {index} >&2")
+            if stop_on_error:
+                lines.append('[ "$__status" -eq 0 ] || exit "$__status"')
+        return "\n".join(lines) + "\n"
+
+    """
+    Métodos auxiliares que separan la salida recibida por las marcas y la convierten a texto.
+    """
+
+    @staticmethod
+    def _split(data, frame):
+        parts = []
+        position = 0
+        for match in frame.finditer(data):
+            parts.append(data[position:match.start()])
+            position = match.end()
+        parts.append(data[position:])
+        return parts
+
+    @staticmethod
+    def _decode(parts, index):
+        return bytes(parts[index]).decode("utf-8", errors="replace") if index < len(parts) else ""
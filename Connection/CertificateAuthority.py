@@ -0,0 +1,302 @@
+# Importaciones necesarias de librerías
+import base64
+import json
+import os
+import re
+import struct
+import threading
+import time
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives.serialization import ssh
+
+"""
+Clase que implementa una autoridad de certificación (CA) SSH dentro del propio proceso.
+Permite:
+- Generar la clave de la CA
+- Firmar certificados de usuario o de host, uno a uno o en lote, sin lanzar un ssh-keygen por certificado
+- Llevar un registro (ledger) de los números de serie emitidos
+- Revocar certificados y mantener la lista de revocación (KRL) en el formato binario de OpenSSH
+- Configurar el servidor remoto para confiar en la CA de forma idempotente (sin reiniciar sshd en cada conexión)
+"""
+
+
+class CertificateAuthority:
+    # Línea que se añade a sshd_config para que el servidor acepte certificados firmados por la CA
+    TRUSTED_CA_LINE = "TrustedUserCAKeys ~/.ssh/ca.pub"
+
+    # Extensiones que ssh-keygen añade por defecto a los certificados de usuario (ordenadas como exige OpenSSH)
+    DEFAULT_USER_EXTENSIONS = [
+        "permit-X11-forwarding",
+        "permit-agent-forwarding",
+        "permit-port-forwarding",
+        "permit-pty",
+        "permit-user-rc",
+    ]
+
+    # Constantes del formato KRL de OpenSSH (ver PROTOCOL.krl)
+    KRL_MAGIC = 0x5353484b524c0a00
+    KRL_FORMAT_VERSION = 1
+    KRL_SECTION_CERTIFICATES = 1
+    KRL_SECTION_CERT_SERIAL_LIST = 0x20
+
+    # Unidades admitidas en la validez (mismo formato que ssh-keygen -V, ej: +52w, +8h)
+    VALIDITY_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+    """
+    Constructor de la clase.
+    :param ca_key_path: Ruta de la clave privada de la CA (la pública debe estar en la misma ruta con .pub)
+    :param ledger_path: Ruta del registro de números de serie (por defecto junto a la clave de la CA)
+    :param krl_path: Ruta de la lista de revocación KRL (por defecto junto a la clave de la CA)
+    """
+
+    def __init__(self, ca_key_path, ledger_path=None, krl_path=None):
+        self.ca_key_path = os.path.expanduser(ca_key_path)
+        self.ledger_path = ledger_path or self.ca_key_path + ".ledger.json"
+        self.krl_path = krl_path or self.ca_key_path + ".krl"
+        self._ca_key = None  # Se carga la primera vez que se necesita
+        self._lock = threading.Lock()  # Protege la asignación de números de serie
+
+    """
+    Método estático que genera una nueva clave de CA Ed25519 en formato OpenSSH (privada y pública).
+    La clave privada se guarda con permisos 600.
+    """
+
+    @staticmethod
+    def generate_ca_key(ca_key_path, comment="sshtool-ca"):
+        ca_key_path = os.path.expanduser(ca_key_path)
+        key = ed25519.Ed25519PrivateKey.generate()
+
+        private_bytes = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.OpenSSH,
+            serialization.NoEncryption()
+        )
+        public_bytes = key.public_key().public_bytes(
+            serialization.Encoding.OpenSSH,
+            serialization.PublicFormat.OpenSSH
+        )
+
+        # Se crea el archivo directamente con permisos 600 para que la clave nunca sea legible por otros
+        fd = os.open(ca_key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(private_bytes)
+        with open(ca_key_path + ".pub", "wb") as f:
+            f.write(public_bytes + b" " + comment.encode() + b"\n")
+
+        return CertificateAuthority(ca_key_path)
+
+    """
+    Método estático que convierte una validez con formato ssh-keygen (ej: +52w, +8h, 3600) a segundos.
+    """
+
+    @staticmethod
+    def parse_validity(validity):
+        if isinstance(validity, int):
+            return validity
+        match = re.fullmatch(r"\+?(\d+)([smhdw]?)", str(validity).strip())
+        if not match:
+            raise ValueError(f"Validez no reconocida: {validity}")
+        amount, unit = match.groups()
+        return int(amount) * CertificateAuthority.VALIDITY_UNITS.get(unit or "s")
+
+    """
+    Método que devuelve la clave privada de la CA, cargándola del disco solo la primera vez.
+    """
+
+    def load_ca_key(self):
+        if self._ca_key is None:
+            with open(self.ca_key_path, "rb") as f:
+                self._ca_key = serialization.load_ssh_private_key(f.read(), password=None)
+        return self._ca_key
+
+    """
+    Método que devuelve la clave pública de la CA como línea de texto OpenSSH (la que se sube al servidor).
+    """
+
+    def public_key_line(self):
+        with open(self.ca_key_path + ".pub", "r") as f:
+            return f.read().strip()
+
+    """
+    Método que firma una única clave pública. Es un atajo sobre sign_batch().
+    Devuelve la tupla (ruta_del_certificado, número_de_serie).
+    """
+
+    def sign_key(self, pub_key_path, identity, principals, validity="+52w", cert_type="user"):
+        return self.sign_batch([{
+            "pub_key_path": pub_key_path,
+            "identity": identity,
+            "principals": principals,
+            "validity": validity,
+            "cert_type": cert_type,
+        }])[0]
+
+    """
+    Método que firma un lote de claves públicas dentro del proceso.
+    Cada petición es un diccionario con pub_key_path, identity, principals y, opcionalmente, validity y cert_type
+    ("user" o "host"). Los números de serie se reservan en bloque y el registro se escribe una sola vez por lote.
+    El certificado de cada clave se guarda junto a ella con el sufijo -cert.pub (igual que ssh-keygen).
+    Devuelve una lista de tuplas (ruta_del_certificado, número_de_serie) en el mismo orden que las peticiones.
+    """
+
+    def sign_batch(self, requests):
+        ca_key = self.load_ca_key()
+        now = int(time.time())
+
+        with self._lock:
+            ledger = self._load_ledger()
+            first_serial = ledger["next_serial"]
+            ledger["next_serial"] = first_serial + len(requests)
+
+            results = []
+            for offset, request in enumerate(requests):
+                serial = first_serial + offset
+                pub_key_path = os.path.expanduser(request["pub_key_path"])
+                cert_type = request.get("cert_type", "user")
+                principals = request["principals"]
+                if isinstance(principals, str):
+                    principals = [p.strip() for p in principals.split(",") if p.strip()]
+                valid_before = now + self.parse_validity(request.get("validity", "+52w"))
+
+                with open(pub_key_path, "rb") as f:
+                    subject_key = serialization.load_ssh_public_key(f.read())
+
+                builder = (
+                    ssh.SSHCertificateBuilder()
+                    .public_key(subject_key)
+                    .serial(serial)
+                    .type(ssh.SSHCertificateType.HOST if cert_type == "host" else ssh.SSHCertificateType.USER)
+                    .key_id(request["identity"].encode())
+                    .valid_principals([p.encode() for p in principals])
+                    .valid_after(now - 60)  # Margen de un minuto por diferencias de reloj con el servidor
+                    .valid_before(valid_before)
+                )
+                if cert_type != "host":
+                    for extension in self.DEFAULT_USER_EXTENSIONS:
+                        builder = builder.add_extension(extension.encode(), b"")
+
+                certificate = builder.sign(ca_key)
+
+                cert_path = re.sub(r"\.pub$", "", pub_key_path) + "-cert.pub"
+                with open(cert_path, "wb") as f:
+                    f.write(certificate.public_bytes() + b"\n")
+
+                ledger["issued"][str(serial)] = {
+                    "key_id": request["identity"],
+                    "principals": principals,
+                    "type": cert_type,
+                    "issued_at": now,
+                    "valid_before": valid_before,
+                    "cert_path": cert_path,
+                }
+                results.append((cert_path, serial))
+
+            self._save_ledger(ledger)
+
+        return results
+
+    """
+    Método que revoca los números de serie indicados, los guarda en el registro y regenera la KRL.
+    Devuelve la ruta de la KRL (la que debe configurarse en sshd como RevokedKeys).
+    """
+
+    def revoke(self, serials):
+        with self._lock:
+            ledger = self._load_ledger()
+            revoked = set(ledger["revoked"])
+            revoked.update(int(s) for s in serials)
+            ledger["revoked"] = sorted(revoked)
+            self._save_ledger(ledger)
+            self._write_krl(ledger)
+        return self.krl_path
+
+    """
+    Método que devuelve el registro completo de certificados emitidos y revocados.
+    """
+
+    def ledger(self):
+        with self._lock:
+            return self._load_ledger()
+
+    """
+    Método que configura el servidor remoto para confiar en la CA de forma idempotente.
+    Solo sube ca.pub si su contenido ha cambiado y solo modifica sshd_config (y reinicia sshd) si la línea
+    TrustedUserCAKeys todavía no está presente.
+    :param client: Cliente SSH (paramiko) ya conectado
+    :param run_privileged: Función que ejecuta un comando con sudo en el servidor y devuelve True si tuvo éxito
+    :return: True si se modificó la configuración de sshd, False si ya estaba configurado
+    """
+
+    def ensure_server_trust(self, client, run_privileged):
+        ca_pub = self.public_key_line() + "\n"
+
+        sftp = client.open_sftp()
+        try:
+            try:
+                sftp.mkdir(".ssh")
+            except IOError:
+                pass
+            try:
+                with sftp.open(".ssh/ca.pub", "r") as f:
+                    remote_ca_pub = f.read().decode()
+            except IOError:
+                remote_ca_pub = None
+            # Solo se sube la clave pública de la CA si es distinta a la que ya hay en el servidor
+            if remote_ca_pub != ca_pub:
+                with sftp.open(".ssh/ca.pub", "w") as f:
+                    f.write(ca_pub)
+        finally:
+            sftp.close()
+
+        # Comprueba si sshd ya confía en la CA (sshd_config suele ser legible sin privilegios)
+        _, stdout, _ = client.exec_command(f"grep -qxF '{self.TRUSTED_CA_LINE}' /etc/ssh/sshd_config")
+        if stdout.channel.recv_exit_status() == 0:
+            return False
+
+        cmd = f"echo '{self.TRUSTED_CA_LINE}' >> /etc/ssh/sshd_config && systemctl restart ssh"
+        if not run_privileged(cmd):
+            raise Exception("No se pudo configurar el servidor para aceptar certificados")
+        return True
+
+    """
+    Método auxiliar que lee el registro de números de serie (o devuelve uno vacío si todavía no existe).
+    """
+
+    def _load_ledger(self):
+        if not os.path.exists(self.ledger_path):
+            return {"next_serial": 1, "issued": {}, "revoked": []}
+        with open(self.ledger_path, "r") as f:
+            return json.load(f)
+
+    """
+    Método auxiliar que guarda el registro de forma atómica (archivo temporal + rename).
+    """
+
+    def _save_ledger(self, ledger):
+        tmp_path = self.ledger_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(ledger, f, indent=2)
+        os.replace(tmp_path, self.ledger_path)
+
+    """
+    Método auxiliar que escribe la KRL binaria con la lista de números de serie revocados de esta CA.
+    """
+
+    def _write_krl(self, ledger):
+        def string(data):
+            return struct.pack(">I", len(data)) + data
+
+        # Blob de la clave pública de la CA (la parte base64 de la línea OpenSSH)
+        ca_blob = base64.b64decode(self.public_key_line().split()[1])
+
+        serial_list = b"".join(struct.pack(">Q", serial) for serial in ledger["revoked"])
+        cert_section = string(ca_blob) + string(b"")
+        cert_section += bytes([self.KRL_SECTION_CERT_SERIAL_LIST]) + string(serial_list)
+
+        now = int(time.time())
+        header = struct.pack(">QIQQQ", self.KRL_MAGIC, self.KRL_FORMAT_VERSION, now, now, 0)
+        header += string(b"") + string(b"sshtool")
+
+        with open(self.krl_path, "wb") as f:
+            f.write(header + bytes([self.KRL_SECTION_CERTIFICATES]) + string(cert_section))
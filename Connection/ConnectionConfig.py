@@ -2,10 +2,13 @@
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt
+# Importaciones necesarias de otras clases
+from Connection.TransportProfile import TransportProfile
 
 """
 Clase que gestiona la recopilación de datos de conexión SSH desde el usuario.
-Solicita el host, nombre de usuario, puerto y método de autenticación de forma interactiva.
+Solicita el host, nombre de usuario, puerto, bastiones, perfil de transporte y método de autenticación de forma
+interactiva.
 También proporciona mensajes de advertencia y guarda temporalmente los datos introducidos
 para evitar que el usuario los vuelva a escribir durante la misma sesión.
 """
@@ -17,6 +20,24 @@ class ConnectionConfig:
     host_saved = ""
     username_saved = ""
     port_saved = ""
+    jump_hosts_saved = None
+    # Perfil de transporte elegido para cada host (host -> nombre del perfil)
+    host_profiles = {}
+
+    # Tiempos máximos (segundos) de cada fase de la conexión: TCP, banner SSH y autenticación
+    connect_timeout = 10
+    banner_timeout = 15
+    auth_timeout = 30
+
+    # Vigilancia de la conexión: segundos entre keepalive (SSHTOOL_KEEPALIVE, 0 = desactivada), espera máxima de
+    # la respuesta e intentos de reconexión cuando se pierde
+    keepalive_interval = 30
+    keepalive_timeout = 15
+    reconnect_attempts = 3
+
+    # Verificación de la clave del servidor (SSHTOOL_HOST_KEY_CHECKING): "accept-new" guarda la de los hosts nuevos
+    # y "strict" solo acepta los que ya están en known_hosts (ver KnownHostsPolicy)
+    host_key_checking = "accept-new"
 
     """
     Método estático que solicita los datos de conexión SSH al usuario.
@@ -58,6 +79,26 @@ class ConnectionConfig:
             ConnectionConfig.username_saved = username
             ConnectionConfig.port_saved = port
 
+        # Solicita los bastiones (saltos) por los que pasar, si el servidor no es accesible directamente
+        if ConnectionConfig.jump_hosts_saved is None:
+            via_bastion = Prompt.ask("[🪜] ¿Conectar a través de un bastión?", choices=["si", "no"], default="no")
+            jump_hosts = ""
+            if via_bastion == "si":
+                jump_hosts = Prompt.ask("[ ] Bastiones en orden (usuario@host:puerto, separados por comas)")
+            ConnectionConfig.jump_hosts_saved = jump_hosts
+        else:
+            jump_hosts = ConnectionConfig.jump_hosts_saved
+            if jump_hosts:
+                console.print(f"\n[bold green]Bastiones: {jump_hosts}[/bold green]")
+
+        # Solicita el perfil de transporte (cifrados, compresión, ventanas) y lo recuerda para este host
+        profile = Prompt.ask(
+            "[📶] Perfil de transporte",
+            choices=TransportProfile.names(),
+            default=ConnectionConfig.host_profiles.get(host, "default")
+        )
+        ConnectionConfig.host_profiles[host] = profile
+
         # Solicita el método de autenticación (contraseña, clave, agente, certificado)
         auth_method = Prompt.ask(
             "[ ] ¿Método de autenticación?",
@@ -65,4 +106,4 @@ class ConnectionConfig:
             default="contraseña"
         )
 
-        return host, username, port, auth_method
+        return host, username, port, auth_method, jump_hosts, profile
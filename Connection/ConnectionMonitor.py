@@ -0,0 +1,82 @@
+# Importaciones necesarias de librerías
+import threading
+# Importaciones necesarias de otras clases
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que vigila en segundo plano que una conexión SSH siga viva y, si se ha perdido, la restablece.
+Los keepalive de paramiko (set_keepalive) mantienen abiertas las entradas de NAT y cortafuegos, pero no esperan
+respuesta, así que no detectan una conexión muerta: el transporte sigue "activo" hasta que TCP se rinde, a veces
+muchos minutos después. Por eso, cada intervalo se envía una petición keepalive@openssh.com que sí espera
+respuesta; si no llega a tiempo, se cierra el transporte y se pide a la conexión que vuelva a conectar (ver
+SSHConnection.recover).
+"""
+
+
+class ConnectionMonitor:
+    # Nombre de la petición de comprobación (la misma que usa OpenSSH con ServerAliveInterval)
+    PROBE_REQUEST = "keepalive@openssh.com"
+
+    """
+    Constructor de la clase.
+    :param connection: SSHConnection a vigilar
+    :param interval: Segundos entre comprobaciones
+    :param timeout: Segundos que se espera la respuesta del servidor antes de dar la conexión por perdida
+    """
+
+    def __init__(self, connection, interval, timeout):
+        self.connection = connection
+        self.interval = interval
+        self.timeout = timeout
+        self._stop = threading.Event()
+        self._thread = None
+
+    """
+    Métodos que inician y detienen la vigilancia.
+    """
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    """
+    Método estático que comprueba si el servidor responde por el transporte en como mucho timeout segundos.
+    paramiko no permite limitar la espera de una petición global, así que se hace desde un hilo auxiliar.
+    Cualquier respuesta vale (los servidores que no conocen la petición la rechazan, pero responden).
+    """
+
+    @staticmethod
+    def probe(transport, timeout):
+        if transport is None or not transport.is_active():
+            return False
+        answered = threading.Event()
+
+        def request():
+            try:
+                transport.global_request(ConnectionMonitor.PROBE_REQUEST, wait=True)
+                if transport.is_active():
+                    answered.set()
+            except Exception:
+                pass
+
+        threading.Thread(target=request, daemon=True).start()
+        return answered.wait(timeout)
+
+    """
+    Método auxiliar (hilo) que comprueba la conexión cada intervalo y la restablece si se ha perdido.
+    """
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            transport = self.connection.client.get_transport()
+            with Metrics.span("ssh.keepalive", host=self.connection.host) as span:
+                alive = self.probe(transport, self.timeout)
+                span.set(result="ok" if alive else "lost")
+            if alive or self._stop.is_set():
+                continue
+            if transport is not None:
+                transport.close()  # Se descarta el transporte muerto aunque TCP todavía no lo sepa
+            self.connection.recover()
@@ -0,0 +1,179 @@
+# Importaciones necesarias de librerías
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import paramiko
+# Importaciones necesarias de otras clases
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que comprueba rápidamente qué servidores están disponibles antes de operar sobre ellos, para descartar los
+caídos de entrada en lugar de esperar el timeout de conexión de cada uno.
+- Las comprobaciones son asíncronas (asyncio), con como mucho concurrency a la vez, así que miles de servidores se
+  comprueban en pocos segundos: conexión TCP, banner SSH (que da la versión del servidor) y, si se pide, qué métodos
+  de autenticación acepta para el usuario (con una petición "none", sin enviar credenciales).
+- Los resultados se guardan en una caché compartida con caducidad (TTL), así que comprobar el mismo servidor varias
+  veces seguidas no repite el trabajo.
+Solo sirve para conexiones directas: un servidor detrás de un bastión se comprueba al conectar.
+
+Cada resultado es un diccionario con:
+    status: "ok", "inalcanzable" (sin conexión TCP), "sin_ssh" (responde pero no envía un banner SSH) o
+            "sin_autenticacion" (no acepta ningún método que la herramienta sepa usar)
+    detail: Descripción del error, version: Banner del servidor, auth_methods: Métodos aceptados (si se han
+    comprobado), latency: Segundos hasta conectar por TCP
+"""
+
+
+class HostProber:
+    # Comprobaciones a la vez, segundos de espera de cada fase y segundos que se reutiliza un resultado
+    CONCURRENCY = 256
+    TIMEOUT = 5
+    TTL = 60
+    # Hilos para comprobar la autenticación (paramiko no es asíncrono)
+    AUTH_WORKERS = 32
+    # Líneas que se aceptan antes del banner (RFC 4253 permite texto previo)
+    MAX_PRE_BANNER_LINES = 20
+    # Métodos de autenticación que la herramienta sabe usar
+    USABLE_METHODS = ("publickey", "password", "keyboard-interactive", "none")
+
+    # Caché compartida: (usuario, host, puerto, con autenticación) -> (instante de caducidad, resultado)
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    """
+    Constructor de la clase. Los parámetros que no se indiquen toman los valores de clase.
+    """
+
+    def __init__(self, concurrency=None, timeout=None, ttl=None):
+        self.concurrency = concurrency or self.CONCURRENCY
+        self.timeout = timeout or self.TIMEOUT
+        self.ttl = self.TTL if ttl is None else ttl
+
+    """
+    Método que comprueba una lista de servidores (tuplas usuario, host, puerto) y devuelve un diccionario
+    servidor -> resultado.
+    :param check_auth: Si es True, también se comprueba qué métodos de autenticación acepta cada servidor
+    """
+
+    def probe(self, servers, check_auth=False):
+        servers = list(dict.fromkeys(servers))
+        with Metrics.span("probe.scan", hosts=len(servers), auth=check_auth) as span:
+            results = asyncio.run(self._probe_all(servers, check_auth))
+            span.set(reachable=sum(1 for result in results.values() if result["status"] == "ok"))
+        return results
+
+    """
+    Método estático que elimina de la caché un servidor (o toda la caché si no se indica).
+    """
+
+    @staticmethod
+    def invalidate(server=None):
+        with HostProber._cache_lock:
+            if server is None:
+                HostProber._cache.clear()
+            else:
+                for check_auth in (False, True):
+                    HostProber._cache.pop((*server, check_auth), None)
+
+    async def _probe_all(self, servers, check_auth):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with ThreadPoolExecutor(max_workers=self.AUTH_WORKERS) as executor:
+            results = await asyncio.gather(*(self._probe_cached(server, check_auth, semaphore, executor)
+                                             for server in servers))
+        return dict(zip(servers, results))
+
+    """
+    Método auxiliar que devuelve el resultado de la caché si sigue vigente o, si no, comprueba el servidor.
+    Un resultado con autenticación comprobada también vale para quien no la pide.
+    """
+
+    async def _probe_cached(self, server, check_auth, semaphore, executor):
+        now = time.monotonic()
+        with HostProber._cache_lock:
+            for key in [(*server, True)] + ([] if check_auth else [(*server, False)]):
+                cached = HostProber._cache.get(key)
+                if cached and cached[0] > now:
+                    Metrics.count("probe.cache", host=server[1], result="hit")
+                    return cached[1]
+        Metrics.count("probe.cache", host=server[1], result="miss")
+        async with semaphore:
+            result = await self._probe_one(server, check_auth, executor)
+        Metrics.count("probe.result", host=server[1], status=result["status"])
+        with HostProber._cache_lock:
+            HostProber._cache[(*server, check_auth)] = (time.monotonic() + self.ttl, result)
+        return result
+
+    """
+    Método auxiliar que comprueba un servidor: TCP, banner y (opcionalmente) autenticación.
+    """
+
+    async def _probe_one(self, server, check_auth, executor):
+        user, host, port = server
+        result = {"status": "ok", "detail": "", "version": None, "auth_methods": None, "latency": None}
+        started = time.monotonic()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            result.update(status="inalcanzable", detail=str(e) or "sin respuesta")
+            return result
+        result["latency"] = time.monotonic() - started
+
+        try:
+            result["version"] = await asyncio.wait_for(self._read_banner(reader), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            result.update(status="sin_ssh", detail=str(e) or "no envía el banner SSH")
+            return result
+        finally:
+            writer.close()
+        if result["version"] is None:
+            result.update(status="sin_ssh", detail="no envía el banner SSH")
+            return result
+
+        if check_auth:
+            try:
+                methods = await asyncio.get_running_loop().run_in_executor(
+                    executor, self._auth_methods, user, host, port, self.timeout)
+            except Exception as e:
+                result.update(status="sin_autenticacion", detail=str(e) or type(e).__name__)
+                return result
+            result["auth_methods"] = methods
+            if not any(method in self.USABLE_METHODS for method in methods):
+                result.update(status="sin_autenticacion", detail=f"solo acepta {', '.join(methods) or 'nada'}")
+        return result
+
+    """
+    Método auxiliar que lee el banner SSH ("SSH-2.0-OpenSSH_9.6"), saltando las líneas previas que permite el
+    protocolo. Devuelve None si el servidor envía otra cosa.
+    """
+
+    async def _read_banner(self, reader):
+        for _ in range(self.MAX_PRE_BANNER_LINES):
+            line = await reader.readline()
+            if not line:
+                return None
+            if line.startswith(b"SSH-"):
+                return line.decode("utf-8", errors="replace").strip()
+        return None
+
+    """
+    Método estático (se ejecuta en un hilo) que devuelve los métodos de autenticación que el servidor acepta para el
+    usuario. Hace el intercambio de claves y una petición "none", que el servidor rechaza indicando los métodos
+    válidos; no se envía ninguna credencial ni se comprueba la clave del servidor (no se abre ninguna sesión).
+    """
+
+    @staticmethod
+    def _auth_methods(user, host, port, timeout):
+        sock = socket.create_connection((host, port), timeout)
+        transport = paramiko.Transport(sock)
+        try:
+            transport.banner_timeout = timeout
+            transport.start_client(timeout=timeout)
+            try:
+                transport.auth_none(user)
+                return ["none"]  # Acepta al usuario sin autenticación
+            except paramiko.BadAuthenticationType as e:
+                return list(e.allowed_types)
+        finally:
+            transport.close()
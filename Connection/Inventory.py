@@ -0,0 +1,218 @@
+# Importaciones necesarias de librerías
+import os
+import paramiko
+# Importaciones necesarias de otras clases
+from Commands.RemoteCopyCommand import RemoteCopyCommand
+
+"""
+Clase que representa el inventario de servidores: cada servidor tiene un nombre (alias), dirección, usuario, puerto,
+grupos, etiquetas y variables. Se carga de un archivo propio y/o de ~/.ssh/config, y permite seleccionar servidores
+por grupo, etiqueta o nombre (ver select), de modo que las operaciones sobre varios servidores (archivos de trabajos,
+comprobación con HostProber) no tengan que repetir direcciones y puertos.
+
+Formato del archivo (TOML; o YAML con PyYAML instalado):
+    [hosts.web1]
+    host = "10.0.0.11"              # Por defecto el propio nombre
+    user = "deploy"                 # Si falta, el de quien lo use (ej: [defaults] del archivo de trabajos)
+    port = 2222                     # Igual que user
+    groups = ["web", "madrid"]
+    tags = ["nginx"]
+    vars = { role = "frontend" }
+
+    [groups.web]
+    hosts = ["web2"]                # Miembros además de los que declaran el grupo
+    vars = { http_port = 8080 }     # Variables de todos sus miembros (las del servidor tienen prioridad)
+
+Desde ~/.ssh/config se toman los Host sin comodines (HostName, User y Port) en el grupo "ssh_config"; sus opciones
+ProxyJump, ProxyCommand e IdentityFile (solo la primera) pasan a las variables proxyjump, proxycommand e identityfile,
+que JobRunnerCommand usa al conectar. El resto de opciones de ~/.ssh/config se ignoran.
+La variable de entorno SSHTOOL_INVENTORY indica el archivo de inventario por defecto (ver default).
+"""
+
+
+class Inventory:
+    # Grupo que contiene todos los servidores
+    ALL = "all"
+    # Prefijo de los selectores por etiqueta ("tag:nginx")
+    TAG_PREFIX = "tag:"
+
+    """
+    Constructor de la clase.
+    :param hosts: Diccionario nombre -> servidor (diccionario con name, host, user, port, groups, tags, vars)
+    :param group_vars: Diccionario grupo -> variables del grupo
+    """
+
+    def __init__(self, hosts=None, group_vars=None):
+        self.hosts = hosts or {}
+        self.group_vars = group_vars or {}
+
+    """
+    Método estático que devuelve el inventario por defecto: ~/.ssh/config más el archivo de SSHTOOL_INVENTORY si
+    está definida (sus servidores tienen prioridad).
+    """
+
+    @staticmethod
+    def default():
+        inventory = Inventory.from_ssh_config()
+        path = os.environ.get("SSHTOOL_INVENTORY")
+        if path:
+            inventory.merge(Inventory.load(os.path.expanduser(path)))
+        return inventory
+
+    """
+    Método estático que lee un archivo de inventario. Los .yml/.yaml necesitan PyYAML y, con Python anterior a 3.11,
+    los .toml necesitan tomli (dependencias opcionales).
+    """
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as inventory_file:
+            raw = inventory_file.read()
+        if path.endswith((".yml", ".yaml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML no está instalado (pip install pyyaml); use un archivo .toml")
+            data = yaml.safe_load(raw) or {}
+        else:
+            try:
+                import tomllib
+            except ImportError:  # Python anterior a 3.11: se usa tomli, del que procede tomllib
+                try:
+                    import tomli as tomllib
+                except ImportError:
+                    raise ImportError("Con Python anterior a 3.11 se necesita tomli (pip install tomli) para leer "
+                                      "archivos .toml")
+            data = tomllib.loads(raw.decode("utf-8"))
+        return Inventory.from_dict(data, path)
+
+    """
+    Método estático que crea el inventario a partir del contenido de un archivo. Lanza ValueError si no es válido.
+    """
+
+    @staticmethod
+    def from_dict(data, path="inventario"):
+        hosts = {}
+        for name, entry in (data.get("hosts") or {}).items():
+            entry = entry or {}
+            if not isinstance(entry, dict):
+                raise ValueError(f"{path}: el servidor '{name}' debe ser una tabla (host, user, port...)")
+            hosts[name] = Inventory._entry(name, entry.get("host") or name, entry.get("user"), entry.get("port"),
+                                           entry.get("groups"), entry.get("tags"), entry.get("vars"))
+
+        group_vars = {}
+        for group, entry in (data.get("groups") or {}).items():
+            entry = entry or {}
+            for member in entry.get("hosts") or []:
+                if member not in hosts:
+                    raise ValueError(f"{path}: el grupo '{group}' incluye '{member}', que no está en [hosts]")
+                if group not in hosts[member]["groups"]:
+                    hosts[member]["groups"].append(group)
+            group_vars[group] = dict(entry.get("vars") or {})
+        return Inventory(hosts, group_vars)
+
+    """
+    Método estático que crea el inventario con los Host de ~/.ssh/config (los patrones con comodines se ignoran,
+    porque no identifican un servidor). Si el archivo no existe, el inventario está vacío.
+    """
+
+    @staticmethod
+    def from_ssh_config(path="~/.ssh/config"):
+        path = os.path.expanduser(path)
+        if not os.path.exists(path):
+            return Inventory()
+        config = paramiko.SSHConfig.from_path(path)
+        hosts = {}
+        for name in sorted(config.get_hostnames()):
+            if any(char in name for char in "*?!"):
+                continue
+            options = config.lookup(name)
+            # "ProxyCommand none" desactiva el de un bloque anterior
+            variables = {option: options[option] for option in ("proxyjump", "proxycommand")
+                         if options.get(option, "none").lower() != "none"}
+            if "identityfile" in options:
+                variables["identityfile"] = os.path.expanduser(options["identityfile"][0])
+            hosts[name] = Inventory._entry(name, options.get("hostname", name), options.get("user"),
+                                           options.get("port"), ["ssh_config"], [], variables)
+        return Inventory(hosts)
+
+    """
+    Método que añade los servidores y grupos de otro inventario (los de other sustituyen a los del mismo nombre).
+    """
+
+    def merge(self, other):
+        self.hosts.update(other.hosts)
+        for group, variables in other.group_vars.items():
+            self.group_vars.setdefault(group, {}).update(variables)
+        return self
+
+    """
+    Método que devuelve los servidores (sin repetidos) que coinciden con un selector o lista de selectores: "all",
+    un grupo, "tag:<etiqueta>" o el nombre de un servidor. Devuelve una lista vacía si no coincide ninguno.
+    """
+
+    def select(self, spec):
+        selected = []
+        for item in [spec] if isinstance(spec, str) else spec:
+            if item == self.ALL:
+                matches = list(self.hosts.values())
+            elif item.startswith(self.TAG_PREFIX):
+                tag = item[len(self.TAG_PREFIX):]
+                matches = [entry for entry in self.hosts.values() if tag in entry["tags"]]
+            elif item in self.hosts:
+                matches = [self.hosts[item]]
+            else:
+                matches = [entry for entry in self.hosts.values() if item in entry["groups"]]
+            for entry in matches:
+                if entry not in selected:
+                    selected.append(entry)
+        return selected
+
+    """
+    Método que convierte un selector del inventario o una dirección "usuario@host:puerto" (en la que host puede ser
+    el nombre de un servidor del inventario, y una dirección IPv6 va entre corchetes si lleva puerto) en una lista
+    de tuplas ((usuario, host, puerto), nombre en el inventario o None). user y port son los valores para lo que no
+    los indique. Lanza ValueError si la dirección no es válida.
+    """
+
+    def resolve(self, spec, user, port):
+        entries = self.select(spec)
+        if entries:
+            return [((entry["user"] or user, entry["host"], entry["port"] or int(port)), entry["name"])
+                    for entry in entries]
+        given_user, host, given_port = RemoteCopyCommand.parse_destination(str(spec), default_port=None)
+        entry = self.hosts.get(host)
+        if entry:
+            return [((given_user or entry["user"] or user, entry["host"], given_port or entry["port"] or int(port)),
+                     entry["name"])]
+        return [((given_user or user, host, given_port or int(port)), None)]
+
+    """
+    Método que devuelve las variables de un servidor: las de sus grupos (en su orden) y encima las suyas.
+    """
+
+    def variables(self, name):
+        entry = self.hosts[name]
+        variables = {}
+        for group in entry["groups"]:
+            variables.update(self.group_vars.get(group, {}))
+        variables.update(entry["vars"])
+        return variables
+
+    """
+    Método que devuelve los nombres de todos los grupos y etiquetas con su número de servidores.
+    """
+
+    def groups(self):
+        counts = {}
+        for entry in self.hosts.values():
+            for group in entry["groups"]:
+                counts[group] = counts.get(group, 0) + 1
+            for tag in entry["tags"]:
+                counts[self.TAG_PREFIX + tag] = counts.get(self.TAG_PREFIX + tag, 0) + 1
+        return counts
+
+    @staticmethod
+    def _entry(name, host, user, port, groups, tags, variables):
+        return {"name": name, "host": host, "user": user or None, "port": int(port) if port else None,
+                "groups": list(groups or []), "tags": list(tags or []), "vars": dict(variables or {})}
@@ -0,0 +1,110 @@
+# Importaciones necesarias de librerías
+import os
+import threading
+import paramiko
+from rich.console import Console
+# Importaciones necesarias de otras clases
+from Connection.ConnectionConfig import ConnectionConfig
+from Connection.KnownHostsStore import KnownHostsPolicy
+from Connection.SocketConnector import SocketConnector
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que gestiona las conexiones a través de uno o varios servidores de salto (bastiones, equivalente a ProxyJump).
+Se conecta al bastión con paramiko, abre un canal direct-tcpip hacia el siguiente salto y establece el siguiente
+transporte SSH sobre ese canal (parámetro sock= de paramiko), sin lanzar procesos "ssh -J".
+
+Las conexiones a los bastiones se guardan y se reutilizan: todas las sesiones que pasan por el mismo bastión
+comparten un único transporte, por lo que el handshake con el bastión solo se hace una vez.
+"""
+
+
+class JumpHost:
+    # Clientes de los bastiones ya conectados, indexados por (usuario, host, puerto)
+    _clients = {}
+    _lock = threading.Lock()
+
+    # Intervalo (segundos) de los keepalive para que el transporte compartido no se cierre por inactividad
+    KEEPALIVE_INTERVAL = 30
+
+    """
+    Método estático que interpreta una cadena de saltos con formato "usuario@host:puerto,usuario@host2"
+    (el usuario y el puerto son opcionales) y devuelve una lista de tuplas (usuario, host, puerto).
+    """
+
+    @staticmethod
+    def parse_chain(spec, default_user=None):
+        chain = []
+        for hop in (spec or "").split(","):
+            hop = hop.strip()
+            if not hop:
+                continue
+            user, _, address = hop.rpartition("@")
+            host, _, port = address.partition(":")
+            chain.append((user or default_user, host, int(port or 22)))
+        return chain
+
+    """
+    Método estático que abre un canal direct-tcpip hacia el destino atravesando toda la cadena de bastiones.
+    El canal devuelto se puede pasar como sock= a SSHClient.connect() para conectar con el destino final.
+    :param chain: Lista de saltos devuelta por parse_chain()
+    :param dest_host: Host de destino (visto desde el último bastión)
+    :param dest_port: Puerto de destino
+    :param timeout: Tiempo máximo para abrir el canal
+    """
+
+    @staticmethod
+    def open_channel(chain, dest_host, dest_port, timeout=None):
+        with Metrics.span("jump.open_channel", host=dest_host, hops=len(chain)):
+            client = None
+            for user, host, port in chain:
+                client = JumpHost._connect_hop(user, host, port, client, timeout)
+            return client.get_transport().open_channel(
+                "direct-tcpip", (dest_host, int(dest_port)), ("127.0.0.1", 0), timeout=timeout)
+
+    """
+    Método estático que cierra todas las conexiones con los bastiones (se llama al salir de la herramienta).
+    """
+
+    @staticmethod
+    def close_all():
+        with JumpHost._lock:
+            for client in JumpHost._clients.values():
+                client.close()
+            JumpHost._clients.clear()
+
+    """
+    Método auxiliar que devuelve el cliente conectado a un bastión, reutilizando el existente si sigue activo.
+    Si se llega a través de otro bastión (via), la conexión se hace sobre un canal de ese bastión.
+    Se intenta primero autenticación por agente o claves locales y, si falla, se pide la contraseña.
+    """
+
+    @staticmethod
+    def _connect_hop(user, host, port, via, timeout):
+        key = (user, host, port)
+        with JumpHost._lock:
+            client = JumpHost._clients.get(key)
+            if client and client.get_transport() and client.get_transport().is_active():
+                return client
+
+            def open_sock():
+                if via is None:
+                    return SocketConnector.connect(host, port, timeout or 10)
+                return via.get_transport().open_channel("direct-tcpip", (host, port), ("127.0.0.1", 0),
+                                                        timeout=timeout)
+
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(
+                KnownHostsPolicy(mode=os.environ.get("SSHTOOL_HOST_KEY_CHECKING", ConnectionConfig.host_key_checking)))
+            try:
+                client.connect(hostname=host, port=port, username=user, sock=open_sock(), timeout=timeout,
+                               allow_agent=True, look_for_keys=True)
+            except paramiko.AuthenticationException:
+                password = Console().input(f"[🔐] Contraseña SSH del bastión {user}@{host}: ", password=True)
+                client.connect(hostname=host, port=port, username=user, sock=open_sock(), timeout=timeout,
+                               password=password, allow_agent=False, look_for_keys=False)
+
+            client.get_transport().set_keepalive(JumpHost.KEEPALIVE_INTERVAL)
+            JumpHost._clients[key] = client
+            Console().print(f"[dim]🪜 Conectado al bastión {user}@{host}:{port}[/dim]")
+            return client
@@ -0,0 +1,406 @@
+# Importaciones necesarias de librerías
+import atexit
+import base64
+import dbm
+import fnmatch
+import hashlib
+import mmap
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import paramiko
+from paramiko.hostkeys import HostKeys
+# Importaciones necesarias de otras clases
+from Commands.RemoteCopyCommand import RemoteCopyCommand
+
+"""
+Clase que gestiona el almacén de claves de host conocidas (known_hosts) para verificar la identidad de los servidores.
+El archivo known_hosts sigue siendo el estándar de OpenSSH (compatible con ssh, scp y los túneles), pero las búsquedas
+se resuelven con un índice en disco (dbm) que se construye de forma incremental leyendo el archivo con mmap.
+Así, comprobar un host es O(1) aunque el archivo tenga decenas de miles de entradas.
+
+Las entradas con el nombre de host cifrado (|1|sal|hash) no se pueden indexar sin conocer el nombre, por lo que se
+resuelven recorriendo solo esas líneas la primera vez que se pregunta por un host y el resultado se guarda en el índice
+(hasta que aparezcan líneas cifradas nuevas). Sus claves se suman siempre a las de las entradas en claro del host.
+Los marcadores de OpenSSH también se respetan: una clave @revoked se rechaza para cualquier host y los hosts que cubre
+una @cert-authority no se aceptan automáticamente (paramiko no verifica certificados de host, así que su clave debe
+estar en known_hosts).
+"""
+
+
+class KnownHostsStore:
+    # Claves especiales del índice (nunca coinciden con un sha256 de 32 bytes)
+    META_SIZE = b"__indexed_size__"
+    META_HASHED = b"__hashed_lines__"
+    META_FILE = b"__indexed_file__"  # Inodo, fecha de modificación y hash del final de lo indexado
+    META_CA = b"__cert_authorities__"  # Patrones de host de las líneas @cert-authority, uno por línea
+    META_VERSION = b"__index_version__"
+    REVOKED_PREFIX = b"__revoked__"  # Seguido del sha256 de cada clave @revoked
+    HASHED_PREFIX = b"__hashed__"  # Seguido del sha256 del host: claves de sus entradas cifradas
+    # Versión del formato del índice (uno de otra versión se reconstruye)
+    INDEX_VERSION = b"3"
+    # Bytes del final de la parte indexada que se comparan para saber si el archivo se ha reescrito
+    TAIL_SIZE = 4096
+
+    # Mensajes de prescan para las claves escaneadas que no se pueden aceptar (según el resultado de check)
+    REJECTED = {
+        "mismatch": "la clave no coincide con la de known_hosts (posible ataque MITM); no se ha guardado",
+        "revoked": "la clave está revocada en known_hosts (@revoked)",
+        "cert-authority": "el host está cubierto por una @cert-authority; su clave no se guarda automáticamente",
+    }
+
+    # Instancia compartida por todas las conexiones (se crea la primera vez que se pide)
+    _default = None
+
+    """
+    Constructor de la clase.
+    :param path: Ruta del archivo known_hosts (por defecto el del usuario, compartido con OpenSSH)
+    :param index_path: Ruta del índice dbm (por defecto junto al archivo known_hosts)
+    """
+
+    def __init__(self, path="~/.ssh/known_hosts", index_path=None):
+        self.path = os.path.expanduser(path)
+        self.index_path = index_path or self.path + ".sshtool.idx"
+        self._index = None  # El índice se abre la primera vez que se consulta
+        self._lock = threading.Lock()
+
+    """
+    Método estático que devuelve el almacén compartido del usuario (~/.ssh/known_hosts).
+    """
+
+    @staticmethod
+    def default():
+        if KnownHostsStore._default is None:
+            KnownHostsStore._default = KnownHostsStore()
+        return KnownHostsStore._default
+
+    """
+    Método estático que devuelve el nombre con el que se guarda un host en known_hosts:
+    "host" para el puerto 22 y "[host]:puerto" para cualquier otro (igual que OpenSSH y paramiko).
+    """
+
+    @staticmethod
+    def host_entry(host, port=22):
+        return host if int(port) == 22 else f"[{host}]:{port}"
+
+    """
+    Método que devuelve las claves conocidas de un host como lista de tuplas (tipo, base64).
+    """
+
+    def lookup(self, hostname):
+        with self._lock:
+            index = self._open_index()
+            keys = self._decode_keys(index.get(self._digest(hostname), b""))
+            hashed_lines = index.get(self.META_HASHED, b"0")
+
+            # Las entradas cifradas se buscan si no se ha hecho ya con las mismas líneas cifradas que hay ahora
+            # (se guarda "número de líneas cifradas\nclaves")
+            hashed_key = self.HASHED_PREFIX + self._digest(hostname)
+            scanned_lines, _, value = index.get(hashed_key, b"").partition(b"\n")
+            if scanned_lines != hashed_lines:
+                value = self._encode_keys(self._scan_hashed(hostname))
+                index[hashed_key] = hashed_lines + b"\n" + value
+
+            return keys + [key for key in self._decode_keys(value) if key not in keys]
+
+    """
+    Método que comprueba la clave que presenta un servidor contra las claves conocidas.
+    Devuelve "match" si coincide, "mismatch" si el host tiene otra clave del mismo tipo (posible ataque MITM),
+    "revoked" si la clave está marcada como @revoked, "cert-authority" si no se conoce pero el host lo cubre una
+    @cert-authority (no se debe aceptar sin más) o "unknown" si no hay ninguna clave de ese tipo para el host.
+    """
+
+    def check(self, hostname, key):
+        with self._lock:
+            index = self._open_index()
+            if self.REVOKED_PREFIX + self._digest(key.get_base64()) in index:
+                return "revoked"
+            authorities = index.get(self.META_CA, b"").decode().splitlines()
+        known = [b64 for key_type, b64 in self.lookup(hostname) if key_type == key.get_name()]
+        if known:
+            return "match" if key.get_base64() in known else "mismatch"
+        return "cert-authority" if self._covered(hostname, authorities) else "unknown"
+
+    """
+    Método que añade claves de host al archivo known_hosts (con el nombre cifrado si hash_hostnames es True)
+    y al índice. Recibe una lista de tuplas (nombre_de_host, clave) para poder guardar lotes de una sola vez.
+    """
+
+    def add(self, entries, hash_hostnames=True):
+        lines = []
+        for hostname, key in entries:
+            name = HostKeys.hash_host(hostname) if hash_hostnames else hostname
+            lines.append(f"{name} {key.get_name()} {key.get_base64()}\n")
+
+        with self._lock:
+            index = self._open_index()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write("".join(lines))
+
+            for hostname, key in entries:
+                digest = self._digest(hostname)
+                keys = self._decode_keys(index.get(digest, b""))
+                keys.append((key.get_name(), key.get_base64()))
+                index[digest] = self._encode_keys(keys)
+
+            # Nuestras propias líneas ya están indexadas, así que se avanza el desplazamiento indexado
+            size = os.path.getsize(self.path)
+            index[self.META_SIZE] = str(size).encode()
+            index[self.META_FILE] = self._signature(size)
+            index.sync()
+
+    """
+    Método que obtiene en paralelo las claves de host de un inventario (como ssh-keyscan) y las guarda en lote.
+    :param hosts: Lista de hosts con formato "host", "host:puerto" o "[IPv6]:puerto"
+    :param workers: Número máximo de conexiones simultáneas
+    :param timeout: Tiempo máximo por host en segundos
+    :return: Diccionario {host: clave | mensaje de error}. Las claves rechazadas (ver REJECTED) no se guardan y se
+             devuelven como su mensaje.
+    """
+
+    def prescan(self, hosts, workers=64, timeout=5):
+        def fetch(target):
+            _, host, port = RemoteCopyCommand.parse_destination(target)
+            sock = socket.create_connection((host, port), timeout=timeout)
+            transport = paramiko.Transport(sock)
+            try:
+                transport.banner_timeout = timeout
+                transport.start_client(timeout=timeout)
+                return self.host_entry(host, port), transport.get_remote_server_key()
+            finally:
+                transport.close()
+
+        results = {}
+        new_entries = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {target: pool.submit(fetch, target) for target in hosts}
+            for target, future in futures.items():
+                try:
+                    hostname, key = future.result()
+                except Exception as e:
+                    results[target] = str(e) or e.__class__.__name__
+                    continue
+                status = self.check(hostname, key)
+                results[target] = self.REJECTED.get(status, key)
+                if status == "unknown":
+                    new_entries.append((hostname, key))
+
+        if new_entries:
+            self.add(new_entries)
+        return results
+
+    """
+    Método auxiliar que abre el índice y lo pone al día con las líneas nuevas del archivo known_hosts.
+    Si el archivo se ha editado o reescrito (ha encogido, es otro archivo, ha cambiado sin crecer o la parte ya
+    indexada no es la misma) el índice se reconstruye desde cero.
+    """
+
+    def _open_index(self):
+        if self._index is None:
+            # En un equipo sin ~/.ssh el directorio se crea aquí (como haría ssh), antes de abrir el índice
+            os.makedirs(os.path.dirname(self.index_path) or ".", mode=0o700, exist_ok=True)
+            self._index = dbm.open(self.index_path, "c")
+            # Los resultados cacheados en las búsquedas se vuelcan a disco al salir de la herramienta
+            atexit.register(self.close)
+
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        indexed = int(self._index.get(self.META_SIZE, b"0"))
+        if indexed and (self._index.get(self.META_VERSION) != self.INDEX_VERSION or not self._unchanged(size, indexed)):
+            self._index.close()
+            self._index = dbm.open(self.index_path, "n")
+            indexed = 0
+        if not indexed:
+            self._index[self.META_VERSION] = self.INDEX_VERSION
+        if size > indexed:
+            self._index_lines(indexed, size)
+        return self._index
+
+    """
+    Método auxiliar que indica si los primeros indexed bytes del archivo siguen siendo los que se indexaron.
+    Si el archivo no ha cambiado desde entonces (mismo inodo y fecha) no hace falta leerlo; si solo ha crecido, se
+    compara el hash del final de la parte indexada (una reescritura que no encoge lo cambia casi siempre).
+    """
+
+    def _unchanged(self, size, indexed):
+        stored = self._index.get(self.META_FILE, b"").split()
+        if size < indexed or len(stored) != 3 or not os.path.exists(self.path):
+            return False
+        stat = os.stat(self.path)
+        if stored[0] != str(stat.st_ino).encode():
+            return False
+        if stored[1] == str(stat.st_mtime_ns).encode():
+            return size == indexed
+        return size > indexed and stored[2] == self._tail_digest(indexed)
+
+    """
+    Métodos auxiliares que calculan la firma del archivo indexado hasta un desplazamiento (inodo, fecha de
+    modificación y hash de sus últimos TAIL_SIZE bytes).
+    """
+
+    def _signature(self, indexed):
+        stat = os.stat(self.path)
+        return b"%d %d %s" % (stat.st_ino, stat.st_mtime_ns, self._tail_digest(indexed))
+
+    def _tail_digest(self, indexed):
+        with open(self.path, "rb") as f:
+            f.seek(max(indexed - self.TAIL_SIZE, 0))
+            return hashlib.sha256(f.read(indexed - f.tell())).hexdigest().encode()
+
+    """
+    Método auxiliar que indexa las líneas del archivo known_hosts entre dos desplazamientos usando mmap,
+    sin cargar el archivo completo en memoria.
+    """
+
+    def _index_lines(self, start, end):
+        hashed_lines = int(self._index.get(self.META_HASHED, b"0"))
+        authorities = self._index.get(self.META_CA, b"").splitlines()
+        pending = {}
+
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            mm.seek(start)
+            while mm.tell() < end:
+                fields = mm.readline().split()
+                # Se ignoran comentarios y líneas incompletas
+                if len(fields) < 3 or fields[0].startswith(b"#"):
+                    continue
+                # Marcadores: "@revoked hosts tipo clave" y "@cert-authority hosts tipo clave"
+                if fields[0] == b"@revoked" and len(fields) >= 4:
+                    self._index[self.REVOKED_PREFIX + self._digest(fields[3].decode())] = b"1"
+                if fields[0] == b"@cert-authority":
+                    authorities.append(fields[1])
+                if fields[0].startswith(b"@"):
+                    continue
+                if fields[0].startswith(b"|"):
+                    hashed_lines += 1
+                    continue
+                # No se indexan patrones con comodines ni negaciones
+                for name in fields[0].split(b","):
+                    if any(c in name for c in b"*?!"):
+                        continue
+                    pending.setdefault(self._digest(name.decode()), []).append(
+                        (fields[1].decode(), fields[2].decode()))
+
+        for digest, keys in pending.items():
+            self._index[digest] = self._encode_keys(self._decode_keys(self._index.get(digest, b"")) + keys)
+
+        self._index[self.META_HASHED] = str(hashed_lines).encode()
+        self._index[self.META_CA] = b"\n".join(authorities)
+        self._index[self.META_SIZE] = str(end).encode()
+        self._index[self.META_FILE] = self._signature(end)
+        self._index.sync()
+
+    """
+    Método que cierra el índice guardando en disco los cambios pendientes.
+    """
+
+    def close(self):
+        with self._lock:
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+    """
+    Método auxiliar que recorre solo las entradas cifradas del archivo buscando las de un host concreto.
+    """
+
+    def _scan_hashed(self, hostname):
+        keys = []
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return keys
+
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                if not line.startswith(b"|1|"):
+                    continue
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                # hash_host() reutiliza la sal de la propia entrada cifrada
+                entry = fields[0].decode()
+                if HostKeys.hash_host(hostname, entry) == entry:
+                    keys.append((fields[1].decode(), fields[2].decode()))
+        return keys
+
+    """
+    Método estático auxiliar que indica si un host coincide con alguno de los patrones de host de las líneas
+    @cert-authority ("*.example.com,!bastion.example.com", o un nombre cifrado), con las reglas de OpenSSH: en cada
+    línea basta un patrón que coincida, salvo que coincida también uno negado.
+    """
+
+    @staticmethod
+    def _covered(hostname, authorities):
+        for patterns in authorities:
+            matched = False
+            for pattern in patterns.split(","):
+                negated = pattern.startswith("!")
+                pattern = pattern.lstrip("!")
+                if pattern.startswith("|1|"):
+                    matches = HostKeys.hash_host(hostname, pattern) == pattern
+                else:
+                    matches = fnmatch.fnmatch(hostname.lower(), pattern.lower())
+                if matches and negated:
+                    matched = False
+                    break
+                matched = matched or matches
+            if matched:
+                return True
+        return False
+
+    """
+    Métodos auxiliares para las claves y valores del índice.
+    El nombre de host se guarda como sha256 para que el índice no revele los hosts conocidos.
+    """
+
+    @staticmethod
+    def _digest(hostname):
+        return hashlib.sha256(hostname.encode()).digest()
+
+    @staticmethod
+    def _encode_keys(keys):
+        return "\n".join(f"{key_type} {b64}" for key_type, b64 in keys).encode()
+
+    @staticmethod
+    def _decode_keys(value):
+        return [tuple(line.split(" ", 1)) for line in value.decode().splitlines() if line]
+
+
+"""
+Política de paramiko que verifica la clave del servidor contra KnownHostsStore en lugar de aceptarla sin más
+(AutoAddPolicy). Con el modo "strict" se rechazan los hosts desconocidos; con "accept-new" se guardan la primera vez
+(como StrictHostKeyChecking=accept-new de OpenSSH). En ambos modos una clave distinta a la conocida, una revocada o
+la de un host cubierto por una @cert-authority se rechazan.
+"""
+
+
+class KnownHostsPolicy(paramiko.MissingHostKeyPolicy):
+    MODES = ("strict", "accept-new")
+
+    def __init__(self, store=None, mode="accept-new"):
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de verificación de claves de host no válido: {mode} "
+                             f"(use {' o '.join(self.MODES)})")
+        self.store = store or KnownHostsStore.default()
+        self.mode = mode
+
+    def missing_host_key(self, client, hostname, key):
+        status = self.store.check(hostname, key)
+        if status == "match":
+            return
+        if status == "mismatch":
+            expected = next(
+                paramiko.PKey.from_type_string(key_type, base64.b64decode(b64))
+                for key_type, b64 in self.store.lookup(hostname) if key_type == key.get_name()
+            )
+            raise paramiko.BadHostKeyException(hostname, key, expected)
+        if status == "revoked":
+            raise paramiko.SSHException(f"La clave del host {hostname} está revocada en known_hosts (@revoked)")
+        if status == "cert-authority":
+            raise paramiko.SSHException(
+                f"El host {hostname} está cubierto por una @cert-authority de known_hosts: su clave no se acepta "
+                f"automáticamente (añádala a known_hosts tras verificarla)")
+        if self.mode == "strict":
+            raise paramiko.SSHException(
+                f"La clave del host {hostname} no está en known_hosts (verificación estricta activada)")
+        self.store.add([(hostname, key)])
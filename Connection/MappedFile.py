@@ -0,0 +1,71 @@
+# Importaciones necesarias de librerías
+import errno
+import mmap
+import os
+from contextlib import contextmanager
+
+"""
+Clase que da acceso a archivos locales proyectados en memoria (mmap) para las transferencias SFTP grandes.
+- Lectura: el archivo se proyecta entero y se recorre con cortes de un memoryview, que se pasan directamente a las
+  peticiones de escritura SFTP. No se crea un objeto bytes por bloque ni se copia a un búfer intermedio.
+- Escritura: el archivo se reserva con su tamaño final (posix_fallocate, que evita la fragmentación y falla antes
+  de empezar si no hay espacio) y cada bloque descargado se copia en su posición dentro de la proyección. Si la
+  descarga no termina, quien escribe debe recortar el archivo a lo recibido (ver TransportProfile.get).
+Los archivos vacíos no se pueden proyectar, así que quien use esta clase debe tratarlos aparte.
+
+Ejemplo de uso:
+    with MappedFile.reader("imagen.iso") as view:
+        with view[0:32768] as block:
+            remote_file.write(block)
+"""
+
+
+class MappedFile:
+    """
+    Método estático (gestor de contexto) que proyecta un archivo en modo lectura y devuelve un memoryview.
+    Los cortes del memoryview deben liberarse (with o release()) antes de salir del bloque, porque un mmap no se
+    puede cerrar mientras haya vistas sobre él.
+    """
+
+    @staticmethod
+    @contextmanager
+    def reader(path):
+        with open(path, "rb") as local_file:
+            mapped = mmap.mmap(local_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            # La lectura es secuencial: el sistema puede leer por adelantado y liberar las páginas ya enviadas
+            if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mapped) as view:
+                yield view
+        finally:
+            mapped.close()
+
+    """
+    Método estático (gestor de contexto) que crea (o vacía) un archivo con el tamaño indicado, lo proyecta en modo
+    escritura y devuelve un memoryview sobre el que se escriben los bloques en su posición (view[a:b] = datos).
+    Si el sistema no tiene posix_fallocate (ej: Windows o macOS) el archivo se extiende con truncate.
+    """
+
+    @staticmethod
+    @contextmanager
+    def writer(path, size):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+        try:
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except AttributeError:
+                os.ftruncate(fd, size)
+            except OSError as e:
+                # Algunos sistemas de archivos no admiten la reserva; la falta de espacio sí se notifica
+                if e.errno == errno.ENOSPC:
+                    raise
+                os.ftruncate(fd, size)
+            mapped = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+        try:
+            with memoryview(mapped) as view:
+                yield view
+        finally:
+            mapped.close()
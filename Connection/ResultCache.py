@@ -0,0 +1,226 @@
+# Importaciones necesarias de librerías
+import atexit
+import dbm
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+# Importaciones necesarias de otras clases
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que guarda la salida de comandos remotos de solo lectura (uname -a, df, cat /etc/os-release, listar
+authorized_keys...) para no repetirlos por la red cada vez: una auditoría o un panel que se repite sobre muchos
+servidores responde al instante mientras los resultados sigan vigentes.
+- La clave es (servidor, puerto, usuario, comando) y cada resultado caduca a los ttl segundos.
+- Se limita el número de resultados y su tamaño total; al superarse se descartan los menos usados (LRU).
+- Opcionalmente se guarda también en disco (dbm), así que sigue sirviendo entre ejecuciones de la herramienta.
+- Quien modifica algo en un servidor debe llamar a invalidate (ej: KeyManagerCommand.authorize_key tras añadir
+  una clave), o el siguiente listado mostraría el estado anterior hasta que caduque.
+
+Es opcional: solo se activa con la variable SSHTOOL_RESULT_CACHE ("1" para los valores por defecto), en la que se
+pueden indicar la caducidad, el número de resultados, el tamaño (con sufijo K, M o G) y el archivo en disco:
+    SSHTOOL_RESULT_CACHE="ttl=600,entries=5000,size=32M,disk=~/.sshtool/result-cache"
+"""
+
+
+class ResultCache:
+    # Valores por defecto: segundos de vigencia, número de resultados y bytes en total
+    TTL = 300
+    MAX_ENTRIES = 1000
+    MAX_BYTES = 16 * 1024 * 1024
+    # Extensiones de los archivos que crean los distintos módulos dbm (gnu, ndbm, dumb)
+    DBM_EXTENSIONS = ("", ".db", ".pag", ".dat", ".dir", ".bak")
+
+    # Instancia compartida configurada con SSHTOOL_RESULT_CACHE
+    _default = None
+    _default_lock = threading.Lock()
+
+    """
+    Constructor de la clase.
+    :param enabled: Si es False no guarda nada (fetch siempre ejecuta el comando)
+    :param path: Archivo dbm en el que se guardan los resultados (None = solo en memoria)
+    """
+
+    def __init__(self, ttl=TTL, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, path=None, enabled=True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = os.path.expanduser(path) if path else None
+        self.enabled = enabled
+        self.size = 0  # Bytes que ocupan los resultados guardados
+        # (servidor, puerto, usuario, comando) -> (instante de caducidad, salida), del menos al más usado recientemente
+        self._entries = OrderedDict()
+        self._disk = None  # El archivo se abre (y se carga) la primera vez que se usa
+        self._lock = threading.Lock()
+
+    """
+    Método estático que devuelve la caché compartida, configurada la primera vez con SSHTOOL_RESULT_CACHE
+    (desactivada si no está definida).
+    """
+
+    @staticmethod
+    def default():
+        with ResultCache._default_lock:
+            if ResultCache._default is None:
+                ResultCache._default = ResultCache.from_spec(os.environ.get("SSHTOOL_RESULT_CACHE", ""))
+            return ResultCache._default
+
+    """
+    Método estático que crea una caché a partir de una especificación "ttl=600,entries=5000,size=32M,disk=ruta".
+    Una especificación vacía (o "0") da una caché desactivada; "1" la activa con los valores por defecto.
+    """
+
+    @staticmethod
+    def from_spec(spec):
+        spec = (spec or "").strip()
+        if spec in ("", "0"):
+            return ResultCache(enabled=False)
+        options = {}
+        for item in spec.split(","):
+            name, _, value = item.partition("=")
+            if value:
+                options[name.strip()] = value.strip()
+        return ResultCache(ttl=float(options.get("ttl", ResultCache.TTL)),
+                           max_entries=int(options.get("entries", ResultCache.MAX_ENTRIES)),
+                           max_bytes=ResultCache.parse_size(options.get("size", "")) or ResultCache.MAX_BYTES,
+                           path=options.get("disk"))
+
+    """
+    Método estático que convierte un tamaño como "512K", "32M" o "1G" en bytes (None si está vacío).
+    """
+
+    @staticmethod
+    def parse_size(text):
+        if not text:
+            return None
+        match = re.fullmatch(r"(\d+)([KMG]?)", text.strip(), re.IGNORECASE)
+        if not match:
+            raise ValueError(f"Tamaño no válido: {text}")
+        return int(match.group(1)) * 1024 ** " KMG".index(match.group(2).upper() or " ")
+
+    """
+    Método estático que devuelve el (servidor, puerto, usuario) de un cliente SSH conectado. El servidor y el puerto
+    son host y port si se indican (con los que se conectó, necesarios si la conexión va por bastiones); si no, los
+    del otro extremo de la conexión.
+    """
+
+    @staticmethod
+    def server(client, host=None, port=None):
+        transport = client.get_transport()
+        if host is None or port is None:
+            peer_host, peer_port = transport.getpeername()[:2]
+            host, port = host or peer_host, port or peer_port
+        return host, int(port), transport.get_username()
+
+    """
+    Método que devuelve la salida de un comando desde la caché o, si no está (o ha caducado), la obtiene con
+    compute() y la guarda. Devuelve (salida, antigüedad en segundos del resultado guardado o None si es nuevo).
+    """
+
+    def fetch(self, host, port, user, command, compute):
+        key = (host, int(port), user, command)
+        if self.enabled:
+            with self._lock:
+                self._open_disk()
+                cached = self._entries.get(key)
+                now = time.time()
+                if cached and cached[0] > now:
+                    self._entries.move_to_end(key)
+                    Metrics.count("result_cache", host=host, result="hit")
+                    return cached[1], now - (cached[0] - self.ttl)
+                if cached:
+                    self._remove(key)
+            Metrics.count("result_cache", host=host, result="miss")
+        output = compute()
+        if self.enabled:
+            with self._lock:
+                self._store(key, time.time() + self.ttl, output)
+        return output, None
+
+    """
+    Método que elimina los resultados de un servidor (de un puerto, un usuario o un comando concreto, si se
+    indican), o todos si no se indica servidor. Se debe llamar tras cualquier operación que cambie lo que
+    devolverían.
+    """
+
+    def invalidate(self, host=None, port=None, user=None, command=None):
+        if not self.enabled:
+            return
+        wanted = (host, None if port is None else int(port), user, command)
+        with self._lock:
+            self._open_disk()
+            for key in [key for key in self._entries
+                        if all(value is None or part == value for part, value in zip(key, wanted))]:
+                self._remove(key)
+
+    """
+    Método que guarda los resultados en disco y cierra el archivo (se llama solo al salir de la herramienta).
+    """
+
+    def close(self):
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+    """
+    Método auxiliar que guarda un resultado (en memoria y, si hay archivo, en disco) y descarta los menos usados
+    mientras se superen los límites. Un resultado mayor que el tamaño total no se guarda.
+    """
+
+    def _store(self, key, expires, output):
+        if key in self._entries:
+            self._remove(key)
+        size = len(output.encode("utf-8", errors="replace"))
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (expires, output)
+        self.size += size
+        if self._disk is not None:
+            self._disk[self._disk_key(key)] = json.dumps([expires, output])
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            Metrics.count("result_cache.evicted")
+
+    def _remove(self, key):
+        _, output = self._entries.pop(key)
+        self.size -= len(output.encode("utf-8", errors="replace"))
+        if self._disk is not None and self._disk_key(key) in self._disk:
+            del self._disk[self._disk_key(key)]
+
+    """
+    Método auxiliar que abre el archivo la primera vez y carga sus resultados vigentes (los caducados se borran).
+    """
+
+    def _open_disk(self):
+        if self.path is None or self._disk is not None:
+            return
+        # Guarda la salida de comandos (ej: listados de authorized_keys): solo la puede leer el usuario
+        os.makedirs(os.path.dirname(self.path) or ".", mode=0o700, exist_ok=True)
+        # Los archivos de una caché creada antes con otros permisos también pasan a ser privados (según el módulo
+        # dbm disponible, el archivo es la propia ruta o varios con extensión)
+        for name in [self.path + extension for extension in self.DBM_EXTENSIONS]:
+            if os.path.exists(name):
+                os.chmod(name, 0o600)
+        self._disk = dbm.open(self.path, "c", 0o600)
+        atexit.register(self.close)
+        now = time.time()
+        stored = []
+        for disk_key in list(self._disk.keys()):
+            expires, output = json.loads(self._disk[disk_key])
+            parts = disk_key.decode().split("\0", 3)
+            # Las entradas sin puerto (de versiones anteriores) se descartan como las caducadas
+            if expires > now and len(parts) == 4 and parts[1].isdigit():
+                stored.append((expires, (parts[0], int(parts[1]), parts[2], parts[3]), output))
+            else:
+                del self._disk[disk_key]
+        # Se cargan de más antiguo a más reciente, para que los límites descarten primero los más viejos
+        for expires, key, output in sorted(stored):
+            self._store(key, expires, output)
+
+    @staticmethod
+    def _disk_key(key):
+        return "\0".join(str(part) for part in key)
@@ -1,15 +1,26 @@
 # Importaciones necesarias de librerías
+import functools
 import os
+import threading
+import time
 import paramiko
 from rich.console import Console
 from rich.prompt import Prompt
 import subprocess
-import pexpect
 # Importaciones necesarias de otras clases
 from Commands.CommandsExecutorCommand import CommandsExecutorCommand
 from Commands.FileTransferCommand import FileTransferCommand
+from Commands.LogFollowCommand import LogFollowCommand
 from Connection.ConnectionConfig import ConnectionConfig
+from Connection.CertificateAuthority import CertificateAuthority
+from Connection.ConnectionMonitor import ConnectionMonitor
+from Connection.KnownHostsStore import KnownHostsPolicy
+from Connection.JumpHost import JumpHost
+from Connection.SocketConnector import SocketConnector
+from Connection.SudoSession import SudoSession
+from Connection.TransportProfile import TransportProfile
 from Commands.TunnelManagerCommand import TunnelManagerCommand
+from Instrumentation.Metrics import Metrics
 
 """
 Es la clase que permite realizar conexiones SSH al servidor utilizando la librería paramiko.
@@ -26,17 +37,35 @@ class SSHConnection:
     :param host: Dirección del servidor remoto (IP o nombre de host)
     :param username: Nombre de usuario SSH
     :param port: Puerto SSH (por defecto 22)
+    :param jump_hosts: Cadena de bastiones por los que pasar ("usuario@host:puerto,..."), vacía = conexión directa
+    :param profile: Nombre del perfil de transporte (ver TransportProfile)
+    :param proxy_command: Comando cuya entrada/salida se usa como conexión (ProxyCommand de OpenSSH), vacío = ninguno
+    :param identity_file: Clave privada que se prueba antes que las de ~/.ssh en las conexiones sin menús
     """
 
-    def __init__(self, host, username, port=22, auth_method="contraseña"):
+    def __init__(self, host, username, port=22, auth_method="contraseña", jump_hosts="", profile="default",
+                 proxy_command="", identity_file=None):
         self.host = host
         self.username = username
         self.port = int(port)
         self.auth_method = auth_method
+        self.jump_hosts = JumpHost.parse_chain(jump_hosts, username)
+        self.proxy_command = proxy_command
+        self.identity_file = identity_file
+        self.profile = TransportProfile.by_name(profile)
         self.client = paramiko.SSHClient()
-        self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        # Verifica la clave del servidor contra known_hosts (la guarda la primera vez y rechaza cambios)
+        self.client.set_missing_host_key_policy(
+            KnownHostsPolicy(mode=os.environ.get("SSHTOOL_HOST_KEY_CHECKING", ConnectionConfig.host_key_checking)))
         self.console = Console()
         self.shell = None  # Se pone a True cuando se inicia el shell interactivo (para ejecutar comandos remotamente)
+        self.sudo = None  # Sesión sudo con la contraseña en caché (se crea al primer comando privilegiado)
+        self.keepalive_interval = int(os.environ.get("SSHTOOL_KEEPALIVE", ConnectionConfig.keepalive_interval))
+        self.monitor = None  # ConnectionMonitor que vigila la conexión interactiva
+        # Funciones llamadas (con esta conexión) tras reconectar, para que quien use el shell pase al nuevo
+        self.reconnect_listeners = []
+        self._auth_kwargs = None  # Credenciales de la última conexión, para reconectar sin preguntar de nuevo
+        self._reconnect_lock = threading.Lock()
 
     """
     Es un método estático que solicita al usuario los datos de conexión SSH.
@@ -47,9 +76,10 @@ class SSHConnection:
 
     @staticmethod
     def create_connection():
-        host, username, port, auth_method = ConnectionConfig.ask_user_connection_data()
+        host, username, port, auth_method, jump_hosts, profile = ConnectionConfig.ask_user_connection_data()
 
-        connection = SSHConnection(host, username, port, auth_method)  # Llama al constructor para crear una instancia
+        # Llama al constructor para crear una instancia
+        connection = SSHConnection(host, username, port, auth_method, jump_hosts, profile)
         if connection.connect():  # Se llama al método connect() para establecer una conexión
             return connection
         else:
@@ -58,20 +88,24 @@ class SSHConnection:
     """
     Muestra el submenú tras la conexión SSH exitosa.
     El usuario puede ejecutar comandos remotamente, transferir archivos o cerrar sesión.
+    :param keep_open: Si es True, la conexión no se cierra al volver (ej: sesiones del gestor de sesiones)
     """
 
-    def show_session_menu(self):
+    def show_session_menu(self, keep_open=False):
         console = Console()
         options = {
-            "1": ("Ejecutar comandos remotos", lambda: CommandsExecutorCommand(self.shell).run()),  # shell interactiva
-            "2": ("Transferir archivos", lambda: FileTransferCommand(self.client, self.host, self.username, self.port).run()),
+            # Shell interactiva
+            "1": ("Ejecutar comandos remotos", lambda: CommandsExecutorCommand(self.shell, self.host, self).run()),
+            "2": ("Transferir archivos", lambda: FileTransferCommand(self.client, self.host, self.username, self.port,
+                                                                    self.profile.name).run()),
             "3": ("Gestionar túneles SSH", lambda: TunnelManagerCommand(self).run()),
-            "4": ("Volver al menú principal", None)
+            "4": ("Seguir logs remotos", lambda: LogFollowCommand([self]).run()),
+            "5": ("Volver al menú principal", None)
         }
 
         """
         Este bucle muestra el submenú una vez que se ha realizado SSH al servidor.
-        El bucle termina cuando el usuario elige la opción "3"
+        El bucle termina cuando el usuario elige la opción "5"
         Gracias este bucle el usuario puede observar todas las opciones que puede realizar
         """
         while True:
@@ -80,8 +114,9 @@ class SSHConnection:
                 console.print(f"[cyan]{key}[/cyan]. {desc}")
 
             choice = Prompt.ask("Seleccione una opción", choices=list(options.keys()))
-            if choice == "4":
-                self.close()  # Cierra la conexión y vuelve al menú principal
+            if choice == "5":
+                if not keep_open:
+                    self.close()  # Cierra la conexión y vuelve al menú principal
                 break
 
             _, action = options[choice]
@@ -100,11 +135,8 @@ class SSHConnection:
                 password = self.console.input("[🔐] Introduzca su contraseña SSH: ")
 
                 # Se procede con la conexión SSH
-                self.client.connect(
-                    hostname=self.host,
-                    username=self.username,
+                self._connect_client(
                     password=password,
-                    port=self.port,
                     look_for_keys=False,
                     allow_agent=False,
                 )
@@ -128,11 +160,8 @@ class SSHConnection:
 
                 # Se procede con la conexión SSH
                 private_key = paramiko.RSAKey.from_private_key_file(key_path)
-                self.client.connect(
-                    hostname=self.host,
-                    username=self.username,
+                self._connect_client(
                     pkey=private_key,
-                    port=self.port,
                     look_for_keys=False,
                     allow_agent=False,
                 )
@@ -179,13 +208,10 @@ class SSHConnection:
                         return
 
                 # Si se encuentra al menos una clave, se utiliza la primera disponible para establecer la conexión
-                self.client.connect(
-                    hostname=self.host,
-                    username=self.username,
+                self._connect_client(
                     pkey=agent_keys[0],
-                    port=self.port,
                     look_for_keys=False,
-                    allow_agent=True
+                    allow_agent=True,
                 )
 
             # Si el usuario quiere realizar la autenticación por certificado digital
@@ -230,23 +256,16 @@ class SSHConnection:
                         create_ca = Prompt.ask("[ ] ¿Desea generar una nueva clave de CA?", choices=["si", "no"],
                                                default="si")
                         if create_ca == "si":
-                            subprocess.run(["ssh-keygen", "-t", "rsa", "-b", "2048", "-f", ca_key_path, "-N", ""],
-                                           check=True)
+                            CertificateAuthority.generate_ca_key(ca_key_path)
                             self.console.print(f"[green]✔ Clave de CA generada correctamente en: {ca_key_path}[/green]")
                         else:
                             self.console.print("[red]✖ No se puede continuar sin clave de CA.[/red]")
                             return
 
-                    # 6. Generar certificado
-                    cert_path = pub_key_path.replace(".pub", "-cert.pub")
-                    subprocess.run([
-                        "ssh-keygen", "-s", ca_key_path,
-                        "-I", self.username,
-                        "-n", self.username,
-                        "-V", "+52w",
-                        "-z", "1",
-                        pub_key_path
-                    ], check=True)
+                    # 6. Generar certificado (firmado dentro del proceso por la CA, sin lanzar ssh-keygen)
+                    ca = CertificateAuthority(ca_key_path)
+                    cert_path, serial = ca.sign_key(pub_key_path, self.username, [self.username], "+52w")
+                    self.console.print(f"[dim]Número de serie del certificado: {serial}[/dim]")
                     self.console.print(f"[green]✔ Certificado generado correctamente en:[/green] {cert_path}")
 
                     private_key_path = Prompt.ask("[ ] Ruta de la clave privada asociada",
@@ -276,50 +295,20 @@ class SSHConnection:
 
                 # 9. Autenticación SSH con la clave privada
                 private_key = paramiko.RSAKey.from_private_key_file(private_key_path)
-                self.client.connect(
-                    hostname=self.host,
-                    username=self.username,
+                self._connect_client(
                     pkey=private_key,
-                    port=self.port,
                     look_for_keys=False,
                     allow_agent=False,
                 )
 
-                # 10. Subir clave pública de la CA (si existe)
+                # 10. Subir la clave pública de la CA y configurar el servidor para aceptar certificados.
+                # Solo se modifica sshd_config (y se reinicia sshd) si todavía no confía en la CA.
                 if ca_key_path:
-                    self.console.print("[blue]📦 Subiendo clave pública de la CA al servidor...[/blue]")
-                    sftp = self.client.open_sftp()
-                    try:
-                        sftp.mkdir(".ssh")
-                    except IOError:
-                        pass
-                    sftp.put(ca_key_path + ".pub", ".ssh/ca.pub")
-                    sftp.close()
-
-                # 11. Configurar el servidor remoto para aceptar certificados
-                cmd = "echo 'TrustedUserCAKeys ~/.ssh/ca.pub' >> /etc/ssh/sshd_config && systemctl restart ssh"
-
-                # Intentar primero sin contraseña
-                stdin, stdout, stderr = self.client.exec_command(f"sudo -n bash -c \"{cmd}\"")
-                exit_status = stdout.channel.recv_exit_status()
-
-                if exit_status != 0:
-                    self.console.print(
-                        "[yellow]⚠ No se pudo ejecutar sudo sin contraseña. Intentando con contraseña...[/yellow]")
-
-                    # Pedir la contraseña SSH al usuario
-                    ssh_password = Prompt.ask("[🔐] Introduzca su contraseña SSH para sudo")
-
-                    # Llamada para introducir contraseña para usar sudo
-                    output, error = self.run_sudo_command(ssh_password, cmd)
-
-                    if error:
-                        raise Exception(f"No se pudo configurar el servidor para aceptar certificados: {error}")
+                    self.console.print("[blue]📦 Comprobando la confianza del servidor en la CA...[/blue]")
+                    if CertificateAuthority(ca_key_path).ensure_server_trust(self.client, self.run_privileged):
+                        self.console.print("[green]✔ Servidor configurado para aceptar certificados[/green]")
                     else:
-                        self.console.print(
-                            "[green]✔ Servidor configurado para aceptar certificados usando sudo con contraseña[/green]")
-                else:
-                    self.console.print("[green]✔ Servidor configurado correctamente con sudo sin contraseña[/green]")
+                        self.console.print("[green]✔ El servidor ya confía en la CA (sin cambios en sshd)[/green]")
 
             """
             El método invoke_shell() crea una shell interactiva. Esta inicialización sirve para que el usuario, si 
@@ -328,11 +317,123 @@ class SSHConnection:
             """
             self.shell = self.client.invoke_shell()
             self.console.print("\n[i] Estado: [bold green]Conectado[/bold green]")
+            # Vigila la conexión en segundo plano para restablecerla si se pierde (ej: NAT que la descarta)
+            if self.keepalive_interval > 0:
+                self.monitor = ConnectionMonitor(self, self.keepalive_interval, ConnectionConfig.keepalive_timeout)
+                self.monitor.start()
             return True
 
         except Exception as e:
             raise Exception(f"No se pudo conectar: {str(e)}")
 
+    """
+    Método que conecta sin menús ni preguntas, para usos desde la línea de comandos (ej: transferencias por
+    tuberías, en las que la salida estándar lleva los datos). Prueba el agente SSH y las claves de ~/.ssh y, si el
+    servidor las rechaza y se ha indicado ask_password, pide la contraseña sin mostrarla.
+    No abre el shell interactivo.
+    """
+
+    def connect_unattended(self, ask_password=None):
+        try:
+            # Como ssh, una IdentityFile que no existe se ignora
+            identity_file = self.identity_file if self.identity_file and os.path.exists(self.identity_file) else None
+            self._connect_client(look_for_keys=True, allow_agent=True, key_filename=identity_file)
+        except paramiko.SSHException:
+            # Claves rechazadas o ninguna disponible: el transporte sigue activo, solo ha fallado la autenticación
+            transport = self.client.get_transport()
+            if ask_password is None or transport is None or not transport.is_active():
+                raise
+            self.client.close()
+            self.auth_method = "contraseña"
+            self._connect_client(password=ask_password(f"Contraseña de {self.username}@{self.host}: "),
+                                 look_for_keys=False, allow_agent=False)
+
+    """
+    Método auxiliar que abre el socket sobre el que se establece la conexión SSH.
+    Con ProxyCommand se conecta a través del comando; si hay bastiones configurados devuelve un canal direct-tcpip
+    a través de ellos; si no, abre una conexión TCP directa compitiendo entre todas las direcciones del host (ver
+    SocketConnector).
+    """
+
+    def open_socket(self):
+        if self.proxy_command:
+            return paramiko.ProxyCommand(self.proxy_command)
+        if self.jump_hosts:
+            return JumpHost.open_channel(self.jump_hosts, self.host, self.port, ConnectionConfig.connect_timeout)
+        return SocketConnector.connect(self.host, self.port, ConnectionConfig.connect_timeout)
+
+    """
+    Método auxiliar que realiza la conexión SSH con el servidor usando los parámetros de autenticación recibidos.
+    Todos los métodos de autenticación pasan por aquí, de modo que el destino, el puerto y el socket
+    (directo o a través de bastiones) se configuran en un único sitio.
+    Con la instrumentación activada, toda la conexión queda dentro del span ssh.connect.
+    Las credenciales se guardan en memoria mientras la conexión esté abierta para poder reconectar (ver recover).
+    """
+
+    def _connect_client(self, **auth_kwargs):
+        with Metrics.span("ssh.connect", host=self.host, method=self.auth_method, profile=self.profile.name,
+                          jump_hosts=len(self.jump_hosts)):
+            self.client.connect(
+                hostname=self.host,
+                username=self.username,
+                port=self.port,
+                sock=self.open_socket(),
+                timeout=ConnectionConfig.connect_timeout,
+                banner_timeout=ConnectionConfig.banner_timeout,
+                auth_timeout=ConnectionConfig.auth_timeout,
+                transport_factory=functools.partial(self.profile.transport_factory, host=self.host),
+                compress=self.profile.compress,
+                **auth_kwargs
+            )
+        self._auth_kwargs = auth_kwargs
+        if self.keepalive_interval > 0:
+            # Tráfico periódico para que NAT y cortafuegos no descarten la conexión cuando está inactiva
+            self.client.get_transport().set_keepalive(self.keepalive_interval)
+
+    """
+    Método que restablece la conexión si se ha perdido, con las mismas credenciales y sin preguntar nada.
+    Se usa desde el hilo de vigilancia (ConnectionMonitor) y desde quien detecta un shell cerrado.
+    Devuelve True si hay un shell nuevo que usar en lugar de shell (porque se ha reconectado ahora o porque otro
+    hilo ya lo hizo) y False si la conexión sigue viva (el shell se cerró por otro motivo) o no se pudo reconectar.
+    :param shell: Shell que ha dejado de funcionar para quien llama (None desde el hilo de vigilancia)
+    """
+
+    def recover(self, shell=None):
+        with self._reconnect_lock:
+            if shell is not None and shell is not self.shell:
+                return True
+            transport = self.client.get_transport()
+            if self._auth_kwargs is None or (transport is not None and transport.is_active()):
+                return False
+            return self._reconnect()
+
+    """
+    Método auxiliar que vuelve a conectar (con varios intentos y esperas crecientes), abre un shell nuevo si había
+    uno y avisa a reconnect_listeners. El SSHClient es el mismo, así que quien lo tenga (SFTP, sudo, claves) pasa a
+    usar el transporte nuevo sin hacer nada.
+    """
+
+    def _reconnect(self):
+        for attempt in range(1, ConnectionConfig.reconnect_attempts + 1):
+            self.console.print(f"\n[yellow]⚠ Conexión con {self.host} perdida, reconectando "
+                               f"(intento {attempt} de {ConnectionConfig.reconnect_attempts})...[/yellow]")
+            try:
+                with Metrics.span("ssh.reconnect", host=self.host, attempt=attempt):
+                    self.client.close()
+                    self._connect_client(**self._auth_kwargs)
+                    if self.shell is not None:
+                        self.shell = self.client.invoke_shell()
+            except Exception as e:
+                self.console.print(f"[red]✖ No se pudo reconectar: {e}[/red]")
+                time.sleep(min(2 ** attempt, 30))
+                continue
+            for listener in self.reconnect_listeners:
+                listener(self)
+            self.console.print("[green]✔ Reconectado (el shell es nuevo: el directorio actual y las variables "
+                               "no se conservan)[/green]")
+            return True
+        return False
+
     """
     Método auxiliar que se utiliza en la autenticación por clave, agente y certificado para preguntar si ya tiene
     las claves generadas y la clave pública enviada al servidor remoto (estos pasos son necesarios para estos tres
@@ -364,23 +465,51 @@ class SSHConnection:
         return True
 
     """
-    Método que ejecuta un comando remoto con privilegios de sudo, 
-    incluso si el servidor requiere introducir una contraseña.
-    Se utiliza en la autenticación por certificado
+    Método que ejecuta un comando remoto con privilegios de administrador sobre la conexión ya abierta (ver
+    SudoSession). Si el servidor pide contraseña para sudo se pregunta al usuario una sola vez por sesión.
+    Devuelve True si el comando se ejecutó correctamente.
+    """
+
+    def run_privileged(self, cmd):
+        try:
+            status, output = self.get_sudo().run(cmd)
+        except Exception as e:
+            self.console.print(f"[bold red]✖ No se pudo ejecutar con sudo: {e}[/bold red]")
+            return False
+        if status != 0:
+            self.console.print(f"[red]✖ El comando con sudo terminó con código {status}: {output[-300:]}[/red]")
+        return status == 0
+
+    """
+    Método que ejecuta un comando remoto con sudo usando la contraseña indicada (se guarda para el resto de la
+    sesión). Devuelve (salida, error), con error a None si el comando terminó bien.
+    La contraseña indicada solo sustituye a la pregunta al usuario durante este comando: si más adelante sudo la
+    rechaza, se vuelve a preguntar en lugar de reintentar la misma.
     """
 
     def run_sudo_command(self, password, command):
-        ssh_command = f"ssh -p {self.port} {self.username}@{self.host} 'sudo -S {command}'"
-        child = pexpect.spawn(ssh_command, encoding='utf-8', timeout=10)
+        sudo = self.get_sudo()
+        ask_password = sudo.ask_password
+        sudo.ask_password = lambda: password
+        sudo.forget()
         try:
-            i = child.expect([r"\[sudo\] password for .*:", pexpect.EOF, pexpect.TIMEOUT])
-            if i == 0:
-                child.sendline(password)
-                child.expect(pexpect.EOF)
-            output = str(child.before) + str(child.after)
-            return output, None
-        except pexpect.ExceptionPexpect as e:
+            status, output = sudo.run(command)
+        except Exception as e:
             return "", str(e)
+        finally:
+            sudo.ask_password = ask_password
+        return output, None if status == 0 else f"código de salida {status}"
+
+    """
+    Método que devuelve la sesión sudo de la conexión (se crea la primera vez), que guarda la contraseña de sudo
+    mientras la conexión esté abierta.
+    """
+
+    def get_sudo(self):
+        if self.sudo is None:
+            self.sudo = SudoSession(self.client, host=self.host, ask_password=lambda: Prompt.ask(
+                f"[🔐] Contraseña de sudo para {self.username}@{self.host}", password=True))
+        return self.sudo
 
     """
     Método que devuelve el shell interactivo para ejecutar comandos en tiempo real
@@ -401,6 +530,11 @@ class SSHConnection:
     """
 
     def close(self):
+        if self.monitor:
+            self.monitor.stop()
+        self._auth_kwargs = None
+        if self.sudo:
+            self.sudo.forget()
         if self.client:
             self.client.close()
             self.console.print("[i] Estado: [bold yellow]Conexión cerrada[/bold yellow]")
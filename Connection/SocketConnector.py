@@ -0,0 +1,158 @@
+# Importaciones necesarias de librerías
+import queue
+import socket
+import threading
+import time
+# Importaciones necesarias de otras clases
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que establece la conexión TCP con el servidor antes del handshake SSH.
+- Resuelve todos los registros A/AAAA del host y guarda el resultado en una caché con caducidad (TTL).
+- Compite entre las direcciones al estilo "happy eyeballs" (RFC 8305): empieza por la primera dirección y, si no
+  responde en un breve intervalo, lanza en paralelo un intento con la siguiente. Gana la primera que conecte.
+- Aplica un tiempo máximo de conexión, de modo que un host caído no bloquea durante el timeout TCP del sistema.
+"""
+
+
+class SocketConnector:
+    # Tiempo (segundos) que se reutiliza una resolución DNS
+    DNS_TTL = 300
+    # Tiempo (segundos) que se espera a un intento antes de lanzar el siguiente en paralelo
+    ATTEMPT_DELAY = 0.25
+
+    # Caché DNS compartida: (host, puerto) -> (instante_de_caducidad, lista de direcciones)
+    _dns_cache = {}
+    _dns_lock = threading.Lock()
+
+    """
+    Método estático que resuelve un host y devuelve la lista de direcciones (familia, dirección) a probar.
+    Las direcciones IPv6 e IPv4 se intercalan para que un fallo de una familia no retrase a la otra.
+    """
+
+    @staticmethod
+    def resolve(host, port):
+        key = (host, int(port))
+        now = time.monotonic()
+        with SocketConnector._dns_lock:
+            cached = SocketConnector._dns_cache.get(key)
+            if cached and cached[0] > now:
+                Metrics.count("dns.cache", host=host, result="hit")
+                return cached[1]
+
+        Metrics.count("dns.cache", host=host, result="miss")
+        with Metrics.span("dns.resolve", host=host):
+            infos = socket.getaddrinfo(host, int(port), socket.AF_UNSPEC, socket.SOCK_STREAM)
+        ipv6 = [(family, addr) for family, _, _, _, addr in infos if family == socket.AF_INET6]
+        ipv4 = [(family, addr) for family, _, _, _, addr in infos if family == socket.AF_INET]
+
+        addresses = []
+        for i in range(max(len(ipv6), len(ipv4))):
+            addresses.extend(group[i] for group in (ipv6, ipv4) if i < len(group))
+        # Se eliminan duplicados manteniendo el orden
+        addresses = list(dict.fromkeys(addresses))
+
+        with SocketConnector._dns_lock:
+            SocketConnector._dns_cache[key] = (now + SocketConnector.DNS_TTL, addresses)
+        return addresses
+
+    """
+    Método estático que elimina de la caché DNS un host (o toda la caché si no se indica host).
+    """
+
+    @staticmethod
+    def invalidate(host=None, port=None):
+        with SocketConnector._dns_lock:
+            if host is None:
+                SocketConnector._dns_cache.clear()
+            else:
+                SocketConnector._dns_cache.pop((host, int(port or 22)), None)
+
+    """
+    Método estático que abre una conexión TCP con el host compitiendo entre todas sus direcciones.
+    :param host: Nombre o IP del servidor
+    :param port: Puerto del servidor
+    :param timeout: Tiempo máximo total (segundos) para conectar
+    :return: Socket conectado
+    """
+
+    @staticmethod
+    def connect(host, port, timeout=10):
+        with Metrics.span("tcp.connect", host=host) as span:
+            sock = SocketConnector._race(host, port, timeout)
+            span.set(address=sock.getpeername()[0])
+        return sock
+
+    """
+    Método auxiliar que lanza los intentos de conexión escalonados y devuelve el primer socket conectado.
+    """
+
+    @staticmethod
+    def _race(host, port, timeout):
+        addresses = SocketConnector.resolve(host, port)
+        results = queue.Queue()
+
+        def attempt(family, address):
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            try:
+                sock.connect(address)
+            except OSError as e:
+                sock.close()
+                results.put((None, e))
+                return
+            results.put((sock, None))
+
+        deadline = time.monotonic() + timeout
+        started = 0
+        pending = 0
+        winner = None
+        last_error = None
+
+        while True:
+            # Lanza el siguiente intento (al empezar, al fallar uno o al agotarse la espera del anterior)
+            if started < len(addresses):
+                threading.Thread(target=attempt, args=addresses[started], daemon=True).start()
+                started += 1
+                pending += 1
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait = min(SocketConnector.ATTEMPT_DELAY, remaining) if started < len(addresses) else remaining
+            try:
+                sock, error = results.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+            pending -= 1
+            if sock is not None:
+                winner = sock
+                break
+            last_error = error
+            if pending == 0 and started == len(addresses):
+                break
+
+        # Los intentos que sigan en curso se cierran en segundo plano cuando terminen
+        if pending:
+            threading.Thread(target=SocketConnector._discard, args=(results, pending), daemon=True).start()
+
+        if winner is None:
+            # Si no se pudo conectar a ninguna dirección, la próxima vez se vuelve a resolver el host
+            SocketConnector.invalidate(host, port)
+            if last_error is not None:
+                raise last_error
+            raise socket.timeout(f"Tiempo de conexión agotado ({timeout}s) con {host}:{port}")
+
+        return winner
+
+    """
+    Método auxiliar que recoge los intentos perdedores y cierra sus sockets.
+    """
+
+    @staticmethod
+    def _discard(results, pending):
+        for _ in range(pending):
+            sock, _ = results.get()
+            if sock is not None:
+                sock.close()
@@ -0,0 +1,107 @@
+# Importaciones necesarias de librerías
+import secrets
+import shlex
+import socket
+# Importaciones necesarias de otras clases
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que ejecuta comandos con sudo sobre la conexión SSH ya abierta (un canal exec con PTY), sin lanzar otro
+proceso ssh ni repetir el handshake.
+- sudo recibe con -p un indicador de contraseña aleatorio, así que se detecta sin depender del idioma del servidor
+  (el "[sudo] password for" de siempre cambia con la configuración regional).
+- La contraseña se escribe en el canal solo cuando aparece ese indicador; sudo desactiva el eco en la PTY, de
+  modo que no vuelve en la salida. Si sudo no la pide (NOPASSWD), el comando cuesta un único canal.
+- La contraseña se guarda en memoria durante la sesión (la conexión SSH) y se reutiliza en los siguientes comandos;
+  si el servidor la rechaza se descarta y se vuelve a pedir la próxima vez.
+Se usa una PTY porque algunos servidores obligan a ello (Defaults requiretty).
+
+Ejemplo de uso:
+    sudo = SudoSession(client, ask_password=lambda: Prompt.ask("Contraseña de sudo", password=True))
+    status, output = sudo.run("systemctl restart ssh")
+"""
+
+
+class SudoSession:
+    # Tiempo máximo (segundos) sin recibir nada del comando antes de abandonarlo
+    TIMEOUT = 60
+    # Tamaño máximo de cada lectura del canal
+    READ_SIZE = 32768
+
+    """
+    Constructor de la clase.
+    :param client: Cliente paramiko conectado
+    :param ask_password: Función sin argumentos que devuelve la contraseña de sudo (se llama solo si hace falta)
+    :param host: Nombre del servidor (solo se usa como etiqueta de las métricas)
+    """
+
+    def __init__(self, client, ask_password=None, host=None):
+        self.client = client
+        self.ask_password = ask_password
+        self.host = host
+        self._password = None
+        # Indicador que sudo muestra al pedir la contraseña; aleatorio para que no pueda salir en la salida normal
+        self._marker = f"[sshtool-sudo-{secrets.token_hex(8)}]"
+
+    """
+    Método que ejecuta un comando como root y devuelve (código de salida, salida combinada).
+    El comando se ejecuta con sh -c, así que admite tuberías y redirecciones.
+    Lanza PermissionError si sudo pide la contraseña y no hay forma de obtenerla o si la rechaza.
+    """
+
+    def run(self, command, timeout=None):
+        sudo_command = f"sudo -S -p {shlex.quote(self._marker)} -- sh -c {shlex.quote(command)}"
+        marker = self._marker.encode()
+        with Metrics.span("sudo.exec", host=self.host) as span:
+            channel = self.client.get_transport().open_session()
+            try:
+                channel.get_pty()
+                channel.settimeout(timeout or self.TIMEOUT)
+                channel.exec_command(sudo_command)
+                output = b""
+                prompts = 0
+                echo = None  # (posición, texto) donde aparecería la contraseña si la PTY tuviese el eco activo
+                while True:
+                    try:
+                        data = channel.recv(self.READ_SIZE)
+                    except socket.timeout:
+                        raise TimeoutError(f"sudo no respondió en {timeout or self.TIMEOUT} segundos")
+                    if not data:
+                        break
+                    output += data
+                    if marker not in output:
+                        continue
+                    output = output.replace(marker, b"")
+                    prompts += 1
+                    if prompts > 1:
+                        # Segunda petición: la contraseña enviada no era válida
+                        self._password = None
+                        raise PermissionError("sudo ha rechazado la contraseña")
+                    password = self._get_password().encode()
+                    echo = (len(output), password)
+                    channel.sendall(password + b"\n")
+                status = channel.recv_exit_status()
+            finally:
+                channel.close()
+            span.set(status=str(status), result="password" if prompts else "nopasswd")
+        # sudo desactiva el eco antes de pedir la contraseña, pero si la PTY llega a devolverla no se muestra
+        if echo:
+            position, password = echo
+            rest = output[position:].lstrip(b"\r\n")
+            if password and rest.startswith(password):
+                output = output[:position] + rest[len(password):]
+        return status, output.decode("utf-8", errors="replace").replace("\r\n", "\n").strip()
+
+    """
+    Método que descarta la contraseña guardada (ej: al cerrar la conexión).
+    """
+
+    def forget(self):
+        self._password = None
+
+    def _get_password(self):
+        if self._password is None:
+            if self.ask_password is None:
+                raise PermissionError("sudo necesita contraseña y no se ha indicado cómo pedirla")
+            self._password = self.ask_password()
+        return self._password
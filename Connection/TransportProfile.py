@@ -0,0 +1,320 @@
+# Importaciones necesarias de librerías
+import os
+import paramiko
+# Importaciones necesarias de otras clases
+from Connection.MappedFile import MappedFile
+from Instrumentation.InstrumentedTransport import InstrumentedTransport
+from Instrumentation.Metrics import Metrics
+
+"""
+Clase que define perfiles de ajuste del transporte SSH según el tipo de red.
+Cada perfil fija:
+- Los cifrados y MACs preferidos (en orden) y si se usa compresión. Se aplican al transporte completo,
+  por lo que se eligen por host al conectar.
+- El tamaño de ventana y de paquete de los canales y el tamaño y número de peticiones SFTP en vuelo.
+  Se aplican a cada canal, por lo que también se pueden elegir por operación (ej: una transferencia concreta).
+
+Perfiles disponibles:
+- default: valores por defecto de paramiko
+- lan-throughput: redes rápidas; cifrado AES-GCM, ventana grande y muchas peticiones SFTP en paralelo
+- wan-compressed: enlaces lentos; compresión zlib y ventana grande para ocultar la latencia
+- low-latency: sesiones interactivas; paquetes pequeños y ventana moderada para no acumular datos en cola
+"""
+
+
+class TransportProfile:
+    # Perfiles registrados (se rellena al final del módulo)
+    PROFILES = {}
+    # Tamaño (bytes) a partir del cual put() y get() usan el archivo local proyectado en memoria (ver MappedFile)
+    MMAP_THRESHOLD = 8 * 1024 * 1024
+    # Peticiones en vuelo de las descargas con límite de velocidad (sin prefetch, que pediría el archivo entero)
+    THROTTLED_WINDOW_BLOCKS = 8
+
+    """
+    Constructor de la clase. Los parámetros con valor None mantienen el valor por defecto de paramiko.
+    """
+
+    def __init__(self, name, ciphers=None, macs=None, compress=False, window_size=None, max_packet_size=None,
+                 sftp_request_size=32768, sftp_prefetch_requests=None):
+        self.name = name
+        self.ciphers = ciphers
+        self.macs = macs
+        self.compress = compress
+        self.window_size = window_size
+        self.max_packet_size = max_packet_size
+        self.sftp_request_size = sftp_request_size
+        self.sftp_prefetch_requests = sftp_prefetch_requests
+
+    """
+    Método estático que devuelve un perfil por nombre (o el perfil por defecto si el nombre no existe).
+    Acepta también una instancia de TransportProfile, que se devuelve tal cual.
+    """
+
+    @staticmethod
+    def by_name(name):
+        if isinstance(name, TransportProfile):
+            return name
+        return TransportProfile.PROFILES.get(name or "default", TransportProfile.PROFILES["default"])
+
+    """
+    Método estático que devuelve los nombres de los perfiles disponibles (para los menús).
+    """
+
+    @staticmethod
+    def names():
+        return list(TransportProfile.PROFILES.keys())
+
+    """
+    Método que crea el transporte de paramiko con los ajustes del perfil.
+    Se pasa a SSHClient.connect() como transport_factory, de modo que el orden de cifrados y MACs se fija
+    antes de la negociación de claves. Los algoritmos que paramiko no soporte se ignoran.
+    Si la instrumentación está activada se usa InstrumentedTransport para medir cada fase de la conexión.
+    :param host: Nombre del servidor (solo se usa como etiqueta de las métricas)
+    """
+
+    def transport_factory(self, sock, disabled_algorithms=None, host=None):
+        kwargs = {"disabled_algorithms": disabled_algorithms}
+        if self.window_size:
+            kwargs["default_window_size"] = self.window_size
+        if self.max_packet_size:
+            kwargs["default_max_packet_size"] = self.max_packet_size
+        if Metrics.enabled:
+            transport = InstrumentedTransport(sock, host, **kwargs)
+        else:
+            transport = paramiko.Transport(sock, **kwargs)
+
+        options = transport.get_security_options()
+        if self.ciphers:
+            supported = [c for c in self.ciphers if c in options.ciphers]
+            if supported:
+                options.ciphers = supported + [c for c in options.ciphers if c not in supported]
+        if self.macs:
+            supported = [m for m in self.macs if m in options.digests]
+            if supported:
+                options.digests = supported + [m for m in options.digests if m not in supported]
+        return transport
+
+    """
+    Método que abre una sesión SFTP con la ventana y el tamaño de paquete del perfil.
+    """
+
+    def open_sftp(self, client):
+        transport = client.get_transport()
+        with Metrics.span("sftp.open", host=getattr(transport, "host", None), profile=self.name):
+            return paramiko.SFTPClient.from_transport(
+                transport,
+                window_size=self.window_size,
+                max_packet_size=self.max_packet_size
+            )
+
+    """
+    Método que sube un archivo por SFTP usando el tamaño de petición del perfil.
+    Las escrituras se envían en modo pipeline (sin esperar la respuesta de cada una).
+    Los archivos de MMAP_THRESHOLD bytes o más se proyectan en memoria y cada petición recibe directamente un corte
+    de la proyección, sin leer el archivo a búferes intermedios.
+    :param throttle: Función que recibe el tamaño de cada bloque y espera si hay límite de velocidad
+                     (ej: Flow.throttle de BandwidthLimiter)
+    """
+
+    def put(self, sftp, local_path, remote_path, callback=None, throttle=None):
+        file_size = os.stat(local_path).st_size
+        with sftp.open(remote_path, "wb") as remote_file:
+            remote_file.MAX_REQUEST_SIZE = self.sftp_request_size
+            remote_file.set_pipelined(True)
+            if file_size >= self.MMAP_THRESHOLD:
+                with MappedFile.reader(local_path) as view:
+                    for offset in range(0, file_size, self.sftp_request_size):
+                        with view[offset:offset + self.sftp_request_size] as block:
+                            if throttle:
+                                throttle(len(block))
+                            remote_file.write(block)
+                        if callback:
+                            callback(min(offset + self.sftp_request_size, file_size), file_size)
+            else:
+                with open(local_path, "rb") as local_file:
+                    transferred = 0
+                    while True:
+                        data = local_file.read(self.sftp_request_size)
+                        if not data:
+                            break
+                        if throttle:
+                            throttle(len(data))
+                        remote_file.write(data)
+                        transferred += len(data)
+                        if callback:
+                            callback(transferred, file_size)
+
+        # Igual que sftp.put(): se comprueba que el tamaño remoto coincide con el local
+        remote_size = sftp.stat(remote_path).st_size
+        if remote_size != file_size:
+            raise IOError(f"Tamaño incorrecto en el servidor: {remote_size} != {file_size}")
+
+    """
+    Método que descarga un archivo por SFTP con lectura anticipada (prefetch) y el tamaño de petición del perfil.
+    Los archivos de MMAP_THRESHOLD bytes o más se escriben en un archivo local reservado con su tamaño final y
+    proyectado en memoria: cada bloque se copia en su posición, sin pasar por el búfer del objeto archivo.
+    Con throttle no se usa prefetch (pediría todo el archivo de golpe, sin límite): los bloques se piden por
+    ventanas pequeñas (read_blocks) y cada ventana espera a que el límite la permita.
+    """
+
+    def get(self, sftp, remote_path, local_path, callback=None, throttle=None):
+        with sftp.open(remote_path, "rb") as remote_file:
+            remote_file.MAX_REQUEST_SIZE = self.sftp_request_size
+            file_size = remote_file.stat().st_size
+            if throttle:
+                blocks = self.read_blocks(remote_file, file_size, self.sftp_request_size,
+                                          self.THROTTLED_WINDOW_BLOCKS, throttle)
+            else:
+                remote_file.prefetch(file_size, self.sftp_prefetch_requests)
+                blocks = iter(lambda: remote_file.read(self.sftp_request_size), b"")
+            transferred = 0
+            if file_size >= self.MMAP_THRESHOLD:
+                try:
+                    with MappedFile.writer(local_path, file_size) as view:
+                        for data in blocks:
+                            view[transferred:transferred + len(data)] = data
+                            transferred += len(data)
+                            if callback:
+                                callback(transferred, file_size)
+                            if transferred >= file_size:
+                                break
+                finally:
+                    # El archivo se reservó con el tamaño final: si la descarga no termina se recorta a lo recibido,
+                    # para que no parezca completo (relleno de ceros) a quien compruebe el tamaño o quiera reanudar
+                    if transferred < file_size and os.path.exists(local_path):
+                        os.truncate(local_path, transferred)
+            else:
+                with open(local_path, "wb") as local_file:
+                    for data in blocks:
+                        local_file.write(data)
+                        transferred += len(data)
+                        if callback:
+                            callback(transferred, file_size)
+
+        if transferred != file_size:
+            raise IOError(f"Tamaño incorrecto en la descarga: {transferred} != {file_size}")
+
+    """
+    Método que sube por SFTP datos de cualquier origen, sin necesidad de un archivo local ni de conocer el tamaño:
+    - Un objeto con readinto() (ej: sys.stdin.buffer, un pipe, un socket.makefile): se lee siempre sobre el mismo
+      búfer a través de un memoryview, sin crear un objeto bytes por bloque.
+    - Un objeto con read() (archivos y flujos de cualquier tipo).
+    - Un iterable o generador de bloques bytes (ej: la salida de un compresor).
+    La memoria usada es constante (un búfer de buffer_size bytes más las escrituras en vuelo).
+    :param buffer_size: Tamaño del búfer de lectura (por defecto, el tamaño de petición SFTP del perfil)
+    :return: Bytes subidos
+    """
+
+    def put_stream(self, sftp, source, remote_path, callback=None, buffer_size=None, throttle=None):
+        buffer_size = buffer_size or self.sftp_request_size
+        transferred = 0
+        with sftp.open(remote_path, "wb") as remote_file:
+            remote_file.MAX_REQUEST_SIZE = self.sftp_request_size
+            remote_file.set_pipelined(True)
+            for block in self._source_blocks(source, buffer_size):
+                if throttle:
+                    throttle(len(block))
+                remote_file.write(block)
+                transferred += len(block)
+                if callback:
+                    callback(transferred, None)
+        return transferred
+
+    """
+    Método que descarga un archivo por SFTP hacia cualquier destino con write() (ej: sys.stdout.buffer, un pipe,
+    un socket) o hacia una función que reciba cada bloque. Los bloques se piden por ventanas (ver read_blocks),
+    así que la memoria usada no depende del tamaño del archivo aunque el destino sea lento.
+    :param buffer_size: Tamaño de cada bloque pedido (por defecto, el tamaño de petición SFTP del perfil)
+    :param window_blocks: Peticiones en vuelo por ventana
+    :return: Bytes descargados
+    """
+
+    def get_stream(self, sftp, remote_path, sink, callback=None, buffer_size=None, window_blocks=64,
+                   throttle=None):
+        write = sink if callable(sink) else sink.write
+        buffer_size = buffer_size or self.sftp_request_size
+        transferred = 0
+        with sftp.open(remote_path, "rb") as remote_file:
+            file_size = remote_file.stat().st_size
+            if throttle:
+                window_blocks = min(window_blocks, self.THROTTLED_WINDOW_BLOCKS)
+            for block in self.read_blocks(remote_file, file_size, buffer_size, window_blocks, throttle):
+                write(block)
+                transferred += len(block)
+                if callback:
+                    callback(transferred, file_size)
+        if transferred != file_size:
+            raise IOError(f"Tamaño incorrecto en la descarga: {transferred} != {file_size}")
+        return transferred
+
+    """
+    Método estático (generador) que lee un archivo SFTP en bloques, pidiendo window_blocks bloques a la vez (readv).
+    A diferencia de prefetch(), que pide el archivo entero y guarda en memoria todo lo que llega, solo hay una
+    ventana en vuelo, de modo que la memoria queda acotada a window_blocks × block_size.
+    :param throttle: Función a la que se pasa el tamaño de cada ventana antes de pedirla (límite de velocidad)
+    """
+
+    @staticmethod
+    def read_blocks(remote_file, size, block_size, window_blocks=64, throttle=None):
+        window = block_size * window_blocks
+        for start in range(0, size, window):
+            chunks = [(offset, min(block_size, size - offset))
+                      for offset in range(start, min(start + window, size), block_size)]
+            if throttle:
+                throttle(sum(length for _, length in chunks))
+            yield from remote_file.readv(chunks)
+
+    """
+    Método auxiliar (generador) que convierte cualquier origen de datos en bloques para put_stream().
+    """
+
+    @staticmethod
+    def _source_blocks(source, buffer_size):
+        if hasattr(source, "readinto"):
+            view = memoryview(bytearray(buffer_size))
+            while True:
+                count = source.readinto(view)
+                if not count:
+                    return
+                # La escritura SFTP copia los datos al paquete, así que el búfer se puede reutilizar enseguida
+                yield view[:count]
+        elif hasattr(source, "read"):
+            while True:
+                data = source.read(buffer_size)
+                if not data:
+                    return
+                yield data.encode() if isinstance(data, str) else data
+        else:
+            for data in source:
+                if data:
+                    yield data.encode() if isinstance(data, str) else data
+
+
+TransportProfile.PROFILES = {
+    "default": TransportProfile("default"),
+    "lan-throughput": TransportProfile(
+        "lan-throughput",
+        ciphers=["aes128-gcm@openssh.com", "aes256-gcm@openssh.com", "aes128-ctr"],
+        macs=["hmac-sha2-256-etm@openssh.com", "hmac-sha2-256"],
+        window_size=16 * 1024 * 1024,
+        max_packet_size=128 * 1024,
+        sftp_request_size=64 * 1024,
+    ),
+    "wan-compressed": TransportProfile(
+        "wan-compressed",
+        ciphers=["aes128-ctr", "aes128-gcm@openssh.com"],
+        macs=["hmac-sha2-256-etm@openssh.com", "hmac-sha2-256"],
+        compress=True,
+        window_size=16 * 1024 * 1024,
+        max_packet_size=32 * 1024,
+        sftp_request_size=32 * 1024,
+    ),
+    "low-latency": TransportProfile(
+        "low-latency",
+        ciphers=["aes128-ctr", "aes128-gcm@openssh.com"],
+        macs=["hmac-sha2-256-etm@openssh.com", "hmac-sha2-256"],
+        window_size=1024 * 1024,
+        max_packet_size=16 * 1024,
+        sftp_request_size=16 * 1024,
+    ),
+}
@@ -5,6 +5,8 @@ import time
 from rich.console import Console
 from rich.prompt import Prompt
 from os.path import expanduser
+from Connection.KnownHostsStore import KnownHostsStore
+from Instrumentation.Metrics import Metrics
 
 """
 Clase que gestiona la creación de túneles SSH (locales y remotos) utilizando claves privadas.
@@ -14,14 +16,14 @@ Clase que gestiona la creación de túneles SSH (locales y remotos) utilizando c
 class Tunnel:
     """
     Opciones para configurar el comportamiento de la conexión SSH.
-    - Desactiva la comprobación estricta de claves de host (StrictHostKeyChecking).
-    - Evita guardar claves de host en el archivo known_hosts (UserKnownHostsFile).
+    - Acepta la clave de un host nuevo y la guarda, pero rechaza claves que cambien (StrictHostKeyChecking).
+    - Usa el mismo archivo known_hosts que KnownHostsStore (UserKnownHostsFile).
     - Establece un tiempo de 60 segundos para mantener la conexión ssh activa (ServerAliveInterval).
     """
 
     SSH_OPTIONS = [
-        "-o", "StrictHostKeyChecking=no",
-        "-o", "UserKnownHostsFile=/dev/null",
+        "-o", "StrictHostKeyChecking=accept-new",
+        "-o", f"UserKnownHostsFile={KnownHostsStore.default().path}",
         "-o", "ServerAliveInterval=60"
     ]
 
@@ -48,36 +50,13 @@ class Tunnel:
         key_path = expanduser(key_path)
 
         # Construye el comando SSH.
-        command = [
-            "ssh",
-            *Tunnel.SSH_OPTIONS,
-            "-i", key_path,
-            "-L", f"{local_port}:{remote_host}:{remote_port}",
-            f"{user}@{host}",
-            "-p", str(port),
-            "-N" # No ejecutar comandos remotos, solo establecer la conexión.
-        ]
+        command = Tunnel.build_command(user, host, port, key_path,
+                                       "-L", f"{local_port}:{remote_host}:{remote_port}")
 
         console.print(f"[dim]Ejecutando:[/dim] {' '.join(command)}")
 
         try:
-            # Lanza el comando en segundo plano como un proceso separado.
-            proc = subprocess.Popen(
-                command,
-                stdin=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.PIPE,
-                start_new_session=True # Permite que el túnel siga activo si la herramienta se cierra.
-            )
-
-            # Espera un segundo para detectar errores.
-            time.sleep(1)
-
-            # Si el proceso ha terminado, extrae el error
-            if proc.poll() is not None:
-                _, err = proc.communicate()
-                raise RuntimeError(f"SSH falló: {err.decode().strip()}")
-
+            Tunnel.launch(command)
             console.print("[bold green]✔ Túnel local iniciado en segundo plano[/bold green]")
         except Exception as e:
             console.print(f"[bold red]✖ Error al crear túnel:[/bold red] {e}")
@@ -96,34 +75,58 @@ class Tunnel:
         key_path = expanduser(key_path)
 
         # Construye el comando SSH.
-        command = [
+        command = Tunnel.build_command(user, host, port, key_path,
+                                       "-R", f"{remote_port}:{local_host}:{local_port}")
+
+        console.print(f"[dim]Ejecutando:[/dim] {' '.join(command)}")
+
+        try:
+            Tunnel.launch(command)
+            console.print("[bold green]✔ Túnel remoto iniciado en segundo plano[/bold green]")
+        except Exception as e:
+            console.print(f"[bold red]✖ Error al crear túnel:[/bold red] {e}")
+
+    """
+    Método que construye el comando ssh de un túnel.
+    :param forward: Opción de reenvío ("-L" o "-R") seguida de su especificación
+    :param ssh_options: Opciones de ssh (por defecto SSH_OPTIONS)
+    """
+
+    @staticmethod
+    def build_command(user, host, port, key_path, *forward, ssh_options=None):
+        return [
             "ssh",
-            *Tunnel.SSH_OPTIONS,
+            *(Tunnel.SSH_OPTIONS if ssh_options is None else ssh_options),
             "-i", key_path,
-            "-R", f"{remote_port}:{local_host}:{local_port}",
+            *forward,
             f"{user}@{host}",
             "-p", str(port),
-            "-N"
+            "-N"  # No ejecutar comandos remotos, solo establecer la conexión.
         ]
 
-        console.print(f"[dim]Ejecutando:[/dim] {' '.join(command)}")
+    """
+    Método que lanza el comando del túnel en segundo plano y comprueba que no ha fallado al arrancar.
+    Devuelve el proceso ssh del túnel.
+    """
 
-        try:
-            # Lanza el comando en segundo plano como un proceso separado
+    @staticmethod
+    def launch(command):
+        destination = next((arg for arg in command if "@" in arg), "")
+        with Metrics.span("tunnel.launch", host=destination.rpartition("@")[2], command=" ".join(command)):
+            # Lanza el comando en segundo plano como un proceso separado.
             proc = subprocess.Popen(
                 command,
                 stdin=subprocess.DEVNULL,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
-                start_new_session=True
+                start_new_session=True  # Permite que el túnel siga activo si la herramienta se cierra.
             )
 
+            # Espera un segundo para detectar errores.
             time.sleep(1)
 
+            # Si el proceso ha terminado, extrae el error
             if proc.poll() is not None:
                 _, err = proc.communicate()
                 raise RuntimeError(f"SSH falló: {err.decode().strip()}")
-
-            console.print("[bold green]✔ Túnel remoto iniciado en segundo plano[/bold green]")
-        except Exception as e:
-            console.print(f"[bold red]✖ Error al crear túnel:[/bold red] {e}")
+            return proc
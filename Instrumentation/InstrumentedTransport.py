@@ -0,0 +1,116 @@
+# Importaciones necesarias de librerías
+import paramiko
+# Importaciones necesarias de otras clases
+from Instrumentation.Metrics import Metrics
+
+"""
+Transporte de paramiko que registra en Metrics las fases de la conexión SSH:
+- ssh.kex: negociación de versión e intercambio de claves (start_client)
+- ssh.auth: cada intento de autenticación, con el método y el resultado
+- ssh.channel_open: apertura de canales (session, direct-tcpip...)
+- ssh.exit_status: contador de códigos de salida de los comandos ejecutados
+- ssh.bytes: bytes enviados y recibidos por el socket (cifrados, tal como viajan por la red)
+Solo se usa cuando la instrumentación está activada (ver TransportProfile.transport_factory), así que con la
+instrumentación desactivada no se añade ningún coste al transporte normal.
+"""
+
+
+class InstrumentedTransport(paramiko.Transport):
+    """
+    Constructor de la clase.
+    :param sock: Socket (o canal de un bastión) sobre el que se establece la conexión
+    :param host: Nombre del servidor, usado como etiqueta de las métricas
+    """
+
+    def __init__(self, sock, host=None, **kwargs):
+        self.host = host or "unknown"
+        self._counting_sock = _CountingSocket(sock)
+        self._bytes_reported = False
+        super().__init__(self._counting_sock, **kwargs)
+
+    def start_client(self, event=None, timeout=None):
+        with Metrics.span("ssh.kex", host=self.host) as span:
+            super().start_client(event, timeout)
+            if event is None and self.remote_cipher:
+                span.set(cipher=self.remote_cipher, mac=self.remote_mac)
+
+    def auth_none(self, username):
+        return self._auth("none", super().auth_none, username)
+
+    def auth_password(self, username, password, event=None, fallback=True):
+        return self._auth("password", super().auth_password, username, password, event, fallback)
+
+    def auth_publickey(self, username, key, event=None):
+        method = "certificate" if getattr(key, "public_blob", None) else "publickey"
+        return self._auth(method, super().auth_publickey, username, key, event)
+
+    def auth_interactive(self, username, handler, submethods=""):
+        return self._auth("keyboard-interactive", super().auth_interactive, username, handler, submethods)
+
+    def open_channel(self, kind, *args, **kwargs):
+        with Metrics.span("ssh.channel_open", host=self.host, kind=kind):
+            return super().open_channel(kind, *args, **kwargs)
+
+    """
+    Paramiko llama a este método cuando un canal se cierra: es el punto en el que ya se conoce el código de salida
+    del comando que ejecutaba.
+    """
+
+    def _unlink_channel(self, chanid):
+        channel = self._channels.get(chanid)
+        # exit_status vale -1 en canales sin comando (SFTP, reenvíos) o cerrados antes de recibirlo
+        if channel is not None and channel.exit_status != -1:
+            Metrics.count("ssh.exit_status", host=self.host, status=str(channel.exit_status))
+        super()._unlink_channel(chanid)
+
+    """
+    Los bytes se registran al cerrar aunque la conexión ya se haya caído (son justo las que interesa diagnosticar),
+    pero solo la primera vez: close se puede llamar varias veces.
+    """
+
+    def close(self):
+        if not self._bytes_reported:
+            self._bytes_reported = True
+            Metrics.count("ssh.bytes", self._counting_sock.sent, host=self.host, direction="sent")
+            Metrics.count("ssh.bytes", self._counting_sock.received, host=self.host, direction="received")
+        super().close()
+
+    def _auth(self, method, auth_function, *args):
+        with Metrics.span("ssh.auth", host=self.host, method=method) as span:
+            try:
+                remaining = auth_function(*args)
+            except paramiko.AuthenticationException:
+                span.set(result="rejected")
+                raise
+            span.set(result="partial" if remaining else "ok")
+            return remaining
+
+
+"""
+Envoltorio del socket que cuenta los bytes enviados y recibidos. El resto de operaciones se delegan en el socket.
+"""
+
+
+class _CountingSocket:
+
+    def __init__(self, sock):
+        self._sock = sock
+        self.sent = 0
+        self.received = 0
+
+    def send(self, data):
+        sent = self._sock.send(data)
+        self.sent += sent
+        return sent
+
+    def sendall(self, data):
+        self._sock.sendall(data)
+        self.sent += len(data)
+
+    def recv(self, size):
+        data = self._sock.recv(size)
+        self.received += len(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
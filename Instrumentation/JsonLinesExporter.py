@@ -0,0 +1,58 @@
+# Importaciones necesarias de librerías
+import json
+import os
+import threading
+
+"""
+Exportador que escribe cada span y cada incremento de contador como una línea JSON en un archivo.
+El archivo se abre en modo "append", de modo que varias ejecuciones de la herramienta se acumulan y se pueden
+analizar después (ej: con jq o cargándolo en pandas) para ver qué hosts o fases son lentos.
+"""
+
+
+class JsonLinesExporter:
+    """
+    Constructor de la clase.
+    :param path: Ruta del archivo .jsonl
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def export_span(self, span):
+        self._write({
+            "type": "span",
+            "name": span.name,
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "start": span.start_time,
+            "duration_ms": round(span.duration * 1000, 3),
+            "attributes": span.attributes,
+            "error": span.error,
+        })
+
+    def export_counter(self, name, value, labels):
+        self._write({"type": "counter", "name": name, "value": value, "labels": labels})
+
+    """
+    Los eventos se escriben al producirse, así que al vaciar solo se asegura que estén en disco.
+    """
+
+    def flush(self, spans, counters):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def _write(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + "\n")
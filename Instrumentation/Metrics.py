@@ -0,0 +1,249 @@
+# Importaciones necesarias de librerías
+import atexit
+import os
+import threading
+import time
+from rich.console import Console
+
+"""
+Clase que registra tramos de tiempo (spans) y contadores de cada operación SSH: resolución DNS, conexión TCP,
+intercambio de claves, autenticación, apertura de canales, bytes transferidos, códigos de salida, túneles...
+Los datos se envían a uno o varios exportadores (ver JsonLinesExporter, PrometheusExporter y
+OpenTelemetryExporter) y además se agregan por nombre y etiquetas para los exportadores de métricas.
+
+Mientras no se active (Metrics.enable() o la variable de entorno SSHTOOL_METRICS) todas las llamadas vuelven
+inmediatamente sin medir ni reservar nada, de modo que la instrumentación no tiene coste.
+
+Ejemplo de uso:
+    with Metrics.span("ssh.auth", host=host, method="password") as span:
+        ...
+        span.set(result="ok")
+    Metrics.count("sftp.bytes", 4096, host=host, direction="put")
+"""
+
+
+class Metrics:
+    # Límites (segundos) de los intervalos del histograma de duraciones
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    # Atributos que se usan como etiquetas de los agregados (baja cardinalidad). El resto (rutas, comandos,
+    # tamaños...) solo llega a los exportadores de spans.
+    LABELS = ("host", "method", "kind", "direction", "protocol", "profile", "result", "status", "error")
+
+    enabled = False
+    _exporters = []
+    _lock = threading.Lock()
+    _local = threading.local()
+    # Agregados: (nombre, etiquetas) -> [número, suma, contadores por intervalo] / valor del contador
+    _span_stats = {}
+    _counters = {}
+
+    """
+    Método estático que activa la instrumentación con los exportadores indicados.
+    """
+
+    @staticmethod
+    def enable(*exporters):
+        with Metrics._lock:
+            Metrics._exporters.extend(exporters)
+            if not Metrics.enabled:
+                Metrics.enabled = True
+                atexit.register(Metrics.flush)
+
+    """
+    Método estático que desactiva la instrumentación, vacía los exportadores y los cierra.
+    """
+
+    @staticmethod
+    def disable():
+        Metrics.flush()
+        with Metrics._lock:
+            Metrics.enabled = False
+            exporters, Metrics._exporters = Metrics._exporters, []
+        for exporter in exporters:
+            exporter.close()
+
+    """
+    Método estático que activa la instrumentación a partir de una especificación de exportadores, por ejemplo:
+        "jsonl=~/.sshtool/metrics.jsonl,prometheus=~/.sshtool/metrics.prom,otel"
+    Si no se indica especificación se usa la variable de entorno SSHTOOL_METRICS (si no existe, no hace nada).
+    """
+
+    @staticmethod
+    def configure(spec=None):
+        from Instrumentation.JsonLinesExporter import JsonLinesExporter
+        from Instrumentation.OpenTelemetryExporter import OpenTelemetryExporter
+        from Instrumentation.PrometheusExporter import PrometheusExporter
+
+        spec = spec if spec is not None else os.environ.get("SSHTOOL_METRICS", "")
+        factories = {
+            "jsonl": lambda path: JsonLinesExporter(path or "~/.sshtool/metrics.jsonl"),
+            "prometheus": lambda path: PrometheusExporter(path or "~/.sshtool/metrics.prom"),
+            "otel": lambda path: OpenTelemetryExporter(),
+        }
+
+        exporters = []
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            kind, _, path = item.partition("=")
+            try:
+                if kind not in factories:
+                    raise ValueError(f"exportador desconocido '{kind}' (use {', '.join(factories)})")
+                exporters.append(factories[kind](path))
+            except Exception as e:
+                Console().print(f"[yellow]⚠ No se pudo activar la instrumentación {kind}: {e}[/yellow]")
+
+        if exporters:
+            Metrics.enable(*exporters)
+        return exporters
+
+    """
+    Método estático que devuelve un span (gestor de contexto) que mide la duración del bloque.
+    Si la instrumentación está desactivada devuelve un span vacío compartido.
+    :param name: Nombre de la operación (ej: "ssh.kex")
+    :param attributes: Etiquetas del span (ej: host, method...)
+    """
+
+    @staticmethod
+    def span(name, **attributes):
+        if not Metrics.enabled:
+            return _NO_SPAN
+        return _Span(name, attributes)
+
+    """
+    Método estático que suma un valor a un contador.
+    """
+
+    @staticmethod
+    def count(name, value=1, **labels):
+        if not Metrics.enabled:
+            return
+        key = (name, Metrics._labels(labels))
+        with Metrics._lock:
+            Metrics._counters[key] = Metrics._counters.get(key, 0) + value
+        for exporter in Metrics._exporters:
+            exporter.export_counter(name, value, labels)
+
+    """
+    Método estático que pide a los exportadores que escriban los agregados (se llama también al salir).
+    """
+
+    @staticmethod
+    def flush():
+        if not Metrics.enabled:
+            return
+        spans, counters = Metrics.snapshot()
+        for exporter in list(Metrics._exporters):
+            try:
+                exporter.flush(spans, counters)
+            except Exception as e:
+                Console().print(f"[yellow]⚠ Error al exportar métricas: {e}[/yellow]")
+
+    """
+    Método estático que devuelve una copia de los agregados: (duraciones de spans, contadores).
+    """
+
+    @staticmethod
+    def snapshot():
+        with Metrics._lock:
+            spans = {key: [stats[0], stats[1], list(stats[2])] for key, stats in Metrics._span_stats.items()}
+            return spans, dict(Metrics._counters)
+
+    """
+    Método auxiliar que registra un span terminado: lo agrega y lo entrega a los exportadores.
+    """
+
+    @staticmethod
+    def _finish(span):
+        key = (span.name, Metrics._labels(span.attributes))
+        with Metrics._lock:
+            stats = Metrics._span_stats.get(key)
+            if stats is None:
+                stats = Metrics._span_stats[key] = [0, 0.0, [0] * len(Metrics.BUCKETS)]
+            stats[0] += 1
+            stats[1] += span.duration
+            for i, bound in enumerate(Metrics.BUCKETS):
+                if span.duration <= bound:
+                    stats[2][i] += 1
+        for exporter in Metrics._exporters:
+            exporter.export_span(span)
+
+    """
+    Método auxiliar que convierte las etiquetas en una tupla ordenada (para usarla como clave de los agregados).
+    Solo se usan las etiquetas de LABELS.
+    """
+
+    @staticmethod
+    def _labels(labels):
+        return tuple(sorted((key, str(value)) for key, value in labels.items() if key in Metrics.LABELS))
+
+    @staticmethod
+    def _stack():
+        stack = getattr(Metrics._local, "stack", None)
+        if stack is None:
+            stack = Metrics._local.stack = []
+        return stack
+
+
+"""
+Span de una operación. Guarda el identificador de traza y el del span padre (el span abierto en el mismo hilo),
+para que los exportadores puedan reconstruir la jerarquía (compatible con OpenTelemetry).
+"""
+
+
+class _Span:
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = None
+        self.parent_id = None
+        self.start_time = None
+        self.duration = 0.0
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self):
+        stack = Metrics._stack()
+        if stack:
+            self.trace_id = stack[-1].trace_id
+            self.parent_id = stack[-1].span_id
+        else:
+            self.trace_id = os.urandom(16).hex()
+        stack.append(self)
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        stack = Metrics._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+            self.attributes["error"] = True
+        Metrics._finish(self)
+        return False
+
+
+"""
+Span vacío que se devuelve cuando la instrumentación está desactivada.
+"""
+
+
+class _NoSpan:
+
+    def set(self, **attributes):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
@@ -0,0 +1,51 @@
+"""
+Exportador que reenvía spans y contadores a OpenTelemetry (opentelemetry-api / opentelemetry-sdk).
+Usa el TracerProvider y el MeterProvider globales, de modo que el destino (OTLP, consola, Jaeger...) se configura
+como en cualquier aplicación instrumentada, por ejemplo con "opentelemetry-instrument" y las variables OTEL_*.
+Es una dependencia opcional: si no está instalada, el exportador no se puede activar.
+"""
+
+
+class OpenTelemetryExporter:
+
+    def __init__(self):
+        try:
+            from opentelemetry import metrics, trace
+        except ImportError:
+            raise ImportError("opentelemetry no está instalado (pip install opentelemetry-sdk)")
+        self._trace = trace
+        self._tracer = trace.get_tracer("sshtool")
+        self._meter = metrics.get_meter("sshtool")
+        self._counters = {}
+
+    """
+    El span ya ha terminado, así que se crea en OpenTelemetry con sus instantes reales de inicio y fin.
+    La jerarquía original (span padre) se conserva en los atributos sshtool.trace_id / sshtool.parent_id.
+    """
+
+    def export_span(self, span):
+        start_ns = int(span.start_time * 1e9)
+        attributes = self._attributes(span.attributes)
+        attributes.update(self._attributes({"sshtool.trace_id": span.trace_id, "sshtool.span_id": span.span_id,
+                                            "sshtool.parent_id": span.parent_id}))
+        otel_span = self._tracer.start_span(span.name, start_time=start_ns, attributes=attributes)
+        if span.error:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=start_ns + int(span.duration * 1e9))
+
+    def export_counter(self, name, value, labels):
+        counter = self._counters.get(name)
+        if counter is None:
+            counter = self._counters[name] = self._meter.create_counter(f"sshtool.{name}")
+        counter.add(value, self._attributes(labels))
+
+    def flush(self, spans, counters):
+        pass
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _attributes(values):
+        return {key: value if isinstance(value, (str, bool, int, float)) else str(value)
+                for key, value in values.items() if value is not None}
@@ -0,0 +1,82 @@
+# Importaciones necesarias de librerías
+import os
+import re
+import time
+
+"""
+Exportador que escribe los agregados en el formato de texto de Prometheus, pensado para el "textfile collector"
+de node_exporter. Cada span se publica como un histograma de duraciones (sshtool_<nombre>_seconds) y cada
+contador como sshtool_<nombre>_total, con las etiquetas de baja cardinalidad (host, método, dirección...).
+El archivo se reescribe de forma atómica (archivo temporal + rename) como máximo cada INTERVAL segundos y al salir.
+"""
+
+
+class PrometheusExporter:
+    # Tiempo mínimo (segundos) entre escrituras mientras la herramienta está en marcha
+    INTERVAL = 15
+
+    """
+    Constructor de la clase.
+    :param path: Ruta del archivo .prom
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._last_write = 0
+
+    """
+    Los spans se agregan en Metrics; aquí solo se decide si toca reescribir el archivo.
+    """
+
+    def export_span(self, span):
+        if time.monotonic() - self._last_write >= self.INTERVAL:
+            from Instrumentation.Metrics import Metrics
+            self.flush(*Metrics.snapshot())
+
+    def export_counter(self, name, value, labels):
+        pass
+
+    def flush(self, spans, counters):
+        from Instrumentation.Metrics import Metrics
+        self._last_write = time.monotonic()
+        lines = []
+
+        for name in sorted({name for name, _ in spans}):
+            metric = f"sshtool_{self._sanitize(name)}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (span_name, labels), (count, total, buckets) in sorted(spans.items()):
+                if span_name != name:
+                    continue
+                for bound, bucket_count in zip(Metrics.BUCKETS, buckets):
+                    lines.append(f"{metric}_bucket{self._format(labels, le=bound)} {bucket_count}")
+                lines.append(f"{metric}_bucket{self._format(labels, le='+Inf')} {count}")
+                lines.append(f"{metric}_sum{self._format(labels)} {total:.6f}")
+                lines.append(f"{metric}_count{self._format(labels)} {count}")
+
+        for name in sorted({name for name, _ in counters}):
+            metric = f"sshtool_{self._sanitize(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{metric}{self._format(labels)} {value}")
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _sanitize(name):
+        return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+    @staticmethod
+    def _format(labels, **extra):
+        pairs = list(labels) + [(key, str(value)) for key, value in extra.items()]
+        if not pairs:
+            return ""
+        escaped = (value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in pairs)
+        return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
@@ -1,11 +1,24 @@
 # Importaciones necesarias de librerías
+import argparse
+import getpass
 import sys
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.panel import Panel
+from rich.table import Table
 # Importaciones necesarias de otras clases
+from Connection.BandwidthLimiter import BandwidthLimiter
+from Connection.HostProber import HostProber
+from Connection.Inventory import Inventory
 from Connection.SSHConnection import SSHConnection
+from Commands.JobFile import JobFile
+from Commands.JobRunnerCommand import JobRunnerCommand
 from Commands.KeyManagerCommand import KeyManagerCommand
+from Connection.JumpHost import JumpHost
+from Commands.RemoteCopyCommand import RemoteCopyCommand
+from Commands.SessionManagerCommand import SessionManagerCommand
+from Commands.SessionReplayCommand import SessionReplayCommand
+from Instrumentation.Metrics import Metrics
 
 '''
 Es la clase principal de la herramienta. En esta clase comienza el flujo principal (ver main)
@@ -22,24 +35,85 @@ Uso:
   python3 SSHTool.py           Inicia la herramienta con el menú principal
   python3 SSHTool.py --help    Muestra este mensaje de ayuda
   python3 SSHTool.py -h        Muestra este mensaje de ayuda
+  python3 SSHTool.py put usuario@host[:puerto] /ruta/remota < datos
+                               Sube por SFTP lo que llegue por la entrada estándar (ej: pg_dump | ... put ...)
+  python3 SSHTool.py get usuario@host[:puerto] /ruta/remota > datos
+                               Descarga por SFTP un archivo remoto a la salida estándar
+     → Sin archivos temporales y con memoria constante, sea cual sea el tamaño (--buffer-size ajusta el búfer,
+       --profile el perfil de transporte, --limit la velocidad máxima). Se autentica con el agente o las claves de ~/.ssh y, si no puede,
+       pide la contraseña.
+  python3 SSHTool.py run trabajos.toml [--dry-run] [--max-parallel N]
+                               Ejecuta un archivo de trabajos (TOML, o YAML con PyYAML): comandos, subidas,
+                               descargas, claves y túneles sobre grupos de servidores
+     → Los pasos independientes se ejecutan en paralelo (con un máximo por servidor), los que fallan se reintentan
+       y los que dependen de un paso fallido se omiten. --dry-run muestra el plan sin ejecutar nada. El formato
+       está descrito en Commands/JobFile.py.
+  python3 SSHTool.py scan web tag:nginx db1.example.com [--auth] [--inventory inventario.toml]
+                               Comprueba a la vez qué servidores responden (TCP, versión de SSH y, con --auth,
+                               los métodos de autenticación que aceptan)
+     → Los servidores se eligen por grupo, etiqueta o nombre del inventario (~/.ssh/config, SSHTOOL_INVENTORY y
+       --inventory; formato en Connection/Inventory.py) o por dirección. Los archivos de trabajos hacen esta
+       comprobación antes de empezar y omiten los servidores caídos.
 
 Funcionalidades:
   1. Conectar a un servidor SSH
      → Establece una conexión SSH mediante contraseña, clave, agente o certificado.
+       La conexión se comprueba cada 30 segundos (SSHTOOL_KEEPALIVE, 0 = nunca) y, si se pierde, se restablece
+       sola con las mismas credenciales.
+       La clave de un servidor nuevo se guarda en known_hosts la primera vez; con
+       SSHTOOL_HOST_KEY_CHECKING=strict solo se aceptan los que ya están en él.
 
   2. Configurar claves SSH
      → Opciones para generar claves, copiarlas al servidor y ver claves autorizadas.
 
+  3. Gestionar sesiones abiertas
+     → Mantiene varias conexiones abiertas a la vez: cambiar de una a otra al instante (::cambiar <nombre> dentro
+       de la terminal), enviar un comando a varias (::difundir <comando>) y cerrarlas por nombre.
+
+  4. Reproducir o buscar en sesiones grabadas
+     → Reproduce una sesión de comandos grabada (desde cualquier segundo) o busca texto en ella.
+
   Tras realizar realizar una conexión SSH a un servidor podrá realizar las siguiente acciones:
   
   1. Transferir archivos
-     → Envía o descarga archivos usando SFTP o SCP.
+     → Envía o descarga archivos usando SFTP o SCP, con progreso en vivo (velocidad y tiempo restante).
+       Al subir por SFTP se admiten comodines (ej: logs/*.gz) para enviar varios archivos en paralelo, y se
+       omiten los archivos que ya están en el servidor con el mismo contenido (sha256).
+       "distribuir" sube un archivo una sola vez y lo reenvía desde ese servidor al resto.
 
   2. Ejecutar comandos remotos
-     → Acceso a terminal SSH interactiva con salida en tiempo real.
+     → Acceso a terminal SSH interactiva con salida en tiempo real. La sesión se puede grabar (formato
+       asciicast, en ~/.sshtool/sessions o SSHTOOL_RECORD_DIR); con SSHTOOL_RECORD=1 se graban todas.
+       Lo que se escribe (ej: contraseñas) solo se graba con SSHTOOL_RECORD_INPUT=1.
+       La salida de comandos muy extensos se resume en pantalla; toda se conserva en memoria (100 MB,
+       SSHTOOL_SCROLLBACK_MB) y se puede consultar con "::buscar <expresión regular>".
+
+  3. Gestionar túneles SSH
+     → Crea túneles locales o remotos y muestra los activos.
+
+  4. Seguir logs remotos
+     → Muestra en tiempo real las líneas de uno o varios logs (tail -F), filtradas en el servidor con grep.
+
+  5. Volver al menú principal
+     → Cierra la conexión, o la deja abierta en el gestor de sesiones si así se indica.
 
-  3. Salir
-     → Cierra la conexión y finaliza el programa.
+Límites de velocidad:
+  SSHTOOL_BWLIMIT="global=20M,host=10M,backup.example.com=2M,transfer=5M" python3 SSHTool.py
+     → Limita las transferencias (bytes/s) en total, por servidor, para un servidor concreto y por archivo. Las
+       transferencias que coinciden se reparten el ancho de banda de forma justa y los shells interactivos tienen
+       prioridad, así que una copia grande no hace lenta la terminal. Cada transferencia puede tener además su
+       propio límite.
+
+Caché de resultados:
+  SSHTOOL_RESULT_CACHE="ttl=600,entries=5000,size=32M,disk=~/.sshtool/result-cache" python3 SSHTool.py
+     → Reutiliza durante ttl segundos la salida de consultas de solo lectura (listado de claves autorizadas, pasos
+       run con cache = true en los archivos de trabajos), en memoria y opcionalmente en disco ("1" = valores por
+       defecto). Añadir claves y los pasos que modifican el servidor descartan lo guardado de ese servidor.
+
+Métricas:
+  SSHTOOL_METRICS=jsonl=~/.sshtool/metrics.jsonl,prometheus=~/.sshtool/metrics.prom,otel python3 SSHTool.py
+     → Registra la duración de cada fase (DNS, TCP, intercambio de claves, autenticación, canales, SFTP, túneles)
+       y contadores (bytes transferidos, códigos de salida). Sin la variable no se mide nada.
 
 Consejo:
   Use primero la opción de "Configurar claves SSH" para evitar errores si desea autenticación por clave, agente y/o certificado.
@@ -49,6 +123,132 @@ Consejo:
     sys.exit(0)
 
 
+"""
+Función que atiende "put" y "get" desde la línea de comandos: transfiere por SFTP entre la entrada/salida
+estándar y un archivo remoto usando TransportProfile.put_stream()/get_stream().
+Los mensajes se escriben en la salida de errores, porque la salida estándar puede llevar los datos descargados.
+"""
+
+
+def stream_transfer(args):
+    parser = argparse.ArgumentParser(prog="SSHTool.py")
+    parser.add_argument("action", choices=["put", "get"])
+    parser.add_argument("server", help="usuario@host[:puerto]")
+    parser.add_argument("remote_path")
+    parser.add_argument("--buffer-size", type=int, default=None, help="Tamaño del búfer de lectura en bytes")
+    parser.add_argument("--profile", default="default", help="Perfil de transporte")
+    parser.add_argument("--limit", type=BandwidthLimiter.parse_rate, default=None,
+                        help="Límite de velocidad en bytes/s (ej: 512K, 5M)")
+    options = parser.parse_args(args)
+
+    console = Console(stderr=True)
+    user, host, port = RemoteCopyCommand.parse_destination(options.server, getpass.getuser())
+    connection = SSHConnection(host, user, port, auth_method="agente", profile=options.profile)
+    connection.console = console
+    try:
+        connection.connect_unattended(ask_password=getpass.getpass)
+        profile = connection.profile
+        sftp = profile.open_sftp(connection.client)
+        flow = BandwidthLimiter.default().flow(host, rate=options.limit)
+        throttle = flow.throttle if flow.buckets else None
+        try:
+            if options.action == "put":
+                transferred = profile.put_stream(sftp, sys.stdin.buffer, options.remote_path,
+                                                 buffer_size=options.buffer_size, throttle=throttle)
+            else:
+                transferred = profile.get_stream(sftp, options.remote_path, sys.stdout.buffer,
+                                                 buffer_size=options.buffer_size, throttle=throttle)
+                sys.stdout.buffer.flush()
+        finally:
+            sftp.close()
+        console.print(f"[green]✔ {transferred} bytes transferidos ({host}:{options.remote_path})[/green]")
+        return 0
+    except Exception as e:
+        console.print(f"[bold red]✖ Error en la transferencia: {e}[/bold red]")
+        return 1
+    finally:
+        connection.client.close()
+
+
+"""
+Función que atiende "run": ejecuta un archivo de trabajos con JobRunnerCommand y devuelve su código de salida.
+"""
+
+
+def run_jobs(args):
+    parser = argparse.ArgumentParser(prog="SSHTool.py run")
+    parser.add_argument("job_file", help="Archivo de trabajos (.toml, .yml o .yaml)")
+    parser.add_argument("--dry-run", action="store_true", help="Muestra las tareas y sus dependencias sin ejecutarlas")
+    parser.add_argument("--max-parallel", type=int, default=None, help="Tareas a la vez en total")
+    options = parser.parse_args(args)
+    if options.max_parallel is not None and options.max_parallel < 1:
+        parser.error("--max-parallel debe ser al menos 1")
+
+    console = Console()
+    try:
+        job = JobFile.load(options.job_file)
+    except Exception as e:
+        console.print(f"[bold red]✖ No se pudo leer el archivo de trabajos: {e}[/bold red]")
+        return 2
+    runner = JobRunnerCommand(job, max_parallel=options.max_parallel, console=console)
+    return runner.plan() if options.dry_run else runner.run()
+
+
+"""
+Función que atiende "scan": comprueba qué servidores del inventario (o direcciones) responden y muestra una tabla.
+Devuelve 0 si responden todos y 1 si no.
+"""
+
+
+def scan_hosts(args):
+    parser = argparse.ArgumentParser(prog="SSHTool.py scan")
+    parser.add_argument("selectors", nargs="+", help="Grupos, tag:<etiqueta>, nombres o usuario@host[:puerto]")
+    parser.add_argument("--inventory", default=None, help="Archivo de inventario adicional (.toml, .yml o .yaml)")
+    parser.add_argument("--auth", action="store_true", help="Comprueba también los métodos de autenticación")
+    parser.add_argument("--user", default=getpass.getuser(), help="Usuario de los servidores que no lo indiquen")
+    parser.add_argument("--port", type=int, default=22, help="Puerto de los servidores que no lo indiquen")
+    parser.add_argument("--concurrency", type=int, default=None, help="Comprobaciones a la vez")
+    parser.add_argument("--timeout", type=float, default=None, help="Segundos de espera de cada fase")
+    options = parser.parse_args(args)
+
+    console = Console()
+    try:
+        inventory = Inventory.default()
+        if options.inventory:
+            inventory.merge(Inventory.load(options.inventory))
+    except Exception as e:
+        console.print(f"[bold red]✖ No se pudo leer el inventario: {e}[/bold red]")
+        return 2
+    try:
+        servers = [server for selector in options.selectors
+                   for server, _ in inventory.resolve(selector, options.user, options.port)]
+    except ValueError as e:
+        console.print(f"[bold red]✖ {e}[/bold red]")
+        return 2
+    with console.status(f"Comprobando {len(set(servers))} servidores..."):
+        results = HostProber(options.concurrency, options.timeout).probe(servers, check_auth=options.auth)
+
+    table = Table(title="Servidores")
+    table.add_column("Servidor", style="cyan")
+    table.add_column("Estado")
+    table.add_column("Versión")
+    if options.auth:
+        table.add_column("Autenticación")
+    table.add_column("Latencia", justify="right")
+    for (user, host, port), result in sorted(results.items(), key=lambda item: (item[1]["status"] == "ok", item[0])):
+        color = "green" if result["status"] == "ok" else "red"
+        row = [f"{user}@{host}:{port}", f"[{color}]{result['status']}[/{color}]",
+               result["version"] or result["detail"]]
+        if options.auth:
+            row.append(", ".join(result["auth_methods"] or []))
+        row.append(f"{result['latency'] * 1000:.0f} ms" if result["latency"] is not None else "-")
+        table.add_row(*row)
+    console.print(table)
+    alive = sum(1 for result in results.values() if result["status"] == "ok")
+    console.print(f"[bold]{alive} de {len(results)} servidores disponibles[/bold]")
+    return 0 if alive == len(results) else 1
+
+
 class SSHTool:
     """
     Este es el constructor.
@@ -61,6 +261,7 @@ class SSHTool:
         self.console = Console()
         self.running = True
         self.ssh_connection = None
+        self.sessions = SessionManagerCommand()  # Sesiones que siguen abiertas entre usos del menú
 
     """
     Muestra el menú principal de la herramienta y gestiona la elección de opciones.
@@ -72,12 +273,14 @@ class SSHTool:
         menu_options = {
             "1": ("Conectar a un servidor SSH", self.connect_server),
             "2": ("Configurar claves SSH", self.manage_keys),
-            "3": ("Salir", self.exit_tool)
+            "3": ("Gestionar sesiones abiertas", self.sessions.run),
+            "4": ("Reproducir o buscar en sesiones grabadas", lambda: SessionReplayCommand().run()),
+            "5": ("Salir", self.exit_tool)
         }
 
         """
         Mientras self.running sea True, la herramienta seguirá mostrando el menú principal.
-        Recorre el diccionario menu_options (que contiene las 3 opciones disponibles) 
+        Recorre el diccionario menu_options (que contiene las 5 opciones disponibles) 
         y las muestra con su número (key) y descripción (desc).
         """
         while self.running:
@@ -99,7 +302,14 @@ class SSHTool:
         self.console.print("\n[bold]Conectar a un servidor SSH[/bold]", style="green")
         self.ssh_connection = SSHConnection.create_connection()
         if self.ssh_connection:
-            self.ssh_connection.show_session_menu()
+            self.ssh_connection.show_session_menu(keep_open=True)
+            # Se puede dejar abierta en el gestor de sesiones para volver a ella sin conectar de nuevo
+            if Prompt.ask("[ ] ¿Mantener la conexión abierta en el gestor de sesiones?", choices=["si", "no"],
+                          default="no") == "si":
+                name = self.sessions.add(self.ssh_connection)
+                self.console.print(f"[green]✔ Sesión {name} guardada en el gestor de sesiones[/green]")
+            else:
+                self.ssh_connection.close()
         else:
             self.console.print(
                 "[bold red]\n✖ No se pudo establecer la conexión SSH. Volviendo al menú principal...[/bold red]")
@@ -114,7 +324,8 @@ class SSHTool:
 
     def manage_keys(self):
         ssh_client = self.ssh_connection.get_client() if self.ssh_connection else None
-        manager = KeyManagerCommand(ssh_client)
+        manager = KeyManagerCommand(ssh_client, self.ssh_connection.host if self.ssh_connection else None,
+                                    self.ssh_connection.port if self.ssh_connection else None)
         manager.run()
 
     """
@@ -123,6 +334,8 @@ class SSHTool:
 
     def exit_tool(self):
         self.console.print("\n👋 Saliendo de SSH Tool...", style="bold red")
+        self.sessions.close_all()  # Cierra las sesiones que quedasen abiertas en el gestor
+        JumpHost.close_all()  # Cierra las conexiones compartidas con los bastiones
         self.running = False
 
 
@@ -130,6 +343,14 @@ class SSHTool:
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] in ("--help", "--h"):
         show_help()
+    # Activa la instrumentación si se ha configurado con la variable de entorno SSHTOOL_METRICS
+    Metrics.configure()
+    if len(sys.argv) > 1 and sys.argv[1] in ("put", "get"):
+        sys.exit(stream_transfer(sys.argv[1:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "run":
+        sys.exit(run_jobs(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "scan":
+        sys.exit(scan_hosts(sys.argv[2:]))
     try:
         tool = SSHTool()
         tool.display_main_menu()